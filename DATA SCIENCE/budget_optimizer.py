@@ -0,0 +1,115 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from predictor_data import SALES_NUMERIC
+
+
+class BudgetOptimizer:
+    """Search TV/Radio/Newspaper splits of a fixed budget with batched predictions.
+
+    Candidates are scored in large vectorised batches: the design matrix is
+    built directly in NumPy (no per-row get_dummies) and split across threads,
+    which run the forest's tree traversal in parallel because sklearn releases
+    the GIL while predicting.
+    """
+
+    def __init__(self, model, scaler, feature_columns, n_jobs=None, chunk_size=8192):
+        self.model = model
+        self.feature_columns = list(feature_columns)
+        self.numeric_idx = [self.feature_columns.index(col) for col in SALES_NUMERIC]
+        self.mean = np.asarray(scaler.mean_, dtype=float)
+        self.scale = np.asarray(scaler.scale_, dtype=float)
+        self.n_jobs = n_jobs or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+
+    def design_matrix(self, allocations, age_group, platform):
+        """Build scaled model inputs for an (n, 3) array of TV/Radio/Newspaper spends."""
+        X = np.zeros((len(allocations), len(self.feature_columns)))
+        X[:, self.numeric_idx] = (allocations - self.mean) / self.scale
+        for col in (f"AgeGroup_{age_group}", f"Platform_{platform}"):
+            if col in self.feature_columns:  # The dropped first category has no column
+                X[:, self.feature_columns.index(col)] = 1.0
+        return pd.DataFrame(X, columns=self.feature_columns)
+
+    def evaluate(self, allocations, age_group, platform):
+        """Predict sales for every candidate allocation."""
+        allocations = np.asarray(allocations, dtype=float)
+        chunks = [allocations[i:i + self.chunk_size] for i in range(0, len(allocations), self.chunk_size)]
+        predict = lambda chunk: self.model.predict(self.design_matrix(chunk, age_group, platform))
+        if self.n_jobs > 1 and len(chunks) > 1:
+            with ThreadPoolExecutor(max_workers=self.n_jobs) as pool:
+                return np.concatenate(list(pool.map(predict, chunks)))
+        return np.concatenate([predict(chunk) for chunk in chunks])
+
+    @staticmethod
+    def simplex_lattice(budget, steps):
+        """All splits of the budget into three parts on a regular grid."""
+        i, j = np.meshgrid(np.arange(steps + 1), np.arange(steps + 1), indexing='ij')
+        keep = i + j <= steps
+        i, j = i[keep], j[keep]
+        return np.column_stack([i, j, steps - i - j]) * (budget / steps)
+
+    @staticmethod
+    def neighbourhood(centre, budget, radius, n, rng):
+        """Random splits within `radius` of a centre split, kept on the budget simplex."""
+        tv = centre[0] + rng.uniform(-radius, radius, n)
+        radio = centre[1] + rng.uniform(-radius, radius, n)
+        candidates = np.column_stack([tv, radio, budget - tv - radio])
+        return candidates[(candidates >= 0).all(axis=1)]
+
+    def optimize(self, budget, age_group, platform, method='coarse_to_fine', coarse_steps=60,
+                 rounds=4, samples=4000, top_k=5, seed=42):
+        """Return the predicted best allocation of `budget` for an audience/platform."""
+        if budget <= 0:
+            raise ValueError("Budget must be positive")
+        start = time.perf_counter()
+        rng = np.random.default_rng(seed)
+
+        if method == 'coarse_to_fine':
+            candidates = self.simplex_lattice(budget, coarse_steps)
+            scores = self.evaluate(candidates, age_group, platform)
+            evaluations = len(candidates)
+            radius = budget / coarse_steps
+            for _ in range(rounds):
+                # Refine around the best few points with a shrinking radius
+                best = candidates[np.argsort(scores)[-top_k:]]
+                local = np.vstack([self.neighbourhood(c, budget, radius, samples // top_k, rng) for c in best])
+                local_scores = self.evaluate(local, age_group, platform)
+                candidates = np.vstack([best, local])
+                scores = np.concatenate([scores[np.argsort(scores)[-top_k:]], local_scores])
+                evaluations += len(local)
+                radius /= 2
+        elif method == 'evolutionary':
+            population = rng.dirichlet(np.ones(3), samples) * budget
+            scores = self.evaluate(population, age_group, platform)
+            evaluations = len(population)
+            sigma = budget / 10
+            for _ in range(rounds):
+                # (mu + lambda): keep the fittest, mutate them, re-project onto the budget
+                parents = population[np.argsort(scores)[-samples // 10:]]
+                children = np.abs(parents[rng.integers(len(parents), size=samples)]
+                                  + rng.normal(0, sigma, (samples, 3)))
+                children *= budget / children.sum(axis=1, keepdims=True)
+                child_scores = self.evaluate(children, age_group, platform)
+                population = np.vstack([parents, children])
+                scores = np.concatenate([scores[np.argsort(scores)[-samples // 10:]], child_scores])
+                evaluations += samples
+                sigma /= 2
+            candidates = population
+        else:
+            raise ValueError("method must be 'coarse_to_fine' or 'evolutionary'")
+
+        best = int(np.argmax(scores))
+        tv, radio, newspaper = candidates[best]
+        return {
+            'TV': float(tv),
+            'Radio': float(radio),
+            'Newspaper': float(newspaper),
+            'predicted_sales': float(scores[best]),
+            'evaluations': evaluations,
+            'elapsed': time.perf_counter() - start,
+        }
@@ -0,0 +1,137 @@
+import sys
+import time
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import cross_val_predict, train_test_split
+from sklearn.preprocessing import StandardScaler
+
+
+class CascadeClassifier:
+    """Two-stage classifier: a logistic model answers confident inputs, the forest the rest.
+
+    The fast stage is evaluated with plain NumPy (one matrix product and a
+    softmax), so an answered row costs microseconds instead of a pass
+    through every tree. fit() chooses the confidence threshold from
+    out-of-fold logistic probabilities and the forest's out-of-bag votes
+    (the forest must be fitted with ``oob_score=True``): the lowest
+    threshold at which the fast stage is at least as accurate as the
+    forest on the rows it would answer. ``threshold=np.inf`` sends every
+    row to the forest.
+    """
+
+    def __init__(self, full, fast=None, threshold=None):
+        self.full = full
+        self.fast = fast or LogisticRegression(max_iter=1000)
+        self.threshold = threshold
+        self.classes_ = full.classes_
+        self.seen = 0
+        self.escalated = 0
+        self.last_escalated = np.zeros(0, dtype=bool)
+
+    def fit(self, X, y):
+        """Fit the fast stage on the forest's training data and pick the threshold."""
+        y = np.asarray(y)
+        self.fast.fit(X, y)
+        if not np.array_equal(self.fast.classes_, self.classes_):
+            raise ValueError("Fast and full models were trained on different classes")
+        if self.threshold is None:
+            folds = cross_val_predict(LogisticRegression(**self.fast.get_params()), X, y, cv=5,
+                                      method='predict_proba')
+            self.threshold = self.pick_threshold(folds, self.full.oob_decision_function_, y)
+        return self
+
+    def pick_threshold(self, fast_proba, full_proba, y):
+        """Lowest confidence at which the fast stage matches the forest on the rows it keeps."""
+        confidence = fast_proba.max(axis=1)
+        fast_correct = self.classes_[fast_proba.argmax(axis=1)] == y
+        # Rows the forest never left out of a bootstrap count as forest-correct
+        full_correct = np.where(np.isnan(full_proba).any(axis=1), True,
+                                self.classes_[np.nan_to_num(full_proba).argmax(axis=1)] == y)
+
+        order = np.argsort(-confidence, kind='stable')
+        margin = np.cumsum(fast_correct[order].astype(int) - full_correct[order].astype(int))
+        # Only cut between distinct confidences, so equal scores are routed together
+        cut = np.append(confidence[order][1:] < confidence[order][:-1], True)
+        keep = np.flatnonzero((margin >= 0) & cut)
+        return float(confidence[order][keep[-1]]) if len(keep) else np.inf
+
+    def _fast_proba(self, X):
+        scores = np.asarray(X, dtype=float) @ self.fast.coef_.T + self.fast.intercept_
+        if scores.shape[1] == 1:
+            positive = 1.0 / (1.0 + np.exp(-scores[:, 0]))
+            return np.column_stack([1.0 - positive, positive])
+        scores -= scores.max(axis=1, keepdims=True)
+        exp = np.exp(scores)
+        return exp / exp.sum(axis=1, keepdims=True)
+
+    def _route(self, X):
+        """(probabilities, escalated mask) without touching the counters."""
+        proba = self._fast_proba(X)
+        escalate = proba.max(axis=1) < self.threshold
+        if escalate.any():
+            rows = np.flatnonzero(escalate)
+            proba[escalate] = self.full.predict_proba(X.iloc[rows] if hasattr(X, 'iloc') else X[rows])
+        return proba, escalate
+
+    def predict_proba(self, X):
+        proba, escalate = self._route(X)
+        self.seen += len(escalate)
+        self.escalated += int(escalate.sum())
+        self.last_escalated = escalate
+        return proba
+
+    def predict(self, X):
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+    @property
+    def escalation_rate(self):
+        return self.escalated / self.seen if self.seen else 0.0
+
+    def evaluate(self, X, y, max_rows=200):
+        """Held-out accuracy, escalation rate and per-row latency of the forest vs the cascade.
+
+        Latency is measured one row at a time, the way the apps predict.
+        """
+        y = np.asarray(y)
+        proba, escalate = self._route(X)
+        report = {
+            'forest_accuracy': float(np.mean(self.full.predict(X) == y)),
+            'cascade_accuracy': float(np.mean(self.classes_[proba.argmax(axis=1)] == y)),
+            'escalation_rate': float(escalate.mean()),
+            'threshold': self.threshold,
+        }
+        rows = [X.iloc[i:i + 1] if hasattr(X, 'iloc') else X[i:i + 1] for i in range(min(len(y), max_rows))]
+        for name, predict in (('forest', self.full.predict_proba), ('cascade', lambda row: self._route(row)[0])):
+            start = time.perf_counter()
+            for row in rows:
+                predict(row)
+            report[f'{name}_ms_per_row'] = (time.perf_counter() - start) / len(rows) * 1e3
+        report['speedup'] = report['forest_ms_per_row'] / report['cascade_ms_per_row']
+        return report
+
+
+def format_report(title, report):
+    return (f"== {title} ==\n"
+            f"threshold {report['threshold']:.3f}, {report['escalation_rate']:.1%} escalated to the forest\n"
+            f"{'':<8} {'accuracy':>9} {'ms/row':>8}\n"
+            f"{'forest':<8} {report['forest_accuracy']:>9.3f} {report['forest_ms_per_row']:>8.3f}\n"
+            f"{'cascade':<8} {report['cascade_accuracy']:>9.3f} {report['cascade_ms_per_row']:>8.3f}"
+            f"  ({report['speedup']:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    # Usage: python cascade.py [iris|titanic]  - accuracy/latency trade-off on held-out data
+    from predictor_data import PREDICTORS
+
+    for name in sys.argv[1:] or ['iris', 'titanic']:
+        X, y = PREDICTORS[name]['loader']()
+        X_train, X_test, y_train, y_test = train_test_split(X.astype(float), y, test_size=0.2, random_state=42)
+        scale_columns = PREDICTORS[name]['scale_columns']
+        scaler = StandardScaler()
+        X_train[scale_columns] = scaler.fit_transform(X_train[scale_columns])
+        X_test[scale_columns] = scaler.transform(X_test[scale_columns])
+        forest = RandomForestClassifier(n_estimators=100, random_state=42, oob_score=True).fit(X_train, y_train)
+        cascade = CascadeClassifier(forest).fit(X_train, y_train)
+        print(format_report(name, cascade.evaluate(X_test, y_test)))
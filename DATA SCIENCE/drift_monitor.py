@@ -0,0 +1,378 @@
+import atexit
+import base64
+import glob
+import hashlib
+import json
+import math
+import os
+import sys
+import time
+import uuid
+
+import numpy as np
+
+
+class QuantileSketch:
+    """Mergeable relative-error quantile sketch (DDSketch).
+
+    Values are counted in logarithmic buckets, so any quantile is returned
+    within `relative_accuracy` of the true value. Memory is capped at
+    `max_buckets` per sign by collapsing the buckets nearest zero.
+    """
+
+    def __init__(self, relative_accuracy=0.01, max_buckets=2048):
+        self.relative_accuracy = relative_accuracy
+        self.max_buckets = max_buckets
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.positive = {}
+        self.negative = {}
+        self.zero = 0
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add_many(self, values):
+        """Add an array of values (NaNs are ignored)."""
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return
+        self.count += len(values)
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        tiny = np.abs(values) < 1e-12
+        self.zero += int(tiny.sum())
+        for store, part in ((self.positive, values[values >= 1e-12]), (self.negative, -values[values <= -1e-12])):
+            if len(part):
+                indexes, counts = np.unique(np.ceil(np.log(part) / self.log_gamma).astype(np.int64),
+                                            return_counts=True)
+                for index, n in zip(indexes.tolist(), counts.tolist()):
+                    store[index] = store.get(index, 0) + n
+                self._collapse(store)
+
+    def add(self, value):
+        self.add_many([value])
+
+    def _collapse(self, store):
+        if len(store) <= self.max_buckets:
+            return
+        indexes = sorted(store)
+        overflow = indexes[:len(indexes) - self.max_buckets + 1]
+        store[overflow[-1]] = sum(store.pop(i) for i in overflow[:-1]) + store[overflow[-1]]
+
+    def _value(self, index):
+        return 2 * self.gamma ** index / (self.gamma + 1)
+
+    def _ordered(self):
+        """(representative value, count) for every bucket in ascending order."""
+        buckets = [(-self._value(i), self.negative[i]) for i in sorted(self.negative, reverse=True)]
+        if self.zero:
+            buckets.append((0.0, self.zero))
+        buckets.extend((self._value(i), self.positive[i]) for i in sorted(self.positive))
+        return buckets
+
+    def quantile(self, q):
+        if not self.count:
+            return math.nan
+        rank = q * (self.count - 1)
+        seen = 0
+        for value, n in self._ordered():
+            seen += n
+            if seen > rank:
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def cdf(self, x):
+        """Approximate fraction of values <= x."""
+        if not self.count:
+            return math.nan
+        below = sum(n for value, n in self._ordered() if value <= x)
+        return below / self.count
+
+    def merge(self, other):
+        for mine, theirs in ((self.positive, other.positive), (self.negative, other.negative)):
+            for index, n in theirs.items():
+                mine[index] = mine.get(index, 0) + n
+            self._collapse(mine)
+        self.zero += other.zero
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def to_dict(self):
+        return {'relative_accuracy': self.relative_accuracy, 'max_buckets': self.max_buckets,
+                'positive': self.positive, 'negative': self.negative, 'zero': self.zero,
+                'count': self.count, 'min': self.min if self.count else None,
+                'max': self.max if self.count else None}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data['relative_accuracy'], data['max_buckets'])
+        sketch.positive = {int(k): v for k, v in data['positive'].items()}
+        sketch.negative = {int(k): v for k, v in data['negative'].items()}
+        sketch.zero, sketch.count = data['zero'], data['count']
+        if data['min'] is not None:
+            sketch.min, sketch.max = data['min'], data['max']
+        return sketch
+
+
+class CountMinSketch:
+    """Mergeable frequency sketch for categorical values.
+
+    Hashing uses blake2b rather than hash() so that sketches built in
+    different processes (with different hash seeds) can be added together.
+    """
+
+    def __init__(self, width=2048, depth=4):
+        self.width = width
+        self.depth = depth
+        self.table = np.zeros((depth, width), dtype=np.int64)
+        self.count = 0
+
+    def _columns(self, item):
+        digest = hashlib.blake2b(str(item).encode(), digest_size=8 * self.depth).digest()
+        return [int.from_bytes(digest[8 * d:8 * d + 8], 'little') % self.width for d in range(self.depth)]
+
+    def add_many(self, items):
+        values, counts = np.unique(np.asarray(items, dtype=str), return_counts=True)
+        rows = np.arange(self.depth)
+        for value, n in zip(values.tolist(), counts.tolist()):
+            self.table[rows, self._columns(value)] += n
+        self.count += int(counts.sum())
+
+    def add(self, item):
+        self.add_many([item])
+
+    def estimate(self, item):
+        return int(self.table[np.arange(self.depth), self._columns(item)].min())
+
+    def merge(self, other):
+        self.table += other.table
+        self.count += other.count
+        return self
+
+    def to_dict(self):
+        return {'width': self.width, 'depth': self.depth, 'count': self.count,
+                'table': base64.b64encode(self.table.tobytes()).decode()}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data['width'], data['depth'])
+        sketch.table = np.frombuffer(base64.b64decode(data['table']), dtype=np.int64).reshape(
+            sketch.depth, sketch.width).copy()
+        sketch.count = data['count']
+        return sketch
+
+
+class DriftMonitor:
+    """Constant-memory sketches of every input feature a predictor sees.
+
+    Build one from the training frame as the reference and another that
+    observes live predictions; `drift_report` compares the two. Live
+    monitors are saved per session (see `start_session`) and merged. With a `path`, unsaved
+    observations are written every `flush_every` observations or
+    `flush_seconds`, and once more at interpreter exit.
+    """
+
+    def __init__(self, numeric, categorical, categories=None, path=None, flush_every=100, flush_seconds=30.0):
+        self.numeric = list(numeric)
+        self.categorical = list(categorical)
+        self.categories = categories or {name: [] for name in self.categorical}
+        self.sketches = {name: QuantileSketch() for name in self.numeric}
+        self.sketches.update({name: CountMinSketch() for name in self.categorical})
+        self.unseen = {name: 0 for name in self.categorical}
+        self.path = path
+        self.flush_every = flush_every
+        self.flush_seconds = flush_seconds
+        self.observed = 0
+        self.unsaved = 0
+        self.saved_at = time.monotonic()
+        if path:
+            atexit.register(self.close)
+
+    @classmethod
+    def from_frame(cls, df, numeric, categorical, **kwargs):
+        """Reference monitor capturing the training distribution."""
+        categories = {name: sorted(map(str, df[name].dropna().unique())) for name in categorical}
+        monitor = cls(numeric, categorical, categories, **kwargs)
+        monitor.observe_frame(df)
+        return monitor
+
+    def observe_frame(self, df):
+        for name in self.numeric:
+            self.sketches[name].add_many(df[name].to_numpy(dtype=float))
+        for name in self.categorical:
+            values = df[name].astype(str).to_numpy()
+            self.sketches[name].add_many(values)
+            if self.categories[name]:
+                self.unseen[name] += int((~np.isin(values, self.categories[name])).sum())
+        self.observed += len(df)
+        self.unsaved += len(df)
+        self._maybe_flush()
+
+    def observe(self, row):
+        """Record one prediction's inputs given as {feature: value}."""
+        for name in self.numeric:
+            self.sketches[name].add(float(row[name]))
+        for name in self.categorical:
+            value = str(row[name])
+            self.sketches[name].add(value)
+            if self.categories[name] and value not in self.categories[name]:
+                self.unseen[name] += 1
+        self.observed += 1
+        self.unsaved += 1
+        self._maybe_flush()
+
+    def _maybe_flush(self):
+        if self.unsaved >= self.flush_every or time.monotonic() - self.saved_at >= self.flush_seconds:
+            self.flush()
+
+    def flush(self):
+        """Write unsaved observations to `path` (a no-op without one)."""
+        if self.path and self.unsaved:
+            self.save(self.path)
+            self.unsaved = 0
+            self.saved_at = time.monotonic()
+
+    def close(self):
+        self.flush()
+        atexit.unregister(self.close)
+
+    def merge(self, other):
+        for name, sketch in self.sketches.items():
+            sketch.merge(other.sketches[name])
+        for name in self.categorical:
+            self.unseen[name] += other.unseen[name]
+        self.observed += other.observed
+        return self
+
+    def to_dict(self):
+        return {'numeric': self.numeric, 'categorical': self.categorical, 'categories': self.categories,
+                'unseen': self.unseen, 'observed': self.observed,
+                'sketches': {name: sketch.to_dict() for name, sketch in self.sketches.items()}}
+
+    @classmethod
+    def from_dict(cls, data):
+        monitor = cls(data['numeric'], data['categorical'], data['categories'])
+        for name in monitor.numeric:
+            monitor.sketches[name] = QuantileSketch.from_dict(data['sketches'][name])
+        for name in monitor.categorical:
+            monitor.sketches[name] = CountMinSketch.from_dict(data['sketches'][name])
+        monitor.unseen = data['unseen']
+        monitor.observed = data['observed']
+        return monitor
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as file:
+            json.dump(self.to_dict(), file)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r') as file:
+            return cls.from_dict(json.load(file))
+
+    def fingerprint(self):
+        """Short hash of the contents; live files carry their reference's fingerprint in the name."""
+        return hashlib.sha256(json.dumps(self.to_dict(), sort_keys=True).encode()).hexdigest()[:12]
+
+
+def live_paths(name, fingerprint, directory="drift"):
+    """Live monitor files for `name` observed against the reference with this fingerprint."""
+    return glob.glob(os.path.join(directory, f"{name}-{fingerprint}-*.json"))
+
+
+def start_session(name, reference, directory="drift", **kwargs):
+    """Save the training `reference` for `name` and return this session's live monitor.
+
+    The live file is named by the reference fingerprint and a random
+    session id, not the pid alone, which the OS reuses. Live files
+    observed against any other reference are deleted: they no longer
+    describe drift from the data the model was just trained on.
+    """
+    reference.save(os.path.join(directory, f"{name}-reference.json"))
+    fingerprint = reference.fingerprint()
+    current = set(live_paths(name, fingerprint, directory))
+    for path in glob.glob(os.path.join(directory, f"{name}-*.json")):
+        if path not in current and not path.endswith("-reference.json"):
+            try:
+                os.remove(path)
+            except FileNotFoundError:  # Another session pruned it first
+                pass
+    session = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+    return DriftMonitor(reference.numeric, reference.categorical, reference.categories,
+                        path=os.path.join(directory, f"{name}-{fingerprint}-{session}.json"), **kwargs)
+
+
+def merge_files(paths):
+    """Merge live monitors saved by many processes into one."""
+    merged = None
+    for path in paths:
+        monitor = DriftMonitor.load(path)
+        merged = monitor if merged is None else merged.merge(monitor)
+    return merged
+
+
+def _psi(expected, actual, eps=1e-4):
+    expected = np.clip(np.asarray(expected, dtype=float), eps, None)
+    actual = np.clip(np.asarray(actual, dtype=float), eps, None)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+def drift_report(reference, live, bins=10):
+    """Per-feature drift of `live` against `reference`.
+
+    Numeric features get the population stability index over the
+    reference deciles and a Kolmogorov-Smirnov style max CDF gap;
+    categoricals get PSI over the training categories plus the share of
+    values never seen in training. PSI above ~0.2 usually means drift.
+    """
+    report = {}
+    for name in reference.numeric:
+        ref, cur = reference.sketches[name], live.sketches[name]
+        if not cur.count:
+            continue
+        edges = sorted({ref.quantile(q) for q in np.linspace(0, 1, bins + 1)[1:-1]})
+        ref_cdf = [0.0] + [ref.cdf(x) for x in edges] + [1.0]
+        cur_cdf = [0.0] + [cur.cdf(x) for x in edges] + [1.0]
+        report[name] = {
+            'psi': _psi(np.diff(ref_cdf), np.diff(cur_cdf)),
+            'ks': float(max(abs(a - b) for a, b in zip(ref_cdf, cur_cdf))),
+            'reference_median': ref.quantile(0.5),
+            'live_median': cur.quantile(0.5),
+            'observed': cur.count,
+        }
+    for name in reference.categorical:
+        ref, cur = reference.sketches[name], live.sketches[name]
+        if not cur.count:
+            continue
+        categories = reference.categories[name]
+        ref_share = [ref.estimate(c) / ref.count for c in categories]
+        cur_share = [min(cur.estimate(c), cur.count) / cur.count for c in categories]
+        unseen = live.unseen[name] / cur.count
+        report[name] = {
+            'psi': _psi(ref_share + [0.0], cur_share + [unseen]),
+            'unseen_share': unseen,
+            'observed': cur.count,
+        }
+    return report
+
+
+if __name__ == "__main__":
+    # Usage: python drift_monitor.py sales  (merges the drift/sales-*.json sessions recorded against drift/sales-reference.json)
+    name = sys.argv[1] if len(sys.argv) > 1 else "sales"
+    reference = DriftMonitor.load(os.path.join("drift", f"{name}-reference.json"))
+    paths = live_paths(name, reference.fingerprint())
+    live = merge_files(paths)
+    if live is None:
+        print(f"No live observations for {name}")
+    else:
+        print(f"{name}: {live.observed} predictions from {len(paths)} session(s)")
+        for feature, stats in drift_report(reference, live).items():
+            flag = "DRIFT" if stats['psi'] > 0.2 else "ok"
+            details = ", ".join(f"{k}={v:.4g}" for k, v in stats.items())
+            print(f"  {feature:<20} {flag:<6} {details}")
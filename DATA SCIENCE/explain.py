@@ -0,0 +1,106 @@
+import numpy as np
+from scipy import sparse
+
+
+class ForestExplainer:
+    """Per-feature contributions for random forest predictions.
+
+    Every split on a decision path moves the node value from parent to
+    child; that change is credited to the split feature (the Saabas
+    decomposition), so prediction = bias + sum of contributions. The
+    per-node changes of all trees are precomputed into one sparse matrix,
+    and explaining a batch is one ``decision_path`` call plus one sparse
+    matrix product - about the cost of a prediction.
+    """
+
+    def __init__(self, model, feature_names):
+        self.model = model
+        self.feature_names = list(feature_names)
+        self.classifier = hasattr(model, 'classes_')
+        n_features = len(self.feature_names)
+
+        blocks, biases = [], []
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            values = tree.value[:, 0, :].astype(float)
+            if self.classifier:
+                # Node class distributions as probabilities, like predict_proba
+                values = values / values.sum(axis=1, keepdims=True)
+            n_outputs = values.shape[1]
+
+            children = np.concatenate([tree.children_left, tree.children_right])
+            parents = np.concatenate([np.arange(tree.node_count)] * 2)
+            is_child = children >= 0
+            children, parents = children[is_child], parents[is_child]
+
+            # Row = child node, column = (split feature of parent, output)
+            deltas = values[children] - values[parents]
+            features = tree.feature[parents]
+            rows = np.repeat(children, n_outputs)
+            cols = (features[:, None] * n_outputs + np.arange(n_outputs)).ravel()
+            blocks.append(sparse.csr_matrix((deltas.ravel(), (rows, cols)),
+                                            shape=(tree.node_count, n_features * n_outputs)))
+            biases.append(values[0])
+
+        self.n_outputs = n_outputs
+        self.node_deltas = sparse.vstack(blocks).tocsr() / len(blocks)
+        self.bias = np.mean(biases, axis=0)
+
+    def explain(self, X):
+        """Return (bias, contributions) for a batch.
+
+        contributions has shape (n_samples, n_features, n_outputs); for a
+        classifier the outputs are class probabilities.
+        """
+        indicator, _ = self.model.decision_path(X)
+        contributions = np.asarray((indicator @ self.node_deltas).todense())
+        return self.bias, contributions.reshape(indicator.shape[0], len(self.feature_names), self.n_outputs)
+
+    def explain_one(self, X, output=0, groups=None, top=3):
+        """Largest contributions for the first row as [(feature, value)].
+
+        `groups` maps a display name to the encoded columns it covers (for
+        one-hot categoricals), so their contributions are summed.
+        """
+        _, contributions = self.explain(X)
+        values = dict(zip(self.feature_names, contributions[0, :, output]))
+        if groups:
+            values = {name: sum(values[col] for col in columns if col in values)
+                      for name, columns in groups.items()}
+        ranked = sorted(values.items(), key=lambda item: abs(item[1]), reverse=True)
+        return [(name, value) for name, value in ranked[:top] if value != 0]
+
+
+class LinearExplainer:
+    """Per-feature contributions (coef * x, in log-odds) for a fitted linear classifier.
+
+    With standardised inputs a term is the feature's pull away from an
+    average row, the linear counterpart of ForestExplainer's contributions.
+    Costs one multiply per feature, so it suits the cascade's fast stage.
+    """
+
+    def __init__(self, model, feature_names):
+        self.model = model
+        self.feature_names = list(feature_names)
+        coef = np.asarray(model.coef_, dtype=float)
+        # A binary model has one row of coefficients, for the positive class
+        self.coef = np.vstack([-coef[0], coef[0]]) if coef.shape[0] == 1 else coef
+
+    def explain_one(self, X, output=0, groups=None, top=3):
+        """Largest terms for the first row as [(feature, log-odds)], like ForestExplainer.explain_one."""
+        row = np.asarray(X, dtype=float)[0]
+        values = dict(zip(self.feature_names, self.coef[output] * row))
+        if groups:
+            values = {name: sum(values[col] for col in columns if col in values)
+                      for name, columns in groups.items()}
+        ranked = sorted(values.items(), key=lambda item: abs(item[1]), reverse=True)
+        return [(name, value) for name, value in ranked[:top] if value != 0]
+
+
+def feature_groups(feature_columns, categorical):
+    """Group one-hot columns such as 'Platform_TV' under their source feature."""
+    groups = {}
+    for col in feature_columns:
+        source = next((name for name in categorical if col.startswith(f"{name}_")), col)
+        groups.setdefault(source, []).append(col)
+    return groups
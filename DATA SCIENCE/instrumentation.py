@@ -0,0 +1,15 @@
+"""Load the shared instrumentation module kept in ../PYTHON PROGRAMMING.
+
+The apps in both folders use one copy of the code: importing
+`instrumentation` from here executes that file under this module's name,
+so `from instrumentation import timed` works the same in either folder.
+"""
+import importlib.util
+import os
+import sys
+
+_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "PYTHON PROGRAMMING", "instrumentation.py")
+_spec = importlib.util.spec_from_file_location(__name__, _path)
+_module = importlib.util.module_from_spec(_spec)
+sys.modules[__name__] = _module
+_spec.loader.exec_module(_module)
@@ -2,10 +2,18 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 import pandas as pd
 import numpy as np
+import os
 from sklearn.datasets import load_iris
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.preprocessing import StandardScaler
 from sklearn.model_selection import train_test_split
+from instrumentation import timed, start_metrics
+from drift_monitor import DriftMonitor, start_session
+from explain import ForestExplainer, LinearExplainer
+from predictor_data import IRIS_FEATURES, data_hash
+from validation import IRIS_SCHEMA
+from model_registry import ModelRegistry, RegistryWatcher, register_trained, holdout_metrics
+from cascade import CascadeClassifier
 
 class IrisFlowerClassifier:
     def __init__(self, root):
@@ -16,6 +24,7 @@ class IrisFlowerClassifier:
 
         # Load and train model
         self.model, self.scaler, self.species = self.train_model()
+        self.explainer = None  # Built for the current model on first use
 
         # Configure style
         self.style = ttk.Style()
@@ -29,6 +38,17 @@ class IrisFlowerClassifier:
         # GUI Components
         self.create_gui()
 
+        # Publish to the model registry and hot-swap whichever version is activated there
+        self.registry = ModelRegistry()
+        self.watcher = None
+        if self.model is not None:
+            artifacts = {'model': self.model, 'scaler': self.scaler, 'species': self.species}
+            version = register_trained(self.registry, "iris", artifacts, **self.training_info)
+            self.watcher = RegistryWatcher(self.registry, "iris", version)
+            self.model_var.set(f"Model v{version}")
+            self.root.after(2000, self.poll_registry)
+
+    @timed("iris.train_model")
     def train_model(self):
         """Load Iris dataset and train Random Forest model."""
         try:
@@ -38,16 +58,34 @@ class IrisFlowerClassifier:
             y = iris.target
             species = iris.target_names  # ['setosa', 'versicolor', 'virginica']
 
+            # Capture the training input distribution for drift monitoring
+            reference = DriftMonitor.from_frame(X, IRIS_FEATURES, [])
+            self.drift = start_session("iris", reference)
+
             # Split data
-            X_train, _, y_train, _ = train_test_split(X, y, test_size=0.2, random_state=42)
+            X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
 
             # Scale features
             scaler = StandardScaler()
             X_train = scaler.fit_transform(X_train)
+            X_test = scaler.transform(X_test)
+
+            # Train Random Forest Classifier (out-of-bag votes calibrate the cascade)
+            forest = RandomForestClassifier(n_estimators=100, random_state=42, oob_score=True)
+            forest.fit(X_train, y_train)
 
-            # Train Random Forest Classifier
-            model = RandomForestClassifier(n_estimators=100, random_state=42)
-            model.fit(X_train, y_train)
+            # Cheap first stage answers confident inputs (CASCADE=0 sends everything to the forest)
+            model = CascadeClassifier(forest).fit(X_train, y_train)
+            if os.environ.get("CASCADE", "1") == "0":
+                model.threshold = np.inf
+            cascade_report = model.evaluate(X_test, y_test)
+
+            # Held-out metrics and data hash recorded with the model in the registry; the model
+            # kind is part of the hash so a cascade is published even over a forest trained on the same data
+            metrics = dict(holdout_metrics('classification', y_test, model.predict(X_test)), **cascade_report)
+            kind = "cascade" if np.isfinite(model.threshold) else "forest"
+            self.training_info = {'metrics': metrics, 'data_hash': f"{data_hash(X, y)}:{kind}",
+                                  'params': forest.get_params()}
 
             return model, scaler, species
         except Exception as e:
@@ -91,49 +129,91 @@ class IrisFlowerClassifier:
                               font=("Arial", 12, "bold"), bg="#e1f5fe", fg="#d32f2f", wraplength=400)
         result_label.pack(pady=10)
 
+        # Explanation display (feature contributions to the predicted species)
+        self.explain_var = tk.StringVar(value="")
+        tk.Label(main_frame, textvariable=self.explain_var, font=("Arial", 10), 
+                bg="#e1f5fe", fg="#01579b", wraplength=400).pack()
+
         # Clear button
         ttk.Button(main_frame, text="Clear", command=self.clear_entries, 
                   style="TButton").pack(pady=5)
 
+        # Active registry version
+        self.model_var = tk.StringVar(value="")
+        tk.Label(main_frame, textvariable=self.model_var, font=("Arial", 10), 
+                bg="#e1f5fe", fg="#01579b").pack(pady=5)
+
+    @timed("iris.poll_registry")
+    def poll_registry(self):
+        """Swap in the registry's active model once it has been loaded off the Tk thread."""
+        try:
+            loaded = self.watcher.poll()
+            if isinstance(loaded, Exception):
+                messagebox.showerror("Error", f"Failed to load model from registry: {str(loaded)}")
+            elif loaded is not None:
+                # Runs between Tk events, so never in the middle of a prediction
+                artifacts, meta = loaded
+                self.model, self.scaler = artifacts['model'], artifacts['scaler']
+                self.species = artifacts['species']
+                self.model_var.set(f"Model v{meta['version']}")
+        finally:
+            self.root.after(2000, self.poll_registry)
+
+    @timed("iris.predict")
     def predict(self):
         """Predict Iris species based on user input."""
         try:
-            sepal_length = float(self.sepal_length_entry.get())
-            if sepal_length <= 0:
-                raise ValueError("Sepal Length must be positive")
-            sepal_width = float(self.sepal_width_entry.get())
-            if sepal_width <= 0:
-                raise ValueError("Sepal Width must be positive")
-            petal_length = float(self.petal_length_entry.get())
-            if petal_length <= 0:
-                raise ValueError("Petal Length must be positive")
-            petal_width = float(self.petal_width_entry.get())
-            if petal_width <= 0:
-                raise ValueError("Petal Width must be positive")
+            entries = [self.sepal_length_entry, self.sepal_width_entry, self.petal_length_entry, self.petal_width_entry]
+            values = IRIS_SCHEMA.validate_one({name: entry.get() for name, entry in zip(IRIS_FEATURES, entries)})
 
             # Prepare input data
-            input_data = np.array([[sepal_length, sepal_width, petal_length, petal_width]])
+            input_data = np.array([[values[name] for name in IRIS_FEATURES]])
+            self.drift.observe(dict(zip(IRIS_FEATURES, input_data[0])))
             input_data = self.scaler.transform(input_data)
 
-            # Predict
-            prediction = self.model.predict(input_data)[0]
+            # Predict (the cascade only runs the forest when the fast stage is unsure)
             probabilities = self.model.predict_proba(input_data)[0]
+            prediction = int(np.argmax(probabilities))
             species = self.species[prediction]
             prob = probabilities[prediction] * 100
 
-            self.result_var.set(f"Predicted Species: {species.capitalize()}\nConfidence: {prob:.2f}%")
+            self.result_var.set(f"Predicted Species: {species.capitalize()}\nConfidence: {prob:.2f}%"
+                                f"{self.route_note()}")
+            self.explain_var.set(self.explain_prediction(input_data, prediction))
         except ValueError as e:
             messagebox.showerror("Input Error", str(e))
         except Exception as e:
             messagebox.showerror("Error", f"An error occurred: {str(e)}")
 
+    def route_note(self):
+        """Which cascade stage answered the last prediction, and how often the forest is needed."""
+        if not isinstance(self.model, CascadeClassifier):
+            return ""
+        stage = "Forest" if self.model.last_escalated.any() else "Fast model"
+        return f"\n{stage} answered ({self.model.escalation_rate:.0%} escalated so far)"
+
+    def explain_prediction(self, input_data, prediction):
+        """Describe the measurements that pushed the answering model towards the predicted species."""
+        names = ["Sepal Length", "Sepal Width", "Petal Length", "Petal Width"]
+        if isinstance(self.model, CascadeClassifier) and not self.model.last_escalated.any():
+            # The fast stage answered: explain its linear terms rather than walk the forest it skipped
+            top = LinearExplainer(self.model.fast, names).explain_one(input_data, output=prediction)
+            return "Why: " + ", ".join(f"{name} {value:+.2f} log-odds" for name, value in top) if top else ""
+        forest = getattr(self.model, 'full', self.model)
+        if self.explainer is None or self.explainer.model is not forest:
+            self.explainer = ForestExplainer(forest, names)
+        top = self.explainer.explain_one(input_data, output=prediction)
+        return "Why: " + ", ".join(f"{name} {value * 100:+.1f}%" for name, value in top) if top else ""
+
     def clear_entries(self):
         """Clear all input fields."""
         for attr in ['sepal_length_entry', 'sepal_width_entry', 'petal_length_entry', 'petal_width_entry']:
             getattr(self, attr).delete(0, tk.END)
         self.result_var.set("Enter measurements and click Predict")
+        self.explain_var.set("")
 
 if __name__ == "__main__":
+    start_metrics("iris")
     root = tk.Tk()
     app = IrisFlowerClassifier(root)
     root.mainloop()
\ No newline at end of file
@@ -0,0 +1,150 @@
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.model_selection import train_test_split
+
+from predictor_data import load_sales_data
+
+ADVERTISING_FEATURES = ['TV', 'Radio', 'Newspaper']
+
+
+class LinearModel:
+    """Linear or ridge regression solved in closed form with NumPy.
+
+    fit() uses a QR decomposition of the design matrix. partial_fit()
+    accumulates X^T X and X^T y over streamed chunks, so memory is fixed by
+    the number of features and the solution after all chunks equals the
+    batch fit. The intercept is never penalised.
+    """
+
+    def __init__(self, alpha=0.0):
+        self.alpha = alpha
+        self.xtx = None
+        self.xty = None
+        self.n_samples = 0
+        self.coef_ = None
+        self.intercept_ = 0.0
+
+    @staticmethod
+    def _design(X):
+        X = np.asarray(X, dtype=float)
+        return np.column_stack([np.ones(len(X)), X])
+
+    def fit(self, X, y):
+        A = self._design(X)
+        y = np.asarray(y, dtype=float)
+        if self.alpha:
+            # Ridge as least squares on rows augmented with sqrt(alpha) * I
+            penalty = np.sqrt(self.alpha) * np.eye(A.shape[1])[1:]
+            A = np.vstack([A, penalty])
+            y = np.concatenate([y, np.zeros(len(penalty))])
+        Q, R = np.linalg.qr(A)
+        weights = np.linalg.solve(R, Q.T @ y)
+        self.intercept_, self.coef_ = float(weights[0]), weights[1:]
+        self.xtx = self.xty = None
+        self.n_samples = len(X)
+        return self
+
+    def partial_fit(self, X, y):
+        A = self._design(X)
+        y = np.asarray(y, dtype=float)
+        if self.xtx is None:
+            self.xtx = np.zeros((A.shape[1], A.shape[1]))
+            self.xty = np.zeros(A.shape[1])
+        self.xtx += A.T @ A
+        self.xty += A.T @ y
+        self.n_samples += len(A)
+        self._solve()
+        return self
+
+    def _solve(self):
+        lhs = self.xtx.copy()
+        lhs[1:, 1:] += self.alpha * np.eye(len(lhs) - 1)
+        try:
+            weights = np.linalg.solve(lhs, self.xty)
+        except np.linalg.LinAlgError:
+            weights = np.linalg.lstsq(lhs, self.xty, rcond=None)[0]
+        self.intercept_, self.coef_ = float(weights[0]), weights[1:]
+
+    def predict(self, X):
+        return np.asarray(X, dtype=float) @ self.coef_ + self.intercept_
+
+
+def stream_fit(file_path, features, target, alpha=0.0, chunksize=10000):
+    """Fit a LinearModel over a CSV without loading it whole."""
+    model = LinearModel(alpha=alpha)
+    for chunk in pd.read_csv(file_path, usecols=features + [target], chunksize=chunksize):
+        chunk = chunk.dropna()
+        model.partial_fit(chunk[features], chunk[target])
+    return model
+
+
+def _latency(predict, row, repeats=200):
+    """Median wall time of a single-row prediction."""
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        predict(row)
+        times.append(time.perf_counter() - start)
+    return float(np.median(times))
+
+
+def compare_models(X, y, forest_trees=100, seed=42):
+    """Accuracy, fit time and inference latency of OLS, ridge and the forest."""
+    X = X.astype(float)
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=seed)
+    y_test = np.asarray(y_test, dtype=float)
+    candidates = [
+        ('OLS (QR)', LinearModel()),
+        ('Ridge (alpha=1)', LinearModel(alpha=1.0)),
+        (f'RandomForest ({forest_trees} trees)', RandomForestRegressor(n_estimators=forest_trees, random_state=seed)),
+    ]
+    results = []
+    for name, model in candidates:
+        start = time.perf_counter()
+        model.fit(X_train, y_train)
+        fit_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        pred = model.predict(X_test)
+        batch_time = time.perf_counter() - start
+
+        # The linear models take the raw row array; the forest needs its frame
+        row = X_test.iloc[:1] if isinstance(model, RandomForestRegressor) else X_test.to_numpy()[:1]
+        residual = y_test - pred
+        results.append({
+            'model': name,
+            'rmse': float(np.sqrt(np.mean(residual ** 2))),
+            'r2': float(1 - np.sum(residual ** 2) / np.sum((y_test - y_test.mean()) ** 2)),
+            'fit_time': fit_time,
+            'us_per_row': batch_time / len(X_test) * 1e6,
+            'single_row_us': _latency(model.predict, row) * 1e6,
+        })
+    return results
+
+
+def format_comparison(title, results):
+    lines = [f"== {title} ==",
+             f"{'model':<26} {'RMSE':>14} {'R2':>8} {'fit ms':>9} {'us/row':>9} {'1-row us':>10}"]
+    for r in results:
+        lines.append(f"{r['model']:<26} {r['rmse']:>14,.3f} {r['r2']:>8.4f} {r['fit_time'] * 1e3:>9.2f} "
+                     f"{r['us_per_row']:>9.2f} {r['single_row_us']:>10.1f}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    if os.path.exists("advertising.csv"):
+        ads = pd.read_csv("advertising.csv")
+        print(format_comparison("advertising.csv", compare_models(ads[ADVERTISING_FEATURES], ads['Sales'])))
+        streamed = stream_fit("advertising.csv", ADVERTISING_FEATURES, 'Sales', chunksize=50)
+        batch = LinearModel().fit(ads[ADVERTISING_FEATURES], ads['Sales'])
+        print(f"Streamed (chunks of 50) vs batch coefficients match: "
+              f"{np.allclose(streamed.coef_, batch.coef_) and np.isclose(streamed.intercept_, batch.intercept_)}")
+        print(f"Sales = {batch.intercept_:.3f} + " +
+              " + ".join(f"{c:.4f}*{f}" for c, f in zip(batch.coef_, ADVERTISING_FEATURES)) + "\n")
+    if os.path.exists("sales.csv"):
+        X, y = load_sales_data()
+        print(format_comparison("sales.csv (SalesPredictor features)", compare_models(X, y)))
@@ -0,0 +1,275 @@
+import hashlib
+import itertools
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+from sklearn.model_selection import KFold, StratifiedKFold
+from sklearn.preprocessing import StandardScaler
+
+from predictor_data import PREDICTORS, data_hash
+
+# Default search spaces for each predictor (the apps use n_estimators=100)
+DEFAULT_GRIDS = {
+    'iris': {'n_estimators': [10, 25, 50, 100], 'max_depth': [None, 3, 5]},
+    'movies': {'n_estimators': [25, 50, 100], 'max_depth': [None, 5, 10], 'min_samples_leaf': [1, 5]},
+    'sales': {'n_estimators': [25, 50, 100], 'max_depth': [None, 5, 10], 'min_samples_leaf': [1, 5]},
+    'titanic': {'n_estimators': [25, 50, 100], 'max_depth': [None, 4, 8]},
+}
+
+# Worker-process state, populated once per worker by _init_worker
+_worker = {}
+
+
+def expand_grid(grid):
+    """Expand a {param: [values]} grid into a list of parameter dicts."""
+    keys = sorted(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+
+
+def sample_space(space, n_iter, seed=42):
+    """Draw n_iter distinct parameter dicts from a search space.
+
+    Values may be a list (choose one) or an (low, high) integer range.
+    """
+    rng = random.Random(seed)
+    candidates, seen = [], set()
+    for _ in range(n_iter * 20):
+        params = {}
+        for key in sorted(space):
+            values = space[key]
+            if isinstance(values, tuple):
+                params[key] = rng.randint(values[0], values[1])
+            else:
+                params[key] = rng.choice(values)
+        marker = json.dumps(params, sort_keys=True)
+        if marker not in seen:
+            seen.add(marker)
+            candidates.append(params)
+        if len(candidates) == n_iter:
+            break
+    return candidates
+
+
+class FoldCache:
+    """On-disk cache of fitted fold results keyed by data hash and parameters."""
+
+    def __init__(self, cache_dir=".cv_cache"):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def key(self, data_key, name, params, n_splits, fold, seed):
+        """Build the cache key for one fold of one configuration."""
+        payload = json.dumps([data_key, name, params, n_splits, fold, seed], sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get(self, key):
+        """Return a cached fold result or None."""
+        path = os.path.join(self.cache_dir, f"{key}.json")
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r') as file:
+                return json.load(file)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def put(self, key, result):
+        """Store a fold result atomically."""
+        path = os.path.join(self.cache_dir, f"{key}.json")
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as file:
+            json.dump(result, file)
+        os.replace(tmp_path, path)
+
+
+def _init_worker(X, y, task, scale_columns):
+    """Store the dataset once per worker process."""
+    _worker['X'] = X
+    _worker['y'] = np.asarray(y)
+    _worker['task'] = task
+    _worker['scale_columns'] = scale_columns
+
+
+def _run_fold(job):
+    """Fit and score one (parameters, fold) job inside a worker."""
+    params, train_idx, test_idx, seed = job
+    X, y, task = _worker['X'], _worker['y'], _worker['task']
+    scale_columns = _worker['scale_columns']
+
+    X_train = X.iloc[train_idx].copy()
+    X_test = X.iloc[test_idx].copy()
+    y_train, y_test = y[train_idx], y[test_idx]
+
+    # Scale numerical features exactly like the apps do
+    scaler = StandardScaler()
+    X_train[scale_columns] = scaler.fit_transform(X_train[scale_columns])
+    X_test[scale_columns] = scaler.transform(X_test[scale_columns])
+
+    model_class = RandomForestClassifier if task == 'classification' else RandomForestRegressor
+    model = model_class(random_state=seed, **params)
+
+    start = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_time = time.perf_counter() - start
+
+    train_pred = model.predict(X_train)
+    start = time.perf_counter()
+    test_pred = model.predict(X_test)
+    predict_time = time.perf_counter() - start
+
+    # Single-row latency is what the GUI pays on every click
+    start = time.perf_counter()
+    model.predict(X_test.iloc[:1])
+    single_latency = time.perf_counter() - start
+
+    return {
+        'train_score': _score(task, y_train, train_pred),
+        'test_score': _score(task, y_test, test_pred),
+        'fit_time': fit_time,
+        'predict_time_per_row': predict_time / max(len(test_idx), 1),
+        'single_latency': single_latency,
+        'n_nodes': int(sum(tree.tree_.node_count for tree in model.estimators_)),
+    }
+
+
+def _score(task, y_true, y_pred):
+    """Accuracy for classifiers, RMSE for regressors."""
+    if task == 'classification':
+        return float(np.mean(y_true == y_pred))
+    return float(np.sqrt(np.mean((np.asarray(y_true) - np.asarray(y_pred)) ** 2)))
+
+
+class ModelEvaluator:
+    """K-fold cross-validation and hyperparameter search for one predictor."""
+
+    def __init__(self, name, X=None, y=None, n_splits=5, seed=42, n_jobs=None, cache_dir=".cv_cache"):
+        spec = PREDICTORS[name]
+        if X is None or y is None:
+            X, y = spec['loader']()
+        self.name = name
+        self.X = X.reset_index(drop=True)
+        self.y = np.asarray(y)
+        self.task = spec['task']
+        self.scale_columns = spec['scale_columns']
+        self.n_splits = n_splits
+        self.seed = seed
+        self.n_jobs = n_jobs or os.cpu_count() or 1
+        self.cache = FoldCache(cache_dir)
+        self.data_key = data_hash(self.X, self.y)
+
+    def folds(self):
+        """Deterministic fold indices so cached results stay valid."""
+        if self.task == 'classification':
+            splitter = StratifiedKFold(n_splits=self.n_splits, shuffle=True, random_state=self.seed)
+        else:
+            splitter = KFold(n_splits=self.n_splits, shuffle=True, random_state=self.seed)
+        return list(splitter.split(self.X, self.y))
+
+    def evaluate(self, candidates):
+        """Cross-validate each parameter dict; only uncached folds are fitted."""
+        folds = self.folds()
+        fold_results = {}
+        pending, pending_keys = [], []
+        for c, params in enumerate(candidates):
+            for f, (train_idx, test_idx) in enumerate(folds):
+                key = self.cache.key(self.data_key, self.name, params, self.n_splits, f, self.seed)
+                cached = self.cache.get(key)
+                if cached is not None:
+                    fold_results[(c, f)] = cached
+                else:
+                    pending.append((params, train_idx, test_idx, self.seed))
+                    pending_keys.append(((c, f), key))
+
+        if pending:
+            if self.n_jobs > 1 and len(pending) > 1:
+                with ProcessPoolExecutor(max_workers=self.n_jobs, initializer=_init_worker,
+                                         initargs=(self.X, self.y, self.task, self.scale_columns)) as pool:
+                    outputs = list(pool.map(_run_fold, pending))
+            else:
+                _init_worker(self.X, self.y, self.task, self.scale_columns)
+                outputs = [_run_fold(job) for job in pending]
+            for (slot, key), result in zip(pending_keys, outputs):
+                self.cache.put(key, result)
+                fold_results[slot] = result
+
+        fitted = {slot for slot, _ in pending_keys}
+        results = []
+        for c, params in enumerate(candidates):
+            per_fold = [fold_results[(c, f)] for f in range(len(folds))]
+            test_scores = [r['test_score'] for r in per_fold]
+            results.append({
+                'params': params,
+                'metric': 'accuracy' if self.task == 'classification' else 'rmse',
+                'test_score': float(np.mean(test_scores)),
+                'test_std': float(np.std(test_scores)),
+                'train_score': float(np.mean([r['train_score'] for r in per_fold])),
+                'fit_time': float(np.mean([r['fit_time'] for r in per_fold])),
+                'predict_time_per_row': float(np.mean([r['predict_time_per_row'] for r in per_fold])),
+                'single_latency': float(np.median([r['single_latency'] for r in per_fold])),
+                'n_nodes': int(np.mean([r['n_nodes'] for r in per_fold])),
+                'cached_folds': sum(1 for f in range(len(folds)) if (c, f) not in fitted),
+            })
+        return results
+
+    def grid_search(self, grid=None):
+        """Evaluate every combination in a parameter grid."""
+        return self.evaluate(expand_grid(grid or DEFAULT_GRIDS[self.name]))
+
+    def random_search(self, space=None, n_iter=10):
+        """Evaluate n_iter random draws from a search space."""
+        return self.evaluate(sample_space(space or DEFAULT_GRIDS[self.name], n_iter, self.seed))
+
+
+def cheapest_model(results, quality_bar):
+    """Pick the cheapest configuration that meets the quality bar.
+
+    For accuracy the bar is a minimum, for RMSE it is a maximum. Cost is
+    single-row inference latency, then fit time.
+    """
+    if not results:
+        return None
+    if results[0]['metric'] == 'accuracy':
+        passing = [r for r in results if r['test_score'] >= quality_bar]
+    else:
+        passing = [r for r in results if r['test_score'] <= quality_bar]
+    if not passing:
+        return None
+    return min(passing, key=lambda r: (r['single_latency'], r['n_nodes'], r['fit_time']))
+
+
+def format_report(name, results):
+    """Render search results as a plain-text table sorted by test score."""
+    reverse = bool(results) and results[0]['metric'] == 'accuracy'
+    lines = [f"== {name} ({results[0]['metric'] if results else 'n/a'}) ==",
+             f"{'params':<55} {'test':>10} {'+/-':>8} {'train':>10} {'fit s':>8} {'us/row':>8} {'1-row ms':>9} {'nodes':>8}"]
+    for r in sorted(results, key=lambda r: r['test_score'], reverse=reverse):
+        params = json.dumps(r['params'], sort_keys=True)
+        lines.append(f"{params:<55} {r['test_score']:>10.4f} {r['test_std']:>8.4f} {r['train_score']:>10.4f} "
+                     f"{r['fit_time']:>8.3f} {r['predict_time_per_row'] * 1e6:>8.1f} "
+                     f"{r['single_latency'] * 1e3:>9.2f} {r['n_nodes']:>8}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    names = sys.argv[1:] or list(PREDICTORS)
+    for name in names:
+        try:
+            evaluator = ModelEvaluator(name)
+        except FileNotFoundError as e:
+            print(f"Skipping {name}: {e}")
+            continue
+        results = evaluator.grid_search()
+        print(format_report(name, results))
+
+        # Quality bar: within 2% of the best configuration found
+        best = max(results, key=lambda r: r['test_score']) if results[0]['metric'] == 'accuracy' \
+            else min(results, key=lambda r: r['test_score'])
+        bar = best['test_score'] * (0.98 if best['metric'] == 'accuracy' else 1.02)
+        choice = cheapest_model(results, bar)
+        print(f"Cheapest within 2% of best: {json.dumps(choice['params'], sort_keys=True)}\n")
@@ -0,0 +1,246 @@
+import contextlib
+import json
+import os
+import pickle
+import queue
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+
+def holdout_metrics(task, y_true, y_pred):
+    """Held-out quality of a fitted model, recorded with each registry version."""
+    y_true = np.asarray(y_true)
+    y_pred = np.asarray(y_pred)
+    if task == 'classification':
+        return {'accuracy': float(np.mean(y_true == y_pred)), 'n_test': len(y_true)}
+    residual = y_true.astype(float) - y_pred.astype(float)
+    total = np.sum((y_true - y_true.mean()) ** 2)
+    return {
+        'rmse': float(np.sqrt(np.mean(residual ** 2))),
+        'mae': float(np.mean(np.abs(residual))),
+        'r2': float(1 - np.sum(residual ** 2) / total) if total else 0.0,
+        'n_test': len(y_true),
+    }
+
+
+class ModelRegistry:
+    """Versioned on-disk store of trained predictor models.
+
+    Each model name gets a directory of versions (``v0001/model.pkl`` plus
+    ``meta.json`` with metrics, data hash and parameters) and an
+    ``active.json`` naming the live version and the versions it replaced.
+    A version appears by renaming a fully written temp directory into
+    place and activation is an atomic file replace, so readers never see
+    a partial model.
+    """
+
+    def __init__(self, root="models"):
+        self.root = root
+
+    def _dir(self, name, version=None):
+        path = os.path.join(self.root, name)
+        return path if version is None else os.path.join(path, f"v{version:04d}")
+
+    def state_path(self, name):
+        return os.path.join(self._dir(name), "active.json")
+
+    def versions(self, name):
+        if not os.path.isdir(self._dir(name)):
+            return []
+        return sorted(int(entry[1:]) for entry in os.listdir(self._dir(name))
+                      if entry.startswith("v") and entry[1:].isdigit())
+
+    def metadata(self, name, version):
+        with open(os.path.join(self._dir(name, version), "meta.json"), 'r') as file:
+            meta = json.load(file)
+        meta['version'] = version
+        return meta
+
+    def history(self, name):
+        """Metadata of every version, oldest first."""
+        return [self.metadata(name, version) for version in self.versions(name)]
+
+    def _state(self, name):
+        try:
+            with open(self.state_path(name), 'r') as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return {'version': None, 'previous': []}
+
+    def _write_state(self, name, state):
+        path = self.state_path(name)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as file:
+            json.dump(state, file)
+        os.replace(tmp_path, path)
+
+    @contextlib.contextmanager
+    def _state_lock(self, name, timeout=10.0, stale_after=30.0):
+        """Serialise read-modify-writes of active.json across processes.
+
+        An O_EXCL lock file works on every platform; one left behind by a
+        crashed process is broken once it is older than `stale_after`.
+        """
+        path = f"{self.state_path(name)}.lock"
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                break
+            except FileExistsError:
+                try:
+                    if time.time() - os.path.getmtime(path) > stale_after:
+                        os.remove(path)
+                        continue
+                except FileNotFoundError:
+                    continue  # Released in the meantime
+                if time.monotonic() >= deadline:
+                    raise TimeoutError(f"{path} is held by another process")
+                time.sleep(0.01)
+        try:
+            yield
+        finally:
+            os.remove(path)
+
+    def active(self, name):
+        return self._state(name)['version']
+
+    def publish(self, name, artifacts, metrics=None, data_hash=None, params=None, activate=True):
+        """Store a new version of `name` and (by default) make it live; returns the version."""
+        os.makedirs(self._dir(name), exist_ok=True)
+        staging = tempfile.mkdtemp(prefix=".publish-", dir=self._dir(name))
+        with open(os.path.join(staging, "model.pkl"), 'wb') as file:
+            pickle.dump(artifacts, file, protocol=pickle.HIGHEST_PROTOCOL)
+        meta = {'name': name, 'created': time.time(), 'metrics': metrics or {},
+                'data_hash': data_hash, 'params': params or {}}
+        with open(os.path.join(staging, "meta.json"), 'w') as file:
+            json.dump(meta, file, indent=2, default=str)
+
+        while True:
+            version = max(self.versions(name), default=0) + 1
+            try:
+                os.rename(staging, self._dir(name, version))
+                break
+            except OSError:
+                if not os.path.exists(self._dir(name, version)):
+                    shutil.rmtree(staging, ignore_errors=True)
+                    raise
+                # Another process took this version number; try the next
+        if activate:
+            self.activate(name, version)
+        return version
+
+    def find(self, name, data_hash):
+        """Latest version trained on data with this hash, or None."""
+        matches = [meta['version'] for meta in self.history(name) if meta['data_hash'] == data_hash]
+        return matches[-1] if matches else None
+
+    def activate(self, name, version):
+        if version not in self.versions(name):
+            raise ValueError(f"{name} has no version {version}")
+        with self._state_lock(name):
+            state = self._state(name)
+            if state['version'] != version:
+                if state['version'] is not None:
+                    state['previous'].append(state['version'])
+                state['version'] = version
+                self._write_state(name, state)
+
+    def rollback(self, name):
+        """Reactivate the version that was live before the current one; returns it."""
+        with self._state_lock(name):
+            state = self._state(name)
+            if not state['previous']:
+                raise ValueError(f"{name} has no earlier version to roll back to")
+            state['version'] = state['previous'].pop()
+            self._write_state(name, state)
+        return state['version']
+
+    def load(self, name, version=None):
+        """Return (artifacts, metadata) for a version (default: the active one)."""
+        version = version or self.active(name)
+        if version is None:
+            raise ValueError(f"No active version of {name} in {self.root}")
+        with open(os.path.join(self._dir(name, version), "model.pkl"), 'rb') as file:
+            artifacts = pickle.load(file)
+        return artifacts, self.metadata(name, version)
+
+
+def register_trained(registry, name, artifacts, metrics, data_hash, params=None):
+    """Publish and activate a freshly trained model unless one trained on the same data exists.
+
+    Returns the version. An existing version is not re-activated, so
+    relaunching an app on unchanged data does not undo a rollback.
+    """
+    version = registry.find(name, data_hash)
+    if version is None:
+        version = registry.publish(name, artifacts, metrics, data_hash, params)
+    return version
+
+
+class RegistryWatcher:
+    """Follow the active version of one model from a Tk ``after`` loop.
+
+    ``poll()`` costs one stat of ``active.json``; when the active version
+    changes the model is unpickled in a worker thread and returned as
+    (artifacts, metadata) by a later poll, so the caller swaps it in on
+    the Tk thread between predictions. A failed load is returned once as
+    the exception.
+    """
+
+    def __init__(self, registry, name, version=None):
+        self.registry = registry
+        self.name = name
+        self.version = version
+        self.mtime = None
+        self.results = queue.Queue()
+        self.worker = None
+
+    def poll(self):
+        if self.worker is None or not self.worker.is_alive():
+            try:
+                mtime = os.stat(self.registry.state_path(self.name)).st_mtime_ns
+            except FileNotFoundError:
+                mtime = None
+            if mtime != self.mtime:
+                self.mtime = mtime
+                version = self.registry.active(self.name)
+                if version is not None and version != self.version:
+                    self.worker = threading.Thread(target=self._load, args=(version,), daemon=True)
+                    self.worker.start()
+        try:
+            loaded = self.results.get_nowait()
+        except queue.Empty:
+            return None
+        if not isinstance(loaded, Exception):
+            self.version = loaded[1]['version']
+        return loaded
+
+    def _load(self, version):
+        try:
+            self.results.put(self.registry.load(self.name, version))
+        except Exception as e:
+            self.results.put(e)
+
+
+if __name__ == "__main__":
+    # Usage: python model_registry.py list NAME | activate NAME VERSION | rollback NAME
+    registry = ModelRegistry()
+    command, name = sys.argv[1], sys.argv[2]
+    if command == "list":
+        active = registry.active(name)
+        for meta in registry.history(name):
+            marker = "*" if meta['version'] == active else " "
+            created = time.strftime("%Y-%m-%d %H:%M", time.localtime(meta['created']))
+            metrics = ", ".join(f"{k}={v:.4g}" for k, v in meta['metrics'].items())
+            print(f"{marker} v{meta['version']:<4} {created}  data={str(meta['data_hash'])[:12]}  {metrics}")
+    elif command == "activate":
+        registry.activate(name, int(sys.argv[3]))
+        print(f"{name}: v{int(sys.argv[3])} is now active")
+    elif command == "rollback":
+        print(f"{name}: rolled back to v{registry.rollback(name)}")
@@ -3,10 +3,19 @@ from tkinter import ttk, messagebox
 import pandas as pd
 import numpy as np
 from sklearn.ensemble import RandomForestRegressor
-from sklearn.preprocessing import StandardScaler
 from sklearn.model_selection import train_test_split
 import os
 import random
+from predictor_data import MOVIE_CATEGORICAL, MOVIE_NUMERIC, data_hash
+from sensitivity import SensitivityAnalyzer, WhatIfWindow
+from prediction_cache import PredictionCache
+from instrumentation import timed, phase, gauge, start_metrics
+from drift_monitor import DriftMonitor, start_session
+from sharded_forest import fit_sharded
+from validation import MOVIE_SCHEMA
+from model_registry import ModelRegistry, RegistryWatcher, register_trained, holdout_metrics
+from movie_similarity import describe, open_index
+from movie_encoding import MovieEncoder
 
 class MovieRatingPredictor:
     def __init__(self, root):
@@ -21,7 +30,11 @@ class MovieRatingPredictor:
         self.actors = ['DiCaprio', 'Streep', 'Cruise', 'Johansson', 'Hanks']
 
         # Load and train model
-        self.model, self.scaler, self.feature_columns = self.train_model()
+        self.model, self.encoder = self.train_model()
+        self.sensitivity = None  # Built on first What-If request
+        self.prediction_cache = PredictionCache(maxsize=5000)
+        self.movie_index = None  # Loaded or built on first similarity search
+        gauge("movie.cache_hit_rate", lambda: self.prediction_cache.stats()['hit_rate'])
 
         # Configure style
         self.style = ttk.Style()
@@ -35,6 +48,17 @@ class MovieRatingPredictor:
         # GUI Components
         self.create_gui()
 
+        # Publish to the model registry and hot-swap whichever version is activated there
+        self.registry = ModelRegistry()
+        self.watcher = None
+        if self.model is not None:
+            artifacts = {'model': self.model, 'encoder': self.encoder}
+            version = register_trained(self.registry, "movies", artifacts, **self.training_info)
+            self.watcher = RegistryWatcher(self.registry, "movies", version)
+            self.model_var.set(f"Model v{version}")
+            self.root.after(2000, self.poll_registry)
+
+    @timed("movie.train_model")
     def train_model(self):
         """Load or generate dataset and train Random Forest model."""
         try:
@@ -44,36 +68,42 @@ class MovieRatingPredictor:
                 messagebox.showinfo("Info", "movies.csv not found! Generating synthetic dataset.")
                 df = self.generate_synthetic_data()
             else:
-                df = pd.read_csv(file_path)
+                with phase("movie.read_csv"):
+                    df = pd.read_csv(file_path)
 
             # Select features and target
             features = ['Genre', 'Director', 'Actor1', 'Actor2', 'Year', 'Runtime']
             X = df[features]
             y = df['Rating']
 
-            # Preprocess data: Encode categorical variables
-            X = pd.get_dummies(X, columns=['Genre', 'Director', 'Actor1', 'Actor2'], drop_first=True)
-            feature_columns = X.columns.tolist()
-
-            # Handle missing values
-            X.loc[:, 'Year'] = X['Year'].fillna(X['Year'].median())
-            X.loc[:, 'Runtime'] = X['Runtime'].fillna(X['Runtime'].median())
+            # Capture the training input distribution for drift monitoring
+            reference = DriftMonitor.from_frame(X, MOVIE_NUMERIC, MOVIE_CATEGORICAL)
+            self.drift = start_session("movies", reference)
 
             # Split data
-            X_train, _, y_train, _ = train_test_split(X, y, test_size=0.2, random_state=42)
+            X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
 
-            # Scale numerical features
-            scaler = StandardScaler()
-            X_train[['Year', 'Runtime']] = scaler.fit_transform(X_train[['Year', 'Runtime']])
+            # Encode categoricals (MOVIE_ENCODING=onehot|hash|target) and scale Year/Runtime
+            encoder = MovieEncoder(os.environ.get("MOVIE_ENCODING", "onehot"))
+            with phase("movie.encode"):
+                X_train_encoded = encoder.fit_transform(X_train, y_train)
+                X_test_encoded = encoder.transform(X_test)
 
-            # Train Random Forest Regressor
+            # Train Random Forest Regressor (FOREST_SHARDS=n fits it in n worker processes)
             model = RandomForestRegressor(n_estimators=100, random_state=42)
-            model.fit(X_train, y_train)
+            with phase("movie.fit"):
+                model = fit_sharded(model, X_train_encoded, y_train,
+                                    shards=int(os.environ.get("FOREST_SHARDS", "1")))
 
-            return model, scaler, feature_columns
+            # Held-out metrics and data hash recorded with the model in the registry
+            self.training_info = {'metrics': holdout_metrics('regression', y_test, model.predict(X_test_encoded)),
+                                  'data_hash': f"{data_hash(X, y)}:{encoder.strategy}",
+                                  'params': dict(model.get_params(), encoding=encoder.strategy)}
+
+            return model, encoder
         except Exception as e:
             messagebox.showerror("Error", f"Failed to load/train model: {str(e)}")
-            return None, None, None
+            return None, None
 
     def generate_synthetic_data(self):
         """Generate a synthetic dataset for demonstration."""
@@ -92,7 +122,7 @@ class MovieRatingPredictor:
 
     def create_gui(self):
         """Create the styled GUI components."""
-        if self.model is None or self.scaler is None:
+        if self.model is None or self.encoder is None:
             return
 
         main_frame = tk.Frame(self.root, bg="#e8f5e9", padx=20, pady=20)
@@ -131,6 +161,12 @@ class MovieRatingPredictor:
         ttk.Button(main_frame, text="Predict Rating", command=self.predict, 
                   style="TButton").pack(pady=10)
 
+        # What-if and similar movies buttons
+        ttk.Button(main_frame, text="What-If Analysis", command=self.open_what_if, 
+                  style="TButton").pack(pady=5)
+        ttk.Button(main_frame, text="Find Similar Movies", command=self.find_similar, 
+                  style="TButton").pack(pady=5)
+
         # Result display
         self.result_var = tk.StringVar(value="Enter details and click Predict")
         result_label = tk.Label(main_frame, textvariable=self.result_var, 
@@ -141,44 +177,53 @@ class MovieRatingPredictor:
         ttk.Button(main_frame, text="Clear", command=self.clear_entries, 
                   style="TButton").pack(pady=5)
 
+        # Active registry version
+        self.model_var = tk.StringVar(value="")
+        tk.Label(main_frame, textvariable=self.model_var, font=("Arial", 10), 
+                bg="#e8f5e9", fg="#2e7d32").pack(pady=5)
+
+    @timed("movie.poll_registry")
+    def poll_registry(self):
+        """Swap in the registry's active model once it has been loaded off the Tk thread."""
+        try:
+            loaded = self.watcher.poll()
+            if isinstance(loaded, Exception):
+                messagebox.showerror("Error", f"Failed to load model from registry: {str(loaded)}")
+            elif loaded is not None:
+                # Runs between Tk events, so never in the middle of a prediction
+                artifacts, meta = loaded
+                if 'encoder' not in artifacts:
+                    # Published before models carried their encoder (e.g. after a rollback)
+                    messagebox.showerror("Error", f"Model v{meta['version']} has no encoder; "
+                                                  f"keeping the current model")
+                    return
+                self.model, self.encoder = artifacts['model'], artifacts['encoder']
+                self.sensitivity = None  # Cached grids belong to the old model
+                self.movie_index = None  # Re-encoded with the new encoder on next search
+                self.model_var.set(f"Model v{meta['version']}")
+        finally:
+            self.root.after(2000, self.poll_registry)
+
+    @timed("movie.predict")
     def predict(self):
         """Predict movie rating based on user input."""
         try:
-            genre = self.genre_combo_var.get()
-            director = self.director_combo_var.get()
-            actor1 = self.actor1_combo_var.get()
-            actor2 = self.actor2_combo_var.get()
-            year = int(self.year_entry.get())
-            if year < 1888 or year > 2025:
-                raise ValueError("Year must be between 1888 and 2025")
-            runtime = int(self.runtime_entry.get())
-            if runtime < 1:
-                raise ValueError("Runtime must be positive")
-
-            # Prepare input data
-            input_data = pd.DataFrame({
-                'Genre': [genre],
-                'Director': [director],
-                'Actor1': [actor1],
-                'Actor2': [actor2],
-                'Year': [year],
-                'Runtime': [runtime]
+            values = MOVIE_SCHEMA.validate_one({
+                'Genre': self.genre_combo_var.get(),
+                'Director': self.director_combo_var.get(),
+                'Actor1': self.actor1_combo_var.get(),
+                'Actor2': self.actor2_combo_var.get(),
+                'Year': self.year_entry.get(),
+                'Runtime': self.runtime_entry.get()
             })
 
-            # Encode categorical variables
-            input_data = pd.get_dummies(input_data, columns=['Genre', 'Director', 'Actor1', 'Actor2'], drop_first=True)
-
-            # Align columns with training data
-            for col in self.feature_columns:
-                if col not in input_data.columns:
-                    input_data[col] = 0
-            input_data = input_data[self.feature_columns]
-
-            # Scale numerical features
-            input_data[['Year', 'Runtime']] = self.scaler.transform(input_data[['Year', 'Runtime']])
+            # Prepare input data
+            input_data = pd.DataFrame([values])
+            self.drift.observe(input_data.iloc[0])
 
-            # Predict
-            prediction = self.model.predict(input_data)[0]
+            # Predict (memoized per canonical input; encodes and scales on a miss)
+            prediction = self.prediction_cache.predict_frame(
+                self.model, input_data, lambda rows: self.model.predict(self.encoder.transform(rows)))[0]
             prediction = max(1, min(10, prediction))  # Clip to 1-10 range
             self.result_var.set(f"Predicted Rating: {prediction:.1f}/10")
         except ValueError as e:
@@ -186,6 +231,60 @@ class MovieRatingPredictor:
         except Exception as e:
             messagebox.showerror("Error", f"An error occurred: {str(e)}")
 
+    def open_what_if(self):
+        """Show how the rating moves with Year and Runtime for the selected cast."""
+        try:
+            if self.sensitivity is None:
+                predict_rows = lambda rows: np.clip(self.model.predict(self.encoder.transform(rows)), 1, 10)
+                self.sensitivity = SensitivityAnalyzer(predict_rows, {'Year': (1888, 2025), 'Runtime': (60, 240)},
+                                                       resolution=30)
+            context = {
+                'Genre': self.genre_combo_var.get(),
+                'Director': self.director_combo_var.get(),
+                'Actor1': self.actor1_combo_var.get(),
+                'Actor2': self.actor2_combo_var.get()
+            }
+            WhatIfWindow(self.root, self.sensitivity, context, {'Runtime': "Runtime (minutes)"},
+                         "What-If: Movie Rating", lambda rating: f"Predicted Rating: {rating:.1f}/10",
+                         "#e8f5e9", "#2e7d32")
+        except Exception as e:
+            messagebox.showerror("Error", f"An error occurred: {str(e)}")
+
+    def load_movie_index(self):
+        """Load the persisted similarity index, adding any new rows from movies.csv."""
+        return open_index(self.encoder, "movies.index", "movies.csv")
+
+    def find_similar(self):
+        """Show the 10 catalogue movies closest to the entered details."""
+        try:
+            year = int(self.year_entry.get())
+            runtime = int(self.runtime_entry.get())
+            if self.movie_index is None:
+                self.movie_index = self.load_movie_index()
+            movie = {
+                'Genre': self.genre_combo_var.get(),
+                'Director': self.director_combo_var.get(),
+                'Actor1': self.actor1_combo_var.get(),
+                'Actor2': self.actor2_combo_var.get(),
+                'Year': year,
+                'Runtime': runtime
+            }
+            results = self.movie_index.similar(movie, k=10)
+
+            window = tk.Toplevel(self.root)
+            window.title("Similar Movies")
+            window.configure(bg="#e8f5e9")
+            tk.Label(window, text="10 Most Similar Movies", font=("Arial", 14, "bold"), 
+                    bg="#e8f5e9", fg="#2e7d32").pack(pady=10)
+            result_list = tk.Listbox(window, width=70, height=10, font=("Arial", 10), bg="#ffffff", fg="#37474f")
+            result_list.pack(padx=10, pady=10)
+            for record, distance in results:
+                result_list.insert(tk.END, f"{distance:5.2f} | {describe(record)}")
+        except ValueError:
+            messagebox.showerror("Input Error", "Enter a valid Year and Runtime to search")
+        except Exception as e:
+            messagebox.showerror("Error", f"An error occurred: {str(e)}")
+
     def clear_entries(self):
         """Clear all input fields."""
         self.genre_combo_var.set(self.genres[0])
@@ -197,6 +296,7 @@ class MovieRatingPredictor:
         self.result_var.set("Enter details and click Predict")
 
 if __name__ == "__main__":
+    start_metrics("movie")
     root = tk.Tk()
     app = MovieRatingPredictor(root)
     root.mainloop()
\ No newline at end of file
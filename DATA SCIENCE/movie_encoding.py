@@ -0,0 +1,189 @@
+import hashlib
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.model_selection import KFold
+from sklearn.preprocessing import StandardScaler
+
+from predictor_data import MOVIE_CATEGORICAL, MOVIE_NUMERIC
+
+STRATEGIES = ('onehot', 'hash', 'target')
+
+
+class MovieEncoder:
+    """Fitted encoder from raw movie rows to the forest's input matrix.
+
+    Year/Runtime are median-filled and standardised; the categoricals are
+    encoded with one of three strategies whose memory does not grow with
+    dense one-hot width:
+
+    - ``'onehot'``: sparse CSR indicators over the training vocabulary,
+      memory proportional to the non-zeros (one per categorical per row).
+    - ``'hash'``: indicators hashed into ``n_hash`` fixed columns (stable
+      blake2b hashing, so any process encodes alike); unseen values still
+      land somewhere and collisions share a column.
+    - ``'target'``: each categorical becomes its smoothed mean rating and
+      its frequency. Training rows get out-of-fold means so a row's own
+      rating never leaks into its encoding.
+    """
+
+    def __init__(self, strategy='onehot', categorical=MOVIE_CATEGORICAL, numeric=MOVIE_NUMERIC,
+                 n_hash=2 ** 12, n_folds=5, smoothing=10.0, seed=42):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"strategy must be one of {', '.join(STRATEGIES)}")
+        self.strategy = strategy
+        self.categorical = list(categorical)
+        self.numeric = list(numeric)
+        self.n_hash = n_hash
+        self.n_folds = n_folds
+        self.smoothing = smoothing
+        self.seed = seed
+        self.scaler = StandardScaler()
+        self.medians = {}
+        self.vocabulary = {}
+        self.target_stats = {}
+        self.frequencies = {}
+        self.global_mean = 0.0
+
+    # Numeric block -------------------------------------------------------
+
+    def _numeric(self, df):
+        values = df[self.numeric].astype(float).fillna(self.medians)
+        return self.scaler.transform(values).astype(np.float32)
+
+    # Categorical blocks --------------------------------------------------
+
+    @staticmethod
+    def _values(df, col):
+        return df[col].astype('string').str.strip()
+
+    def _indicator_matrix(self, column_indices, width):
+        """CSR with a 1 at each non-missing (row, column index)."""
+        n_rows = len(column_indices[0]) if column_indices else 0
+        rows, cols = [], []
+        for indices in column_indices:
+            present = ~np.isnan(indices)
+            rows.append(np.flatnonzero(present))
+            cols.append(indices[present].astype(np.int64))
+        rows, cols = np.concatenate(rows), np.concatenate(cols)
+        return sparse.csr_matrix((np.ones(len(rows), dtype=np.float32), (rows, cols)), shape=(n_rows, width))
+
+    def _onehot(self, df):
+        offsets = np.cumsum([0] + [len(self.vocabulary[col]) for col in self.categorical])
+        indices = [self._values(df, col).map(self.vocabulary[col]).to_numpy(dtype=float) + offset
+                   for col, offset in zip(self.categorical, offsets)]
+        return self._indicator_matrix(indices, int(offsets[-1]))
+
+    def _hash_index(self, token):
+        digest = hashlib.blake2b(token.encode(), digest_size=8).digest()
+        return int.from_bytes(digest, 'little') % self.n_hash
+
+    def _hashed(self, df):
+        indices = []
+        for col in self.categorical:
+            values = self._values(df, col)
+            # Hash each distinct value once, then map the column
+            lookup = {value: self._hash_index(f"{col}={value}") for value in values.dropna().unique()}
+            indices.append(values.map(lookup).to_numpy(dtype=float))
+        return self._indicator_matrix(indices, self.n_hash)
+
+    def _smoothed_means(self, values, y):
+        stats = pd.DataFrame({'value': values, 'y': y}).groupby('value')['y'].agg(['sum', 'count'])
+        global_mean = float(np.mean(y))
+        return (stats['sum'] + self.smoothing * global_mean) / (stats['count'] + self.smoothing)
+
+    def _target(self, df, out_of_fold_y=None):
+        columns = []
+        for col in self.categorical:
+            values = self._values(df, col)
+            if out_of_fold_y is None:
+                means = values.map(self.target_stats[col]).astype(float).fillna(self.global_mean).to_numpy()
+            else:
+                # Each training row is encoded from the other folds only
+                means = np.full(len(df), self.global_mean)
+                folds = KFold(n_splits=self.n_folds, shuffle=True, random_state=self.seed)
+                for fit_idx, encode_idx in folds.split(values):
+                    fold_means = self._smoothed_means(values.iloc[fit_idx].to_numpy(), out_of_fold_y[fit_idx])
+                    means[encode_idx] = values.iloc[encode_idx].map(fold_means).astype(float).fillna(
+                        float(np.mean(out_of_fold_y[fit_idx]))).to_numpy()
+            columns.append(means)
+            columns.append(values.map(self.frequencies[col]).astype(float).fillna(0.0).to_numpy())
+        return np.column_stack(columns).astype(np.float32)
+
+    # Public API ----------------------------------------------------------
+
+    def fit(self, df, y=None):
+        self.fit_transform(df, y)
+        return self
+
+    def fit_transform(self, df, y=None):
+        """Fit on training rows and return their encoding (out-of-fold for 'target')."""
+        self.medians = {col: float(df[col].median()) for col in self.numeric}
+        self.scaler.fit(df[self.numeric].astype(float).fillna(self.medians))
+        for col in self.categorical:
+            values = self._values(df, col)
+            counts = values.value_counts(dropna=True)
+            self.vocabulary[col] = {value: i for i, value in enumerate(sorted(counts.index))}
+            self.frequencies[col] = (counts / len(df)).to_dict()
+
+        if self.strategy == 'target':
+            if y is None:
+                raise ValueError("Target encoding needs the training target")
+            y = np.asarray(y, dtype=float)
+            self.global_mean = float(y.mean())
+            for col in self.categorical:
+                self.target_stats[col] = self._smoothed_means(self._values(df, col).to_numpy(), y).to_dict()
+            return np.hstack([self._numeric(df), self._target(df, out_of_fold_y=y)])
+        return self.transform(df)
+
+    def transform(self, df):
+        numeric = self._numeric(df)
+        if self.strategy == 'target':
+            return np.hstack([numeric, self._target(df)])
+        encoded = self._onehot(df) if self.strategy == 'onehot' else self._hashed(df)
+        return sparse.hstack([sparse.csr_matrix(numeric), encoded], format='csr')
+
+    @property
+    def onehot_columns(self):
+        """Column names of the full one-hot layout, whatever the strategy (used by the similarity index)."""
+        return self.numeric + [f"{col}_{value}" for col in self.categorical for value in self.vocabulary[col]]
+
+    @property
+    def feature_names(self):
+        if self.strategy == 'onehot':
+            return self.onehot_columns
+        if self.strategy == 'hash':
+            return self.numeric + [f"hash_{i}" for i in range(self.n_hash)]
+        return self.numeric + [f"{col}_{kind}" for col in self.categorical for kind in ('target', 'freq')]
+
+
+def matrix_bytes(X):
+    """Memory held by a dense array or CSR matrix."""
+    if sparse.issparse(X):
+        return X.data.nbytes + X.indices.nbytes + X.indptr.nbytes
+    return X.nbytes
+
+
+if __name__ == "__main__":
+    # Usage: python movie_encoding.py [movies.csv]  - compare strategies on memory, fit time and RMSE
+    from sklearn.ensemble import RandomForestRegressor
+    from sklearn.model_selection import train_test_split
+
+    df = pd.read_csv(sys.argv[1] if len(sys.argv) > 1 else "movies.csv")
+    X_train, X_test, y_train, y_test = train_test_split(df[MOVIE_CATEGORICAL + MOVIE_NUMERIC], df['Rating'],
+                                                        test_size=0.2, random_state=42)
+    dense_width = len(MOVIE_NUMERIC) + sum(df[col].nunique() for col in MOVIE_CATEGORICAL)
+    print(f"{len(df):,} movies; dense one-hot would be {len(X_train):,} x {dense_width:,} "
+          f"({len(X_train) * dense_width * 8 / 1e6:,.1f} MB as float64)")
+    for strategy in STRATEGIES:
+        encoder = MovieEncoder(strategy)
+        start = time.perf_counter()
+        X = encoder.fit_transform(X_train, y_train)
+        model = RandomForestRegressor(n_estimators=100, random_state=42, n_jobs=-1).fit(X, y_train)
+        elapsed = time.perf_counter() - start
+        rmse = np.sqrt(np.mean((model.predict(encoder.transform(X_test)) - y_test) ** 2))
+        print(f"  {strategy:<7} width={X.shape[1]:>6,}  memory={matrix_bytes(X) / 1e6:8.2f} MB  "
+              f"fit={elapsed:6.2f}s  test RMSE={rmse:.3f}")
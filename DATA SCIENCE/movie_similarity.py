@@ -0,0 +1,196 @@
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from predictor_data import MOVIE_CATEGORICAL, MOVIE_NUMERIC, encode_frame
+
+METADATA_COLUMNS = ['Title'] + MOVIE_CATEGORICAL + MOVIE_NUMERIC
+
+
+class MovieIndex:
+    """k-nearest-neighbour search over movies in the predictor's feature space.
+
+    Movies are encoded over the predictor encoder's vocabulary (one-hot
+    categoricals plus standardised Year/Runtime) and stored as a contiguous
+    float32 matrix with cached squared norms, so a query is one chunked
+    matrix-vector product and an argpartition. The index persists to an
+    append-only pair of files, so adding movies only writes the new rows.
+    The scan is exact and stays brute force on purpose: rows are thousands
+    of one-hot columns wide, where k-d/ball trees degrade to scanning every
+    row anyway, and the catalogue is small enough that one float32 pass
+    takes milliseconds.
+    """
+
+    def __init__(self, feature_columns, mean, scale, capacity=1024):
+        self.feature_columns = list(feature_columns)
+        self.mean = np.asarray(mean, dtype=float)
+        self.scale = np.asarray(scale, dtype=float)
+        self.vectors = np.empty((capacity, len(self.feature_columns)), dtype=np.float32)
+        self.norms = np.empty(capacity, dtype=np.float32)
+        self.records = []
+        self.size = 0
+        self.persisted = 0
+        self.persisted_bytes = 0  # Length of the records file up to the last persisted row
+
+    @classmethod
+    def from_encoder(cls, encoder, **kwargs):
+        """Empty index over a fitted MovieEncoder's one-hot layout and Year/Runtime scaling."""
+        return cls(encoder.onehot_columns, encoder.scaler.mean_, encoder.scaler.scale_, **kwargs)
+
+    def matches(self, encoder):
+        """Whether the index was built with this encoder's vocabulary and scaling."""
+        return (self.feature_columns == encoder.onehot_columns
+                and np.allclose(self.mean, encoder.scaler.mean_) and np.allclose(self.scale, encoder.scaler.scale_))
+
+    def encode(self, movies):
+        X = encode_frame(movies[MOVIE_NUMERIC + MOVIE_CATEGORICAL], MOVIE_CATEGORICAL, self.feature_columns)
+        X = X.astype(float)
+        X[MOVIE_NUMERIC] = (X[MOVIE_NUMERIC] - self.mean) / self.scale
+        return X.to_numpy(dtype=np.float32)
+
+    def add(self, movies):
+        """Append a DataFrame of movies; returns their index ids."""
+        vectors = self.encode(movies)
+        needed = self.size + len(vectors)
+        if needed > len(self.vectors):
+            # Grow geometrically so repeated adds stay amortised O(new rows)
+            capacity = max(needed, 2 * len(self.vectors))
+            self.vectors = np.resize(self.vectors, (capacity, self.vectors.shape[1]))
+            self.norms = np.resize(self.norms, capacity)
+        self.vectors[self.size:needed] = vectors
+        self.norms[self.size:needed] = np.einsum('ij,ij->i', vectors, vectors)
+
+        columns = [col for col in METADATA_COLUMNS if col in movies]
+        self.records.extend(movies[columns].to_dict('records'))
+        ids = list(range(self.size, needed))
+        self.size = needed
+        return ids
+
+    def query(self, movies, k=10, chunk_size=262144):
+        """Return (ids, distances) of the k nearest movies for each query row."""
+        queries = self.encode(movies)
+        k = min(k, self.size)
+        query_norms = np.einsum('ij,ij->i', queries, queries)
+        best_ids = np.empty((len(queries), 0), dtype=np.int64)
+        best_dist = np.empty((len(queries), 0), dtype=np.float32)
+        for start in range(0, self.size, chunk_size):
+            stop = min(start + chunk_size, self.size)
+            # ||a - b||^2 = ||a||^2 - 2 a.b + ||b||^2
+            dist = self.norms[start:stop][None, :] - 2 * queries @ self.vectors[start:stop].T + query_norms[:, None]
+            ids = np.broadcast_to(np.arange(start, stop), dist.shape)
+            dist = np.concatenate([best_dist, dist], axis=1)
+            ids = np.concatenate([best_ids, ids], axis=1)
+            keep = np.argpartition(dist, k - 1, axis=1)[:, :k]
+            best_dist = np.take_along_axis(dist, keep, axis=1)
+            best_ids = np.take_along_axis(ids, keep, axis=1)
+        order = np.argsort(best_dist, axis=1)
+        distances = np.sqrt(np.maximum(np.take_along_axis(best_dist, order, axis=1), 0))
+        return np.take_along_axis(best_ids, order, axis=1), distances
+
+    def similar(self, movie, k=10):
+        """Nearest movies to one {column: value} movie as [(record, distance)]."""
+        ids, distances = self.query(pd.DataFrame([movie]), k)
+        return [(self.records[i], float(d)) for i, d in zip(ids[0], distances[0])]
+
+    def save(self, path):
+        """Persist rows added since the last save (append-only).
+
+        Both files are first cut back to the rows this index loaded, which
+        also drops any torn tail left by an interrupted save.
+        """
+        header = {'feature_columns': self.feature_columns, 'mean': self.mean.tolist(),
+                  'scale': self.scale.tolist(), 'dims': len(self.feature_columns)}
+        with open(f"{path}.json", 'w') as file:
+            json.dump(header, file)
+        mode = 'ab' if self.persisted else 'wb'
+        with open(f"{path}.f32", mode) as file:
+            file.truncate(self.persisted * self.vectors.shape[1] * self.vectors.itemsize)  # Drop a torn append
+            file.write(self.vectors[self.persisted:self.size].tobytes())
+        with open(f"{path}.jsonl", mode) as file:
+            file.truncate(self.persisted_bytes)
+            file.write("".join(json.dumps(record) + "\n" for record in self.records[self.persisted:self.size]).encode())
+            self.persisted_bytes = file.tell()
+        self.persisted = self.size
+
+    @staticmethod
+    def _read(path):
+        """(header, vectors, record lines) of the whole rows present in both files."""
+        with open(f"{path}.json", 'r') as file:
+            header = json.load(file)
+        dims = header['dims']
+        vectors = np.fromfile(f"{path}.f32", dtype=np.float32)
+        vectors = vectors[:len(vectors) - len(vectors) % dims].reshape(-1, dims)  # Whole rows only
+        with open(f"{path}.jsonl", 'rb') as file:
+            lines = [line for line in file if line.endswith(b"\n")]  # A torn last line has no newline
+        n = min(len(vectors), len(lines))  # Ignore a torn trailing write
+        return header, vectors[:n], lines[:n]
+
+    @classmethod
+    def load(cls, path):
+        """Read an index; a torn trailing write is ignored and left on disk (see repair())."""
+        header, vectors, lines = cls._read(path)
+        n = len(vectors)
+        index = cls(header['feature_columns'], header['mean'], header['scale'], capacity=max(n, 1024))
+        index.vectors[:n] = vectors
+        index.norms[:n] = np.einsum('ij,ij->i', vectors, vectors)
+        index.records = [json.loads(line) for line in lines]
+        index.size = index.persisted = n
+        index.persisted_bytes = sum(len(line) for line in lines)
+        return index
+
+    @classmethod
+    def repair(cls, path):
+        """Truncate both files to the whole rows they share; returns the number of rows kept."""
+        _, vectors, lines = cls._read(path)
+        os.truncate(f"{path}.f32", vectors.nbytes)
+        os.truncate(f"{path}.jsonl", sum(len(line) for line in lines))
+        return len(vectors)
+
+
+def open_index(encoder, path="movies.index", movies_path="movies.csv"):
+    """The persisted index for `encoder`, rebuilt if another encoder built it, topped up from movies_path.
+
+    The movie rating predictor and the command line both come through
+    here with the model's encoder, so they keep one index between them.
+    """
+    index = None
+    if os.path.exists(f"{path}.json"):
+        index = MovieIndex.load(path)
+        if not index.matches(encoder):
+            index = None  # Built for a different vocabulary or scaler; rebuild
+    if index is None:
+        index = MovieIndex.from_encoder(encoder)
+    movies = pd.read_csv(movies_path)
+    if len(movies) > index.size:
+        index.add(movies.iloc[index.size:])
+        index.save(path)
+    return index
+
+
+def describe(record):
+    """One-line description of an indexed movie."""
+    title = record.get('Title') or f"{record['Genre']} by {record['Director']}"
+    return f"{title} | {record['Actor1']} & {record['Actor2']} | {record['Year']}, {record['Runtime']} min"
+
+
+if __name__ == "__main__":
+    # Usage: python movie_similarity.py [movies.csv] - builds/updates movies.index and runs a sample query
+    #        python movie_similarity.py repair        - truncate a torn movies.index to its whole rows
+    from model_registry import ModelRegistry
+
+    if sys.argv[1:] == ["repair"]:
+        print(f"movies.index holds {MovieIndex.repair('movies.index')} whole rows")
+        sys.exit(0)
+    file_path = sys.argv[1] if len(sys.argv) > 1 else "movies.csv"
+    try:
+        encoder = ModelRegistry().load("movies")[0]['encoder']  # The live model's, as the app uses
+    except (ValueError, KeyError, FileNotFoundError):
+        sys.exit("No movie model with an encoder in the registry; run the movie rating predictor once first")
+    size = MovieIndex.load("movies.index").size if os.path.exists("movies.index.json") else 0
+    index = open_index(encoder, "movies.index", file_path)
+    print(f"Indexed {index.size} movies (+{index.size - size} new)")
+    for record, distance in index.similar(index.records[0], k=10):
+        print(f"  {distance:6.3f}  {describe(record)}")
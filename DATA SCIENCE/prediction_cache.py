@@ -0,0 +1,95 @@
+import weakref
+from collections import OrderedDict
+from numbers import Number
+
+import numpy as np
+import pandas as pd
+
+
+def canonical_key(values, decimals=2):
+    """Normalise one input row so equivalent requests share a cache key."""
+    key = []
+    for value in values:
+        if isinstance(value, str):
+            key.append(value.strip())
+        elif isinstance(value, Number):
+            key.append(round(float(value), decimals))
+        else:
+            key.append(value)
+    return tuple(key)
+
+
+class PredictionCache:
+    """Bounded LRU memo of predictions in front of a model.
+
+    Keys are (model version, canonical input row). The cache follows the
+    model object it is asked about: when a retrained or swapped-in model
+    shows up, the version is bumped and every cached entry is dropped.
+    """
+
+    def __init__(self, maxsize=10000, decimals=2):
+        self.maxsize = maxsize
+        self.decimals = decimals
+        self.entries = OrderedDict()
+        self.model_ref = None
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def bind(self, model):
+        """Invalidate everything if `model` is not the model the entries came from."""
+        if self.model_ref is None or self.model_ref() is not model:
+            self.entries.clear()
+            self.model_ref = weakref.ref(model)
+            self.version += 1
+
+    def predict_frame(self, model, rows, compute):
+        """Predict for a DataFrame of raw rows, computing only uncached rows.
+
+        `compute` receives a DataFrame of the distinct missing rows (same
+        columns as `rows`) and must return their predictions in one call.
+        """
+        self.bind(model)
+        keys = [(self.version,) + canonical_key(values, self.decimals)
+                for values in rows.itertuples(index=False, name=None)]
+
+        results = np.empty(len(keys))
+        missing = OrderedDict()
+        for i, key in enumerate(keys):
+            if key in self.entries:
+                self.hits += 1
+                self.entries.move_to_end(key)
+                results[i] = self.entries[key]
+            else:
+                self.misses += 1
+                missing.setdefault(key, []).append(i)
+
+        if missing:
+            # One batched model call for all distinct misses
+            frame = pd.DataFrame([key[1:] for key in missing], columns=rows.columns)
+            values = np.asarray(compute(frame), dtype=float)
+            for (key, positions), value in zip(missing.items(), values):
+                results[positions] = value
+                self.entries[key] = value
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+        return results
+
+    def clear(self):
+        """Drop all entries (statistics are kept)."""
+        self.entries.clear()
+
+    def stats(self):
+        """Hit-rate statistics for display or export."""
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self.entries),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'model_version': self.version,
+        }
@@ -0,0 +1,100 @@
+import hashlib
+import os
+import pandas as pd
+
+# Feature layout used by each predictor app
+IRIS_FEATURES = ['sepal length (cm)', 'sepal width (cm)', 'petal length (cm)', 'petal width (cm)']
+MOVIE_CATEGORICAL = ['Genre', 'Director', 'Actor1', 'Actor2']
+MOVIE_NUMERIC = ['Year', 'Runtime']
+SALES_CATEGORICAL = ['AgeGroup', 'Platform']
+SALES_NUMERIC = ['TV', 'Radio', 'Newspaper']
+TITANIC_NUMERIC = ['Age', 'Fare']
+
+
+def load_iris_data():
+    """Load the Iris dataset as (X, y) exactly as IrisFlowerClassifier trains on it."""
+    from sklearn.datasets import load_iris
+
+    iris = load_iris()
+    X = pd.DataFrame(iris.data, columns=iris.feature_names)
+    y = pd.Series(iris.target, name='Species')
+    return X, y
+
+
+def load_movie_data(file_path="movies.csv"):
+    """Load movies.csv and encode it the way MovieRatingPredictor does."""
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(f"{file_path} not found!")
+    df = pd.read_csv(file_path)
+
+    X = df[MOVIE_CATEGORICAL + MOVIE_NUMERIC]
+    y = df['Rating']
+    X = pd.get_dummies(X, columns=MOVIE_CATEGORICAL, drop_first=True)
+    for col in MOVIE_NUMERIC:
+        X.loc[:, col] = X[col].fillna(X[col].median())
+    return X, y
+
+
+def load_sales_data(file_path="sales.csv"):
+    """Load sales.csv and encode it the way SalesPredictor does."""
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(f"{file_path} not found!")
+    df = pd.read_csv(file_path)
+
+    X = df[SALES_NUMERIC + SALES_CATEGORICAL]
+    y = df['Sales']
+    X = pd.get_dummies(X, columns=SALES_CATEGORICAL, drop_first=True)
+    for col in SALES_NUMERIC:
+        X.loc[:, col] = X[col].fillna(X[col].median())
+    return X, y
+
+
+def load_titanic_data(file_path="titanic.csv"):
+    """Load a Titanic passenger CSV with the TitanicSurvivalPredictor features."""
+    from titanic_data import load_passengers, TitanicFeatureTransformer
+
+    df = load_passengers(file_path)
+    X = TitanicFeatureTransformer().fit_transform(df)
+    y = df['Survived'].astype(int)
+    return X, y
+
+
+# Registry of the predictor apps: how to load their data, what kind of
+# model they fit and which columns they standardise before fitting.
+PREDICTORS = {
+    'iris': {'loader': load_iris_data, 'task': 'classification', 'scale_columns': IRIS_FEATURES},
+    'movies': {'loader': load_movie_data, 'task': 'regression', 'scale_columns': MOVIE_NUMERIC},
+    'sales': {'loader': load_sales_data, 'task': 'regression', 'scale_columns': SALES_NUMERIC},
+    'titanic': {'loader': load_titanic_data, 'task': 'classification', 'scale_columns': TITANIC_NUMERIC},
+}
+
+
+def encode_frame(df, categorical, feature_columns):
+    """One-hot encode raw rows and align them to the training feature columns.
+
+    Unlike ``get_dummies(..., drop_first=True)`` on the new rows alone, this
+    keeps the dummy columns consistent with training for any batch size.
+    """
+    encoded = pd.get_dummies(df, columns=categorical)
+    return encoded.reindex(columns=feature_columns, fill_value=0)
+
+
+def prepare_rows(scaler, feature_columns, categorical, numeric, rows):
+    """Encode and scale raw input rows into the model's feature matrix."""
+    X = encode_frame(rows[numeric + categorical], categorical, feature_columns).astype(float)
+    X[numeric] = scaler.transform(X[numeric])
+    return X
+
+
+def batch_predict(model, scaler, feature_columns, categorical, numeric, rows):
+    """Predict for a DataFrame of raw input rows in a single model call."""
+    return model.predict(prepare_rows(scaler, feature_columns, categorical, numeric, rows))
+
+
+def data_hash(X, y):
+    """Return a stable content hash of a feature frame and its target."""
+    digest = hashlib.sha256()
+    digest.update(",".join(map(str, X.columns)).encode())
+    digest.update(pd.util.hash_pandas_object(X, index=False).values.tobytes())
+    digest.update(pd.util.hash_pandas_object(pd.Series(y), index=False).values.tobytes())
+    return digest.hexdigest()
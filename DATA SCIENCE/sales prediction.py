@@ -1,5 +1,5 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, simpledialog
 import pandas as pd
 import numpy as np
 from sklearn.ensemble import RandomForestRegressor
@@ -7,6 +7,17 @@ from sklearn.preprocessing import StandardScaler
 from sklearn.model_selection import train_test_split
 import os
 import random
+from sales_stream import SalesStream, IncrementalSalesModel, BackgroundUpdater
+from budget_optimizer import BudgetOptimizer
+from predictor_data import SALES_CATEGORICAL, SALES_NUMERIC, batch_predict, prepare_rows, data_hash
+from sensitivity import SensitivityAnalyzer, WhatIfWindow
+from prediction_cache import PredictionCache
+from instrumentation import timed, phase, gauge, start_metrics
+from drift_monitor import DriftMonitor, start_session
+from sharded_forest import fit_sharded
+from validation import SALES_SCHEMA
+from model_registry import ModelRegistry, RegistryWatcher, register_trained, holdout_metrics
+from explain import ForestExplainer, feature_groups
 
 class SalesPredictor:
     def __init__(self, root):
@@ -21,6 +32,10 @@ class SalesPredictor:
 
         # Load and train model
         self.model, self.scaler, self.feature_columns = self.train_model()
+        self.sensitivity = None  # Built on first What-If request
+        self.prediction_cache = PredictionCache(maxsize=5000)
+        self.explainer = None  # Built for the current model on first use
+        gauge("sales.cache_hit_rate", lambda: self.prediction_cache.stats()['hit_rate'])
 
         # Configure style
         self.style = ttk.Style()
@@ -34,6 +49,23 @@ class SalesPredictor:
         # GUI Components
         self.create_gui()
 
+        # Watch sales.csv for appended rows and update the model incrementally
+        self.updater = None
+        if self.model is not None and os.path.exists("sales.csv"):
+            self.updater = BackgroundUpdater(SalesStream("sales.csv"), self.incremental_model())
+            self.root.after(5000, self.poll_new_rows)
+
+        # Publish to the model registry and hot-swap whichever version is activated there
+        self.registry = ModelRegistry()
+        self.watcher = None
+        if self.model is not None:
+            artifacts = {'model': self.model, 'scaler': self.scaler, 'feature_columns': self.feature_columns}
+            version = register_trained(self.registry, "sales", artifacts, **self.training_info)
+            self.watcher = RegistryWatcher(self.registry, "sales", version)
+            self.model_var.set(f"Model v{version}")
+            self.root.after(2000, self.poll_registry)
+
+    @timed("sales.train_model")
     def train_model(self):
         """Load or generate dataset and train Random Forest model."""
         try:
@@ -43,15 +75,21 @@ class SalesPredictor:
                 messagebox.showinfo("Info", "sales.csv not found! Generating synthetic dataset.")
                 df = self.generate_synthetic_data()
             else:
-                df = pd.read_csv(file_path)
+                with phase("sales.read_csv"):
+                    df = pd.read_csv(file_path)
 
             # Select features and target
             features = ['TV', 'Radio', 'Newspaper', 'AgeGroup', 'Platform']
             X = df[features]
             y = df['Sales']
 
+            # Capture the training input distribution for drift monitoring
+            reference = DriftMonitor.from_frame(X, SALES_NUMERIC, SALES_CATEGORICAL)
+            self.drift = start_session("sales", reference)
+
             # Preprocess data: Encode categorical variables
-            X = pd.get_dummies(X, columns=['AgeGroup', 'Platform'], drop_first=True)
+            with phase("sales.get_dummies"):
+                X = pd.get_dummies(X, columns=['AgeGroup', 'Platform'], drop_first=True)
             feature_columns = X.columns.tolist()
 
             # Handle missing values
@@ -59,15 +97,21 @@ class SalesPredictor:
                 X.loc[:, col] = X[col].fillna(X[col].median())
 
             # Split data
-            X_train, _, y_train, _ = train_test_split(X, y, test_size=0.2, random_state=42)
+            X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
 
             # Scale numerical features
             scaler = StandardScaler()
             X_train[['TV', 'Radio', 'Newspaper']] = scaler.fit_transform(X_train[['TV', 'Radio', 'Newspaper']])
+            X_test[['TV', 'Radio', 'Newspaper']] = scaler.transform(X_test[['TV', 'Radio', 'Newspaper']])
 
-            # Train Random Forest Regressor
+            # Train Random Forest Regressor (FOREST_SHARDS=n fits it in n worker processes)
             model = RandomForestRegressor(n_estimators=100, random_state=42)
-            model.fit(X_train, y_train)
+            with phase("sales.fit"):
+                model = fit_sharded(model, X_train, y_train, shards=int(os.environ.get("FOREST_SHARDS", "1")))
+
+            # Held-out metrics and data hash recorded with the model in the registry
+            self.training_info = {'metrics': holdout_metrics('regression', y_test, model.predict(X_test)),
+                                  'data_hash': data_hash(X, y), 'params': model.get_params()}
 
             return model, scaler, feature_columns
         except Exception as e:
@@ -132,61 +176,164 @@ class SalesPredictor:
         ttk.Button(main_frame, text="Predict Sales", command=self.predict, 
                   style="TButton").pack(pady=10)
 
+        # Budget optimizer and what-if buttons
+        ttk.Button(main_frame, text="Optimize Budget", command=self.optimize_budget, 
+                  style="TButton").pack(pady=5)
+        ttk.Button(main_frame, text="What-If Analysis", command=self.open_what_if, 
+                  style="TButton").pack(pady=5)
+
         # Result display
         self.result_var = tk.StringVar(value="Enter details and click Predict")
         result_label = tk.Label(main_frame, textvariable=self.result_var, 
                               font=("Arial", 12, "bold"), bg="#f3e5f5", fg="#d81b60", wraplength=400)
         result_label.pack(pady=10)
 
+        # Explanation display (feature contributions to the prediction)
+        self.explain_var = tk.StringVar(value="")
+        tk.Label(main_frame, textvariable=self.explain_var, font=("Arial", 10), 
+                bg="#f3e5f5", fg="#4a148c", wraplength=400).pack()
+
         # Clear button
         ttk.Button(main_frame, text="Clear", command=self.clear_entries, 
                   style="TButton").pack(pady=5)
 
+        # Model status (updated as new rows stream in)
+        self.status_var = tk.StringVar(value=f"Model: {len(self.model.estimators_)} trees")
+        tk.Label(main_frame, textvariable=self.status_var, font=("Arial", 10), 
+                bg="#f3e5f5", fg="#4a148c").pack(pady=5)
+
+        # Active registry version
+        self.model_var = tk.StringVar(value="")
+        tk.Label(main_frame, textvariable=self.model_var, font=("Arial", 10), 
+                bg="#f3e5f5", fg="#4a148c").pack(pady=5)
+
+    def incremental_model(self):
+        """Grow the current forest from appended rows, up to twice its trained size."""
+        return IncrementalSalesModel(self.model, self.scaler, self.feature_columns,
+                                     max_trees=2 * len(self.model.estimators_))
+
+    @timed("sales.poll_new_rows")
+    def poll_new_rows(self):
+        """Swap in a model updated from rows appended to sales.csv."""
+        try:
+            updated = self.updater.poll()
+            if isinstance(updated, Exception):
+                messagebox.showerror("Error", f"Incremental update failed: {str(updated)}")
+            elif updated is not None:
+                # Swap happens on the Tk thread, so never in the middle of a prediction
+                self.model, self.scaler = updated
+                self.sensitivity = None  # Cached grids belong to the old model
+                incremental = self.updater.incremental
+                size = f"{len(self.model.estimators_)} trees" if hasattr(self.model, 'estimators_') else "SGD"
+                self.status_var.set(f"Model: {size} | +{incremental.rows_seen} new rows "
+                                    f"in {incremental.updates} updates")
+        finally:
+            self.root.after(5000, self.poll_new_rows)  # Even if sales.csv was briefly missing or rewritten
+
+    @timed("sales.poll_registry")
+    def poll_registry(self):
+        """Swap in the registry's active model once it has been loaded off the Tk thread."""
+        try:
+            loaded = self.watcher.poll()
+            if isinstance(loaded, Exception):
+                messagebox.showerror("Error", f"Failed to load model from registry: {str(loaded)}")
+            elif loaded is not None:
+                # Runs between Tk events, so never in the middle of a prediction
+                artifacts, meta = loaded
+                self.model, self.scaler = artifacts['model'], artifacts['scaler']
+                self.feature_columns = artifacts['feature_columns']
+                self.sensitivity = None  # Cached grids belong to the old model
+                if self.updater is not None:
+                    # Keep streaming new rows, but grow the swapped-in model from here on
+                    self.updater = BackgroundUpdater(self.updater.stream, self.incremental_model())
+                size = f"{len(self.model.estimators_)} trees" if hasattr(self.model, 'estimators_') else "SGD"
+                self.status_var.set(f"Model: {size}")
+                self.model_var.set(f"Model v{meta['version']}")
+        finally:
+            self.root.after(2000, self.poll_registry)
+
+    @timed("sales.predict")
     def predict(self):
         """Predict sales based on user input."""
         try:
-            tv = float(self.tv_entry.get())
-            if tv < 0:
-                raise ValueError("TV Ad Spend must be non-negative")
-            radio = float(self.radio_entry.get())
-            if radio < 0:
-                raise ValueError("Radio Ad Spend must be non-negative")
-            newspaper = float(self.newspaper_entry.get())
-            if newspaper < 0:
-                raise ValueError("Newspaper Ad Spend must be non-negative")
-            age_group = self.age_group_combo_var.get()
-            platform = self.platform_combo_var.get()
+            values = SALES_SCHEMA.validate_one({
+                'TV': self.tv_entry.get(),
+                'Radio': self.radio_entry.get(),
+                'Newspaper': self.newspaper_entry.get(),
+                'AgeGroup': self.age_group_combo_var.get(),
+                'Platform': self.platform_combo_var.get()
+            })
 
             # Prepare input data
-            input_data = pd.DataFrame({
-                'TV': [tv],
-                'Radio': [radio],
-                'Newspaper': [newspaper],
-                'AgeGroup': [age_group],
-                'Platform': [platform]
-            })
+            input_data = pd.DataFrame([values])
+            self.drift.observe(input_data.iloc[0])
 
-            # Encode categorical variables
-            input_data = pd.get_dummies(input_data, columns=['AgeGroup', 'Platform'], drop_first=True)
+            # Predict (memoized per canonical input; encodes and scales on a miss)
+            prediction = self.prediction_cache.predict_frame(self.model, input_data, lambda rows: batch_predict(
+                self.model, self.scaler, self.feature_columns, SALES_CATEGORICAL, SALES_NUMERIC, rows))[0]
+            prediction = max(100000, prediction)  # Ensure minimum sales of 1 lakh
+            self.result_var.set(f"Predicted Sales: ₹{prediction:,.2f}")
+            self.explain_var.set(self.explain_prediction(input_data))
+        except ValueError as e:
+            messagebox.showerror("Input Error", str(e))
+        except Exception as e:
+            messagebox.showerror("Error", f"An error occurred: {str(e)}")
 
-            # Align columns with training data
-            for col in self.feature_columns:
-                if col not in input_data.columns:
-                    input_data[col] = 0
-            input_data = input_data[self.feature_columns]
+    def explain_prediction(self, input_data):
+        """Describe the features that moved the prediction the most."""
+        if not hasattr(self.model, 'estimators_'):
+            return ""  # Only forests can be explained along tree paths
+        if self.explainer is None or self.explainer.model is not self.model:
+            self.explainer = ForestExplainer(self.model, self.feature_columns)
+        X = prepare_rows(self.scaler, self.feature_columns, SALES_CATEGORICAL, SALES_NUMERIC, input_data)
+        top = self.explainer.explain_one(X, groups=feature_groups(self.feature_columns, SALES_CATEGORICAL))
+        return "Why: " + ", ".join(f"{name} {value:+,.0f}" for name, value in top) if top else ""
 
-            # Scale numerical features
-            input_data[['TV', 'Radio', 'Newspaper']] = self.scaler.transform(input_data[['TV', 'Radio', 'Newspaper']])
+    @timed("sales.optimize_budget")
+    def optimize_budget(self):
+        """Find the best TV/Radio/Newspaper split of a total budget."""
+        try:
+            budget = simpledialog.askfloat("Optimize Budget", "Total Ad Budget (₹):", 
+                                           parent=self.root, minvalue=1)
+            if budget is None:
+                return
+            age_group = self.age_group_combo_var.get()
+            platform = self.platform_combo_var.get()
 
-            # Predict
-            prediction = self.model.predict(input_data)[0]
-            prediction = max(100000, prediction)  # Ensure minimum sales of 1 lakh
-            self.result_var.set(f"Predicted Sales: ₹{prediction:,.2f}")
+            optimizer = BudgetOptimizer(self.model, self.scaler, self.feature_columns)
+            best = optimizer.optimize(budget, age_group, platform)
+
+            # Fill the entries with the suggested allocation
+            for attr, key in [('tv_entry', 'TV'), ('radio_entry', 'Radio'), ('newspaper_entry', 'Newspaper')]:
+                getattr(self, attr).delete(0, tk.END)
+                getattr(self, attr).insert(0, f"{best[key]:.2f}")
+            prediction = max(100000, best['predicted_sales'])
+            self.result_var.set(f"Best Split: TV ₹{best['TV']:,.0f} | Radio ₹{best['Radio']:,.0f} | "
+                                f"Newspaper ₹{best['Newspaper']:,.0f}\nPredicted Sales: ₹{prediction:,.2f} "
+                                f"({best['evaluations']:,} splits in {best['elapsed']:.2f}s)")
         except ValueError as e:
             messagebox.showerror("Input Error", str(e))
         except Exception as e:
             messagebox.showerror("Error", f"An error occurred: {str(e)}")
 
+    def open_what_if(self):
+        """Show how sales move with TV/Radio/Newspaper spend for the selected audience."""
+        try:
+            if self.sensitivity is None:
+                predict_rows = lambda rows: np.maximum(100000, batch_predict(
+                    self.model, self.scaler, self.feature_columns, SALES_CATEGORICAL, SALES_NUMERIC, rows))
+                axes = {'TV': (0, 3000000), 'Radio': (0, 1000000), 'Newspaper': (0, 800000)}
+                self.sensitivity = SensitivityAnalyzer(predict_rows, axes, resolution=20)
+            context = {
+                'AgeGroup': self.age_group_combo_var.get(),
+                'Platform': self.platform_combo_var.get()
+            }
+            labels = {'TV': "TV Ad Spend (₹)", 'Radio': "Radio Ad Spend (₹)", 'Newspaper': "Newspaper Ad Spend (₹)"}
+            WhatIfWindow(self.root, self.sensitivity, context, labels, "What-If: Sales",
+                         lambda sales: f"Predicted Sales: ₹{sales:,.2f}", "#f3e5f5", "#4a148c")
+        except Exception as e:
+            messagebox.showerror("Error", f"An error occurred: {str(e)}")
+
     def clear_entries(self):
         """Clear all input fields."""
         for attr in ['tv_entry', 'radio_entry', 'newspaper_entry']:
@@ -194,8 +341,10 @@ class SalesPredictor:
         self.age_group_combo_var.set(self.age_groups[0])
         self.platform_combo_var.set(self.platforms[0])
         self.result_var.set("Enter details and click Predict")
+        self.explain_var.set("")
 
 if __name__ == "__main__":
+    start_metrics("sales")
     root = tk.Tk()
     app = SalesPredictor(root)
     root.mainloop()
\ No newline at end of file
@@ -0,0 +1,201 @@
+import copy
+import io
+import os
+import queue
+import threading
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import SGDRegressor
+from sklearn.preprocessing import StandardScaler
+
+from predictor_data import SALES_CATEGORICAL, SALES_NUMERIC, encode_frame
+
+
+class SalesStream:
+    """Tail a sales CSV and return only the rows appended since the last read."""
+
+    def __init__(self, file_path="sales.csv", from_start=False):
+        self.file_path = file_path
+        with open(file_path, 'rb') as file:
+            self.header = file.readline()
+            self.data_start = file.tell()
+        self.offset = self.data_start if from_start else os.path.getsize(file_path)
+
+    def read_new_rows(self):
+        """Return a DataFrame of complete new rows, or None if nothing was appended."""
+        size = os.path.getsize(self.file_path)
+        if size < self.offset:
+            # File was rewritten (e.g. regenerated); start over after the header
+            self.offset = self.data_start
+        if size == self.offset:
+            return None
+
+        with open(self.file_path, 'rb') as file:
+            file.seek(self.offset)
+            chunk = file.read(size - self.offset)
+
+        # Leave a partially written last line for the next read
+        end = chunk.rfind(b"\n")
+        if end < 0:
+            return None
+        chunk = chunk[:end + 1]
+        self.offset += len(chunk)
+
+        rows = pd.read_csv(io.BytesIO(self.header + chunk))
+        return rows if len(rows) else None
+
+
+class ScaledTargetSGD:
+    """SGDRegressor that learns a standardised target online."""
+
+    def __init__(self, random_state=42):
+        self.regressor = SGDRegressor(random_state=random_state, learning_rate='adaptive', eta0=0.01)
+        self.target_scaler = StandardScaler()
+
+    def partial_fit(self, X, y):
+        y = np.asarray(y, dtype=float).reshape(-1, 1)
+        self.target_scaler.partial_fit(y)
+        self.regressor.partial_fit(X, self.target_scaler.transform(y).ravel())
+        return self
+
+    def predict(self, X):
+        scaled = self.regressor.predict(X).reshape(-1, 1)
+        return self.target_scaler.inverse_transform(scaled).ravel()
+
+
+class IncrementalSalesModel:
+    """Update a sales model from appended rows without refitting on history.
+
+    ``mode='forest'`` grows the RandomForestRegressor with warm-start trees
+    fitted only on each new chunk; the scaler stays frozen because the old
+    trees' thresholds are expressed in its units. With ``max_trees`` the
+    chunk trees form a sliding window next to the initial forest, which is
+    never dropped, so small-chunk trees cannot outvote it by sheer number.
+    ``mode='sgd'`` keeps the scaler and an SGD regressor current with
+    ``partial_fit``; unless ``model`` already is one, the regressor is
+    first warm-started on ``history`` (the raw training rows). Either way
+    each update builds a new (model, scaler) pair so the live pair can be
+    swapped in one assignment.
+    """
+
+    def __init__(self, model, scaler, feature_columns, mode='forest', trees_per_chunk=10,
+                 max_trees=None, min_chunk_rows=20, history=None, history_epochs=5):
+        if mode not in ('forest', 'sgd'):
+            raise ValueError("mode must be 'forest' or 'sgd'")
+        self.model = model
+        self.scaler = scaler
+        self.feature_columns = feature_columns
+        self.mode = mode
+        self.trees_per_chunk = trees_per_chunk
+        self.max_trees = max_trees
+        self.min_chunk_rows = min_chunk_rows
+        self.pending = []
+        self.rows_seen = 0
+        self.updates = 0
+        self.initial_trees = len(model.estimators_) if mode == 'forest' else 0
+        if max_trees and max_trees < self.initial_trees + trees_per_chunk:
+            raise ValueError(f"max_trees must leave room for {trees_per_chunk} trees beside "
+                             f"the initial {self.initial_trees}")
+        if mode == 'sgd' and not isinstance(model, ScaledTargetSGD):
+            if history is None:
+                raise ValueError("mode='sgd' needs the training history to replace a non-SGD model")
+            self.model = self._warm_start(history, history_epochs)
+
+    def _warm_start(self, history, epochs):
+        """An SGD model fitted on the history in the current scaler's units."""
+        X, y = self.prepare(history)
+        X[SALES_NUMERIC] = self.scaler.transform(X[SALES_NUMERIC])
+        model = ScaledTargetSGD()
+        for _ in range(epochs):
+            model.partial_fit(X, y)
+        return model
+
+    def prepare(self, rows):
+        """Encode raw CSV rows into the model's feature layout (unscaled)."""
+        rows = rows.dropna(subset=['Sales'])
+        X = encode_frame(rows[SALES_NUMERIC + SALES_CATEGORICAL], SALES_CATEGORICAL, self.feature_columns)
+        X = X.astype(float)
+        for i, col in enumerate(SALES_NUMERIC):
+            X[col] = X[col].fillna(self.scaler.mean_[i])
+        return X, rows['Sales'].to_numpy(dtype=float)
+
+    def add_rows(self, rows):
+        """Buffer new rows; return a new (model, scaler) once a chunk is ready, else None."""
+        self.pending.append(rows)
+        if sum(len(r) for r in self.pending) < self.min_chunk_rows:
+            return None
+        chunk = pd.concat(self.pending, ignore_index=True)
+        self.pending = []
+        return self.update(chunk)
+
+    def update(self, rows):
+        """Fit on one chunk of new rows and return the updated (model, scaler)."""
+        X, y = self.prepare(rows)
+        if len(y) == 0:
+            return None
+
+        if self.mode == 'forest':
+            scaler = self.scaler
+            X[SALES_NUMERIC] = scaler.transform(X[SALES_NUMERIC])
+            model = self._grow_forest(X, y)
+        else:
+            scaler = copy.deepcopy(self.scaler)
+            scaler.partial_fit(X[SALES_NUMERIC])
+            X[SALES_NUMERIC] = scaler.transform(X[SALES_NUMERIC])
+            model = copy.deepcopy(self.model) if isinstance(self.model, ScaledTargetSGD) else ScaledTargetSGD()
+            model.partial_fit(X, y)
+
+        self.model, self.scaler = model, scaler
+        self.rows_seen += len(y)
+        self.updates += 1
+        return model, scaler
+
+    def _grow_forest(self, X, y):
+        """Return a new forest sharing the existing trees plus trees fitted on X."""
+        model = copy.copy(self.model)
+        trees = list(self.model.estimators_)
+        if self.max_trees and len(trees) + self.trees_per_chunk > self.max_trees:
+            # Sliding window: drop the oldest chunk trees to make room, keeping the initial forest
+            excess = len(trees) + self.trees_per_chunk - self.max_trees
+            trees = trees[:self.initial_trees] + trees[self.initial_trees + excess:]
+        model.estimators_ = trees
+        model.set_params(warm_start=True, n_estimators=len(trees) + self.trees_per_chunk,
+                         random_state=self.model.random_state + self.updates + 1
+                         if isinstance(self.model.random_state, int) else None)
+        model.fit(X, y)
+        return model
+
+
+class BackgroundUpdater:
+    """Run IncrementalSalesModel updates off the Tk thread.
+
+    ``poll()`` is meant to be called from a ``root.after`` loop: it reads new
+    rows, hands them to a worker thread, and returns a finished (model,
+    scaler) pair when one is ready so the caller can swap it in.
+    """
+
+    def __init__(self, stream, incremental):
+        self.stream = stream
+        self.incremental = incremental
+        self.results = queue.Queue()
+        self.worker = None
+
+    def poll(self):
+        if self.worker is None or not self.worker.is_alive():
+            rows = self.stream.read_new_rows()
+            if rows is not None:
+                self.worker = threading.Thread(target=self._run, args=(rows,), daemon=True)
+                self.worker.start()
+        try:
+            return self.results.get_nowait()
+        except queue.Empty:
+            return None
+
+    def _run(self, rows):
+        try:
+            updated = self.incremental.add_rows(rows)
+        except Exception as e:
+            updated = e
+        if updated is not None:
+            self.results.put(updated)
@@ -0,0 +1,187 @@
+import tkinter as tk
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+from scipy.interpolate import RegularGridInterpolator
+
+
+class PredictionGrid:
+    """Predictions precomputed on a regular grid, interpolated between points."""
+
+    def __init__(self, names, axes, values):
+        self.names = list(names)
+        self.axes = axes
+        self.values = values
+        self.interpolator = RegularGridInterpolator(tuple(axes), values)
+
+    def at(self, points):
+        """Interpolate predictions for an (n, d) array of points (clipped to the grid)."""
+        points = np.atleast_2d(np.asarray(points, dtype=float))
+        lows = np.array([axis[0] for axis in self.axes])
+        highs = np.array([axis[-1] for axis in self.axes])
+        return self.interpolator(np.clip(points, lows, highs))
+
+
+class SensitivityAnalyzer:
+    """What-if analysis over numeric inputs for each categorical combination.
+
+    For every categorical context (e.g. a Genre/Director/Actor combination)
+    the full grid over the numeric axes is predicted in one batched call and
+    kept in an LRU cache; slider and heatmap queries are then answered by
+    interpolation without touching the model.
+    """
+
+    def __init__(self, predict_batch, axes, resolution=25, max_grids=64):
+        self.predict_batch = predict_batch
+        self.names = list(axes)
+        self.axes = [np.linspace(low, high, resolution) for low, high in axes.values()]
+        self.max_grids = max_grids
+        self.grids = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def grid(self, context):
+        """Return the prediction grid for a categorical context, computing it if needed."""
+        key = tuple(sorted(context.items()))
+        if key in self.grids:
+            self.hits += 1
+            self.grids.move_to_end(key)
+            return self.grids[key]
+
+        self.misses += 1
+        mesh = np.meshgrid(*self.axes, indexing='ij')
+        rows = pd.DataFrame({name: values.ravel() for name, values in zip(self.names, mesh)})
+        for name, value in context.items():
+            rows[name] = value
+        values = np.asarray(self.predict_batch(rows), dtype=float).reshape(mesh[0].shape)
+
+        grid = PredictionGrid(self.names, self.axes, values)
+        self.grids[key] = grid
+        while len(self.grids) > self.max_grids:
+            self.grids.popitem(last=False)
+        return grid
+
+    def precompute(self, contexts):
+        """Warm the cache for several categorical contexts."""
+        for context in contexts:
+            self.grid(context)
+
+    def predict(self, context, point):
+        """Interpolated prediction for a {numeric name: value} point."""
+        grid = self.grid(context)
+        return float(grid.at([[point[name] for name in self.names]])[0])
+
+    def surface(self, context, x_name, y_name, point, resolution=None):
+        """2-D slice over two numeric inputs with the others held at `point`.
+
+        Returns (x values, y values, Z) with Z indexed [y, x] for drawing.
+        """
+        grid = self.grid(context)
+        x_axis = self.axes[self.names.index(x_name)]
+        y_axis = self.axes[self.names.index(y_name)]
+        if resolution:
+            x_axis = np.linspace(x_axis[0], x_axis[-1], resolution)
+            y_axis = np.linspace(y_axis[0], y_axis[-1], resolution)
+        xx, yy = np.meshgrid(x_axis, y_axis)
+        points = np.empty((xx.size, len(self.names)))
+        for i, name in enumerate(self.names):
+            if name == x_name:
+                points[:, i] = xx.ravel()
+            elif name == y_name:
+                points[:, i] = yy.ravel()
+            else:
+                points[:, i] = point[name]
+        return x_axis, y_axis, grid.at(points).reshape(xx.shape)
+
+
+class WhatIfWindow:
+    """Slider and heatmap window driven by a SensitivityAnalyzer."""
+
+    def __init__(self, root, analyzer, context, labels, title, result_format, bg, accent, size=300):
+        self.analyzer = analyzer
+        self.context = context
+        self.result_format = result_format
+        self.size = size
+        self.x_name, self.y_name = analyzer.names[0], analyzer.names[1]
+
+        self.window = tk.Toplevel(root)
+        self.window.title(title)
+        self.window.configure(bg=bg)
+
+        frame = tk.Frame(self.window, bg=bg, padx=20, pady=20)
+        frame.pack(expand=True, fill="both")
+        tk.Label(frame, text=title, font=("Arial", 16, "bold"), bg=bg, fg=accent).pack(pady=5)
+        tk.Label(frame, text=", ".join(str(v) for v in context.values()), font=("Arial", 10),
+                bg=bg, fg=accent).pack()
+
+        # One slider per numeric input
+        self.sliders = {}
+        for name, axis in zip(analyzer.names, analyzer.axes):
+            scale = tk.Scale(frame, label=labels.get(name, name), from_=axis[0], to=axis[-1],
+                             orient="horizontal", length=size, bg=bg, highlightthickness=0,
+                             resolution=(axis[-1] - axis[0]) / 1000)
+            scale.set((axis[0] + axis[-1]) / 2)
+            scale.pack()
+            self.sliders[name] = scale
+
+        # Result display
+        self.result_var = tk.StringVar()
+        tk.Label(frame, textvariable=self.result_var, font=("Arial", 12, "bold"), bg=bg,
+                fg="#d81b60").pack(pady=5)
+
+        # Heatmap over the first two inputs; cells are created once and recoloured
+        tk.Label(frame, text=f"{labels.get(self.x_name, self.x_name)} (x) vs "
+                             f"{labels.get(self.y_name, self.y_name)} (y)",
+                font=("Arial", 10), bg=bg).pack()
+        self.canvas = tk.Canvas(frame, width=size, height=size, bg="#ffffff", highlightthickness=0)
+        self.canvas.pack(pady=5)
+        self.cells = None
+        self.marker = self.canvas.create_oval(0, 0, 0, 0, outline="#000000", width=2)
+        self.surface_key = None
+        self.refresh()
+
+        # Hook the sliders up only once everything they update exists
+        for scale in self.sliders.values():
+            scale.configure(command=lambda _: self.refresh())
+
+    def point(self):
+        return {name: float(scale.get()) for name, scale in self.sliders.items()}
+
+    def refresh(self):
+        """Update the prediction and heatmap from the current slider values."""
+        point = self.point()
+        self.result_var.set(self.result_format(self.analyzer.predict(self.context, point)))
+
+        # Only recolour the heatmap when an input off the heatmap axes moved
+        others = tuple(v for k, v in point.items() if k not in (self.x_name, self.y_name))
+        if others != self.surface_key:
+            self.surface_key = others
+            self.draw_heatmap(point)
+
+        x_axis = self.analyzer.axes[0]
+        y_axis = self.analyzer.axes[1]
+        x = (point[self.x_name] - x_axis[0]) / (x_axis[-1] - x_axis[0]) * self.size
+        y = self.size - (point[self.y_name] - y_axis[0]) / (y_axis[-1] - y_axis[0]) * self.size
+        self.canvas.coords(self.marker, x - 5, y - 5, x + 5, y + 5)
+        self.canvas.tag_raise(self.marker)
+
+    def draw_heatmap(self, point):
+        _, _, Z = self.analyzer.surface(self.context, self.x_name, self.y_name, point)
+        rows, cols = Z.shape
+        low, high = float(Z.min()), float(Z.max())
+        span = (high - low) or 1.0
+        if self.cells is None:
+            w, h = self.size / cols, self.size / rows
+            self.cells = [[self.canvas.create_rectangle(c * w, self.size - (r + 1) * h, (c + 1) * w,
+                                                        self.size - r * h, width=0)
+                           for c in range(cols)] for r in range(rows)]
+        for r in range(rows):
+            for c in range(cols):
+                self.canvas.itemconfig(self.cells[r][c], fill=heat_colour((Z[r, c] - low) / span))
+
+
+def heat_colour(t):
+    """Map 0..1 to a blue-to-red colour."""
+    t = min(max(t, 0.0), 1.0)
+    return f"#{int(255 * t):02x}{int(80 * (1 - abs(2 * t - 1))):02x}{int(255 * (1 - t)):02x}"
@@ -0,0 +1,282 @@
+import glob
+import json
+import os
+import pickle
+import shutil
+import socket
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy import sparse
+from sklearn.base import clone
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.utils import check_random_state
+
+MAX_SEED = np.iinfo(np.int32).max
+
+
+def tree_seeds(random_state, n_estimators):
+    """Per-tree seeds in the order RandomForestRegressor.fit draws them."""
+    rng = check_random_state(random_state)
+    return [int(rng.randint(MAX_SEED)) for _ in range(n_estimators)]
+
+
+def bootstrap_size(n_samples, max_samples):
+    if max_samples is None:
+        return n_samples
+    if isinstance(max_samples, (int, np.integer)):
+        return int(max_samples)
+    return max(int(max_samples * n_samples), 1)
+
+
+def fit_trees(params, seeds, X, y):
+    """Fit the trees for `seeds` exactly as RandomForestRegressor.fit would.
+
+    Each tree gets its bootstrap sample as per-row counts passed as
+    sample weights, drawn from the tree's own seed - the same recipe the
+    forest uses - so a tree does not depend on which process fits it.
+    """
+    forest = RandomForestRegressor(**params)
+    tree_params = {name: getattr(forest, name) for name in forest.estimator_params}
+    # Trees fit sparse input column-wise, so convert CSR once rather than per tree
+    X = X.astype(np.float32).tocsc() if sparse.issparse(X) else np.asarray(X, dtype=np.float32)
+    y = np.ascontiguousarray(y, dtype=np.float64)
+    n_samples = X.shape[0]
+    trees = []
+    for seed in seeds:
+        tree = clone(forest.estimator).set_params(**dict(tree_params, random_state=seed))
+        if forest.bootstrap:
+            indices = check_random_state(seed).randint(0, n_samples, bootstrap_size(n_samples, forest.max_samples))
+            tree.fit(X, y, sample_weight=np.bincount(indices, minlength=n_samples))
+        else:
+            tree.fit(X, y)
+        trees.append(tree)
+    return trees
+
+
+def merge_forest(params, trees, n_features, feature_names=None):
+    """Assemble fitted trees into one RandomForestRegressor."""
+    forest = RandomForestRegressor(**params)
+    forest.estimator_ = clone(forest.estimator)
+    forest.estimators_ = list(trees)
+    forest.n_estimators = len(forest.estimators_)
+    forest.n_features_in_ = n_features
+    forest.n_outputs_ = 1
+    if feature_names is not None:
+        forest.feature_names_in_ = np.asarray(feature_names, dtype=object)
+    return forest
+
+
+def claim_job(work_dir, worker_id):
+    """Atomically claim the next queued job; returns its claimed path or None."""
+    for path in sorted(glob.glob(os.path.join(work_dir, "jobs", "*.json"))):
+        claimed = f"{path}.{worker_id}"
+        try:
+            os.rename(path, claimed)
+            os.utime(claimed)  # Claim age is measured from now
+            return claimed
+        except FileNotFoundError:
+            continue  # Another worker got there first
+    return None
+
+
+def load_data(path):
+    """(X, y) from a shard data file; sparse X is stored as a companion .X.npz."""
+    with np.load(path) as data:
+        y = data['y']
+        X = data['X'] if 'X' in data else sparse.load_npz(f"{path[:-4]}.X.npz")
+    return X, y
+
+
+def run_worker(work_dir, worker_id=None):
+    """Fit queued shards from `work_dir` until the queue is empty; returns shards done."""
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+    done = 0
+    while True:
+        job_path = claim_job(work_dir, worker_id)
+        if job_path is None:
+            return done
+        with open(job_path, 'r') as file:
+            job = json.load(file)
+        X, y = load_data(os.path.join(work_dir, job['data']))
+        trees = fit_trees(job['params'], job['seeds'], X, y)
+
+        result_path = os.path.join(work_dir, "results", f"shard-{job['shard']:04d}.pkl")
+        tmp_path = f"{result_path}.{worker_id}.tmp"
+        with open(tmp_path, 'wb') as file:
+            pickle.dump(trees, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, result_path)
+        try:
+            os.remove(job_path)
+        except FileNotFoundError:
+            pass  # Requeued as stale and finished by another worker; the result is the same
+        done += 1
+
+
+class ShardedForestTrainer:
+    """Fit a RandomForestRegressor as independent shards of trees and merge them.
+
+    The work directory is the queue: the coordinator writes the training
+    data, a manifest and one job per shard, and workers - local processes
+    or ``python sharded_forest.py worker DIR`` on any host sharing the
+    directory - claim jobs by atomic rename and write back pickled trees.
+    Jobs carry the per-tree seeds the forest itself would draw, so when
+    every shard sees the full data the merged forest is identical to a
+    single-process fit. ``submit_partitions`` instead gives each shard its
+    own slice of rows, bounding worker memory at the cost of that
+    equivalence.
+    """
+
+    def __init__(self, forest, shards=4, work_dir=None, claim_timeout=600):
+        self.params = forest.get_params()
+        # The merged forest is assembled from pickled trees, never fit as a whole, so it
+        # has no OOB predictions and no earlier trees to extend (partition shards never
+        # even give the coordinator the full data to score)
+        for name in ('oob_score', 'warm_start'):
+            if self.params.get(name):
+                raise ValueError(f"Sharded training does not support {name}=True; fit with shards=1")
+        self.params['n_jobs'] = None
+        if self.params['random_state'] is None:
+            # Fix a seed so every shard draws from the same sequence
+            self.params['random_state'] = int(np.random.randint(MAX_SEED))
+        self.shards = max(1, min(shards, self.params['n_estimators']))
+        self.work_dir = work_dir or tempfile.mkdtemp(prefix="forest-shards-")
+        self.claim_timeout = claim_timeout
+
+    def _write_data(self, name, X, y):
+        path = os.path.join(self.work_dir, "data", name)
+        y = np.asarray(y, dtype=np.float64)
+        if sparse.issparse(X):
+            # Sparse (e.g. one-hot CSR) data stays sparse on disk
+            sparse.save_npz(f"{path}.X.npz", sparse.csr_matrix(X, dtype=np.float32))
+            np.savez(path, y=y)
+        else:
+            np.savez(path, X=np.asarray(X, dtype=np.float32), y=y)
+        return f"{name}.npz"
+
+    def _write_jobs(self, data_files, X):
+        for sub in ("data", "jobs", "results"):
+            os.makedirs(os.path.join(self.work_dir, sub), exist_ok=True)
+        manifest = {
+            'params': self.params, 'shards': len(data_files), 'n_features': X.shape[1],
+            'feature_names': list(map(str, X.columns)) if hasattr(X, 'columns') else None,
+        }
+        with open(os.path.join(self.work_dir, "manifest.json"), 'w') as file:
+            json.dump(manifest, file)
+
+        seeds = tree_seeds(self.params['random_state'], self.params['n_estimators'])
+        for shard, block in enumerate(np.array_split(np.arange(len(seeds)), len(data_files))):
+            job = {'shard': shard, 'params': self.params, 'data': data_files[shard],
+                   'seeds': [seeds[i] for i in block]}
+            path = os.path.join(self.work_dir, "jobs", f"shard-{shard:04d}.json")
+            with open(f"{path}.tmp", 'w') as file:
+                json.dump(job, file)
+            os.replace(f"{path}.tmp", path)
+
+    def submit(self, X, y):
+        """Queue one job per shard, all training on the full data."""
+        os.makedirs(os.path.join(self.work_dir, "data"), exist_ok=True)
+        data_file = os.path.join("data", self._write_data("full", X, y))
+        self._write_jobs([data_file] * self.shards, X)
+
+    def submit_partitions(self, partitions):
+        """Queue one job per (X, y) partition; each shard sees only its rows.
+
+        `partitions` may be a generator (e.g. over CSV chunks), so the
+        coordinator never holds more than one partition in memory.
+        """
+        os.makedirs(os.path.join(self.work_dir, "data"), exist_ok=True)
+        data_files = []
+        for i, (X, y) in enumerate(partitions):
+            data_files.append(os.path.join("data", self._write_data(f"part-{i:04d}", X, y)))
+        if not data_files:
+            raise ValueError("No partitions to train on")
+        self.shards = len(data_files)
+        self._write_jobs(data_files, X)
+
+    def _requeue_stale(self):
+        """Return jobs whose worker has held them past claim_timeout to the queue."""
+        for claimed in glob.glob(os.path.join(self.work_dir, "jobs", "*.json.*")):
+            if claimed.endswith(".tmp"):
+                continue
+            try:
+                if time.time() - os.path.getmtime(claimed) > self.claim_timeout:
+                    os.rename(claimed, claimed[:claimed.index(".json") + 5])
+            except FileNotFoundError:
+                pass  # Finished in the meantime
+
+    def collect(self, timeout=None, poll=0.5):
+        """Wait for every shard's trees and merge them in seed order."""
+        with open(os.path.join(self.work_dir, "manifest.json"), 'r') as file:
+            manifest = json.load(file)
+        paths = [os.path.join(self.work_dir, "results", f"shard-{shard:04d}.pkl")
+                 for shard in range(manifest['shards'])]
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not all(os.path.exists(path) for path in paths):
+            if deadline is not None and time.monotonic() > deadline:
+                missing = sum(not os.path.exists(path) for path in paths)
+                raise TimeoutError(f"{missing} of {len(paths)} forest shards not finished")
+            self._requeue_stale()
+            time.sleep(poll)
+
+        trees = []
+        for path in paths:
+            with open(path, 'rb') as file:
+                trees.extend(pickle.load(file))
+        return merge_forest(manifest['params'], trees, manifest['n_features'], manifest['feature_names'])
+
+    def fit(self, X, y, workers=None):
+        """Queue the shards, fit them in local worker processes and merge."""
+        self.submit(X, y)
+        workers = min(workers or os.cpu_count() or 1, self.shards)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for future in [pool.submit(run_worker, self.work_dir, f"local-{i}") for i in range(workers)]:
+                future.result()
+        return self.collect()
+
+    def cleanup(self):
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+
+def fit_sharded(forest, X, y, shards=1):
+    """Fit `forest` in `shards` worker processes (plain fit when shards <= 1)."""
+    if shards <= 1:
+        return forest.fit(X, y)
+    trainer = ShardedForestTrainer(forest, shards=shards)
+    try:
+        return trainer.fit(X, y)
+    finally:
+        trainer.cleanup()
+
+
+if __name__ == "__main__":
+    # Usage: python sharded_forest.py worker DIR       - serve jobs from a shared work directory
+    #        python sharded_forest.py [movies|sales] [shards]  - compare sharded and single-process fits
+    if len(sys.argv) > 2 and sys.argv[1] == "worker":
+        print(f"Fitted {run_worker(sys.argv[2])} shard(s)")
+        sys.exit(0)
+
+    from predictor_data import PREDICTORS
+
+    name = sys.argv[1] if len(sys.argv) > 1 else "sales"
+    shards = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    X, y = PREDICTORS[name]['loader']()
+    X = X.astype(float)
+
+    start = time.perf_counter()
+    single = RandomForestRegressor(n_estimators=100, random_state=42).fit(X, y)
+    single_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    sharded = fit_sharded(RandomForestRegressor(n_estimators=100, random_state=42), X, y, shards=shards)
+    sharded_time = time.perf_counter() - start
+
+    same_trees = all(np.array_equal(a.tree_.threshold, b.tree_.threshold) and
+                     np.array_equal(a.tree_.value, b.tree_.value)
+                     for a, b in zip(single.estimators_, sharded.estimators_))
+    same_predictions = np.array_equal(single.predict(X), sharded.predict(X))
+    print(f"{name}: single process {single_time:.2f}s, {shards} shards {sharded_time:.2f}s")
+    print(f"Identical trees: {same_trees}, identical predictions: {same_predictions}")
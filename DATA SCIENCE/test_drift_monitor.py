@@ -0,0 +1,39 @@
+import os
+
+import pandas as pd
+
+from drift_monitor import DriftMonitor, live_paths, merge_files, start_session
+
+
+def reference_for(values):
+    return DriftMonitor.from_frame(pd.DataFrame({'x': values}), ['x'], [])
+
+
+def test_sessions_never_share_a_file(tmp_path):
+    reference = reference_for([1.0, 2.0, 3.0])
+    first = start_session("demo", reference, directory=str(tmp_path))
+    second = start_session("demo", reference, directory=str(tmp_path))
+    assert first.path != second.path
+    for monitor, value in ((first, 1.0), (second, 2.0)):
+        monitor.observe({'x': value})
+        monitor.close()
+
+    paths = live_paths("demo", reference.fingerprint(), str(tmp_path))
+    assert sorted(paths) == sorted([first.path, second.path])
+    assert merge_files(paths).observed == 2
+
+
+def test_new_reference_drops_live_files_from_the_old_one(tmp_path):
+    old = start_session("demo", reference_for([1.0, 2.0]), directory=str(tmp_path))
+    old.observe({'x': 5.0})
+    old.close()
+    other_app = start_session("other", reference_for([1.0]), directory=str(tmp_path))
+    other_app.observe({'x': 1.0})
+    other_app.close()
+
+    retrained = reference_for([10.0, 20.0])
+    start_session("demo", retrained, directory=str(tmp_path))
+    assert not os.path.exists(old.path)
+    assert os.path.exists(other_app.path)
+    assert live_paths("demo", retrained.fingerprint(), str(tmp_path)) == []
+    assert DriftMonitor.load(str(tmp_path / "demo-reference.json")).fingerprint() == retrained.fingerprint()
@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LogisticRegression
+from sklearn.preprocessing import StandardScaler
+
+from titanic_data import TitanicFeatureTransformer, load_passengers, score_manifest
+
+
+def test_score_manifest_numbers_rows_across_chunks_without_passenger_id(tmp_path):
+    rng = np.random.default_rng(0)
+    n = 25
+    manifest = pd.DataFrame({
+        'Pclass': rng.integers(1, 4, n),
+        'Sex': rng.choice(['male', 'female'], n),
+        'Age': rng.uniform(1, 80, n).round(1),
+        'SibSp': rng.integers(0, 3, n),
+        'Parch': rng.integers(0, 3, n),
+        'Fare': rng.uniform(5, 100, n).round(2),
+    })
+    in_path, out_path = tmp_path / "manifest.csv", tmp_path / "scores.csv"
+    manifest.to_csv(in_path, index=False)
+
+    train = load_passengers(str(in_path))
+    transformer = TitanicFeatureTransformer()
+    X = transformer.fit_transform(train)
+    scaler = StandardScaler()
+    X[['Age', 'Fare']] = scaler.fit_transform(X[['Age', 'Fare']])
+    model = LogisticRegression().fit(X, np.arange(n) % 2)
+
+    stats = score_manifest(model, scaler, transformer, str(in_path), str(out_path), chunksize=10)
+
+    scores = pd.read_csv(out_path)
+    assert stats['rows'] == n
+    assert scores['PassengerId'].tolist() == list(range(1, n + 1))
@@ -0,0 +1,38 @@
+import pandas as pd
+import pytest
+
+from validation import MOVIE_SCHEMA, SALES_SCHEMA, TITANIC_SCHEMA
+
+
+@pytest.mark.parametrize('schema, name, raw', [
+    (MOVIE_SCHEMA, 'Year', "2000"),
+    (MOVIE_SCHEMA, 'Year', "2000.0"),
+    (MOVIE_SCHEMA, 'Year', "2e3"),
+    (MOVIE_SCHEMA, 'Year', "2000.5"),
+    (MOVIE_SCHEMA, 'Year', "1e3"),
+    (MOVIE_SCHEMA, 'Year', "inf"),
+    (MOVIE_SCHEMA, 'Runtime', "abc"),
+    (SALES_SCHEMA, 'TV', "inf"),
+    (SALES_SCHEMA, 'TV', "-inf"),
+    (SALES_SCHEMA, 'TV', "nan"),
+    (SALES_SCHEMA, 'TV', "1e5"),
+    (TITANIC_SCHEMA, 'Pclass', "2.0"),
+    (TITANIC_SCHEMA, 'Pclass', "4"),
+])
+def test_form_and_batch_validators_agree(schema, name, raw):
+    field = schema.fields[name]
+    try:
+        field.check(raw)
+        form_ok = True
+    except ValueError:
+        form_ok = False
+    _, bad = field.check_column(pd.Series([raw], dtype=object))
+    assert form_ok == (not bad[0])
+
+
+def test_whole_valued_floats_become_ints():
+    assert MOVIE_SCHEMA.fields['Year'].check("2000.0") == 2000
+    with pytest.raises(ValueError, match="whole number"):
+        MOVIE_SCHEMA.fields['Year'].check("2000.5")
+    with pytest.raises(ValueError, match="must be a number"):
+        SALES_SCHEMA.fields['TV'].check("inf")
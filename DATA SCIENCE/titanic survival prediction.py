@@ -0,0 +1,226 @@
+import tkinter as tk
+from tkinter import ttk, messagebox, filedialog
+import pandas as pd
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import StandardScaler
+from sklearn.model_selection import train_test_split
+import os
+from instrumentation import timed, phase, start_metrics
+from titanic_data import load_passengers, TitanicFeatureTransformer, score_manifest
+from predictor_data import data_hash
+from validation import TITANIC_SCHEMA
+from model_registry import ModelRegistry, RegistryWatcher, register_trained, holdout_metrics
+from cascade import CascadeClassifier
+
+class TitanicSurvivalPredictor:
+    def __init__(self, root):
+        self.root = root
+        self.root.title("Titanic Survival Predictor")
+        self.root.geometry("500x600")
+        self.root.configure(bg="#e3f2fd")  # Light blue background
+
+        # Load and train model
+        self.model, self.scaler, self.transformer = self.train_model()
+
+        # Configure style
+        self.style = ttk.Style()
+        self.style.configure("TButton", font=("Arial", 12, "bold"), padding=10)
+        self.style.configure("TLabel", font=("Arial", 12), background="#e3f2fd")
+        self.style.configure("TEntry", font=("Arial", 12))
+        self.style.map("TButton", 
+                      background=[('active', '#0288d1')],  # Blue on click
+                      foreground=[('active', '#ffffff')])
+
+        # GUI Components
+        self.create_gui()
+
+        # Publish to the model registry and hot-swap whichever version is activated there
+        self.registry = ModelRegistry()
+        self.watcher = None
+        if self.model is not None:
+            artifacts = {'model': self.model, 'scaler': self.scaler, 'transformer': self.transformer}
+            version = register_trained(self.registry, "titanic", artifacts, **self.training_info)
+            self.watcher = RegistryWatcher(self.registry, "titanic", version)
+            self.model_var.set(f"Model v{version}")
+            self.root.after(2000, self.poll_registry)
+
+    @timed("titanic.train_model")
+    def train_model(self):
+        """Load dataset and train Random Forest model."""
+        try:
+            # Load dataset
+            if not os.path.exists("titanic.csv"):
+                messagebox.showerror("Error", "titanic.csv not found in the directory!")
+                return None, None, None
+            df = load_passengers("titanic.csv")
+
+            # Feature engineering: title, family size, fare band, imputation
+            transformer = TitanicFeatureTransformer()
+            X = transformer.fit_transform(df)
+            y = df['Survived'].astype(int)
+
+            # Split data
+            X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+
+            # Scale numerical features
+            scaler = StandardScaler()
+            X_train[['Age', 'Fare']] = scaler.fit_transform(X_train[['Age', 'Fare']])
+            X_test[['Age', 'Fare']] = scaler.transform(X_test[['Age', 'Fare']])
+
+            # Train Random Forest model (out-of-bag votes calibrate the cascade)
+            forest = RandomForestClassifier(n_estimators=100, random_state=42, oob_score=True)
+            forest.fit(X_train, y_train)
+
+            # Cheap first stage answers confident inputs (CASCADE=0 sends everything to the forest)
+            model = CascadeClassifier(forest).fit(X_train, y_train)
+            if os.environ.get("CASCADE", "1") == "0":
+                model.threshold = np.inf
+            cascade_report = model.evaluate(X_test, y_test)
+
+            # Held-out metrics and data hash recorded with the model in the registry; the model
+            # kind is part of the hash so a cascade is published even over a forest trained on the same data
+            metrics = dict(holdout_metrics('classification', y_test, model.predict(X_test)), **cascade_report)
+            kind = "cascade" if np.isfinite(model.threshold) else "forest"
+            self.training_info = {'metrics': metrics, 'data_hash': f"{data_hash(X, y)}:{kind}",
+                                  'params': forest.get_params()}
+
+            return model, scaler, transformer
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to load/train model: {str(e)}")
+            return None, None, None
+
+    def create_gui(self):
+        """Create the styled GUI components."""
+        if self.model is None or self.scaler is None:
+            return
+
+        main_frame = tk.Frame(self.root, bg="#e3f2fd", padx=20, pady=20)
+        main_frame.pack(expand=True, fill="both")
+
+        # Title
+        tk.Label(main_frame, text="Titanic Survival Predictor", font=("Arial", 18, "bold"), 
+                bg="#e3f2fd", fg="#01579b").pack(pady=10)
+
+        # Input fields
+        input_frame = tk.Frame(main_frame, bg="#e3f2fd")
+        input_frame.pack(fill="x", pady=10)
+
+        fields = [
+            ("Name (optional, e.g. Smith, Mrs. Anna)", "name_entry"),
+            ("Passenger Class (1, 2, 3)", "pclass_entry"),
+            ("Sex (male/female)", "sex_entry"),
+            ("Age", "age_entry"),
+            ("Siblings/Spouses Aboard", "sibsp_entry"),
+            ("Parents/Children Aboard", "parch_entry"),
+            ("Fare", "fare_entry")
+        ]
+        for label, attr in fields:
+            ttk.Label(input_frame, text=label).pack(anchor="w")
+            setattr(self, attr, ttk.Entry(input_frame, width=20))
+            getattr(self, attr).pack(pady=2)
+
+        # Predict button
+        ttk.Button(main_frame, text="Predict Survival", command=self.predict, 
+                  style="TButton").pack(pady=10)
+
+        # Batch scoring button
+        ttk.Button(main_frame, text="Score Manifest (CSV)", command=self.score_manifest, 
+                  style="TButton").pack(pady=5)
+
+        # Result display
+        self.result_var = tk.StringVar(value="Enter details and click Predict")
+        result_label = tk.Label(main_frame, textvariable=self.result_var, 
+                              font=("Arial", 12, "bold"), bg="#e3f2fd", fg="#d32f2f", wraplength=400)
+        result_label.pack(pady=10)
+
+        # Clear button
+        ttk.Button(main_frame, text="Clear", command=self.clear_entries, 
+                  style="TButton").pack(pady=5)
+
+        # Active registry version
+        self.model_var = tk.StringVar(value="")
+        tk.Label(main_frame, textvariable=self.model_var, font=("Arial", 10), 
+                bg="#e3f2fd", fg="#01579b").pack(pady=5)
+
+    @timed("titanic.poll_registry")
+    def poll_registry(self):
+        """Swap in the registry's active model once it has been loaded off the Tk thread."""
+        try:
+            loaded = self.watcher.poll()
+            if isinstance(loaded, Exception):
+                messagebox.showerror("Error", f"Failed to load model from registry: {str(loaded)}")
+            elif loaded is not None:
+                # Runs between Tk events, so never in the middle of a prediction
+                artifacts, meta = loaded
+                self.model, self.scaler = artifacts['model'], artifacts['scaler']
+                self.transformer = artifacts['transformer']
+                self.model_var.set(f"Model v{meta['version']}")
+        finally:
+            self.root.after(2000, self.poll_registry)
+
+    @timed("titanic.predict")
+    def predict(self):
+        """Predict survival based on user input."""
+        try:
+            values = TITANIC_SCHEMA.validate_one({
+                'Name': self.name_entry.get(),
+                'Pclass': self.pclass_entry.get(),
+                'Sex': self.sex_entry.get(),
+                'Age': self.age_entry.get(),
+                'SibSp': self.sibsp_entry.get(),
+                'Parch': self.parch_entry.get(),
+                'Fare': self.fare_entry.get()
+            })
+
+            # Prepare input data
+            passenger = pd.DataFrame([values])
+            input_data = self.transformer.transform(passenger)
+            input_data[['Age', 'Fare']] = self.scaler.transform(input_data[['Age', 'Fare']])
+
+            # Predict (the cascade only runs the forest when the fast stage is unsure)
+            probability = self.model.predict_proba(input_data)[0][1] * 100
+            result = "Survived" if probability >= 50 else "Not Survived"
+            self.result_var.set(f"Prediction: {result}\nSurvival Probability: {probability:.2f}%{self.route_note()}")
+        except ValueError as e:
+            messagebox.showerror("Input Error", str(e))
+        except Exception as e:
+            messagebox.showerror("Error", f"An error occurred: {str(e)}")
+
+    def route_note(self):
+        """Which cascade stage answered the last prediction, and how often the forest is needed."""
+        if not isinstance(self.model, CascadeClassifier):
+            return ""
+        stage = "Forest" if self.model.last_escalated.any() else "Fast model"
+        return f"\n{stage} answered ({self.model.escalation_rate:.0%} escalated so far)"
+
+    def score_manifest(self):
+        """Score every passenger in a CSV manifest and save the probabilities."""
+        try:
+            in_path = filedialog.askopenfilename(title="Passenger Manifest", filetypes=[("CSV files", "*.csv")])
+            if not in_path:
+                return
+            out_path = filedialog.asksaveasfilename(title="Save Scores As", defaultextension=".csv",
+                                                    filetypes=[("CSV files", "*.csv")])
+            if not out_path:
+                return
+            with phase("titanic.score_manifest"):  # Not the file dialogs
+                stats = score_manifest(self.model, self.scaler, self.transformer, in_path, out_path)
+            self.result_var.set(f"Scored {stats['rows']:,} passengers in {stats['seconds']:.2f}s\n"
+                                f"({stats['rows_per_second']:,.0f} passengers/s, {stats['rejected']:,} rejected)")
+        except ValueError as e:
+            messagebox.showerror("Input Error", str(e))
+        except Exception as e:
+            messagebox.showerror("Error", f"An error occurred: {str(e)}")
+
+    def clear_entries(self):
+        """Clear all input fields."""
+        for attr in ['name_entry', 'pclass_entry', 'sex_entry', 'age_entry', 'sibsp_entry', 'parch_entry', 'fare_entry']:
+            getattr(self, attr).delete(0, tk.END)
+        self.result_var.set("Enter details and click Predict")
+
+if __name__ == "__main__":
+    start_metrics("titanic")
+    root = tk.Tk()
+    app = TitanicSurvivalPredictor(root)
+    root.mainloop()
\ No newline at end of file
@@ -0,0 +1,166 @@
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from validation import TITANIC_SCHEMA
+
+# Column types for the standard Kaggle passenger manifest
+PASSENGER_DTYPES = {
+    'PassengerId': 'Int64',
+    'Survived': 'Int8',
+    'Pclass': 'Int8',
+    'Name': 'string',
+    'Sex': 'string',
+    'Age': 'float64',
+    'SibSp': 'Int16',
+    'Parch': 'Int16',
+    'Ticket': 'string',
+    'Fare': 'float64',
+    'Cabin': 'string',
+    'Embarked': 'string',
+}
+REQUIRED_COLUMNS = ['Pclass', 'Sex', 'Age', 'SibSp', 'Parch', 'Fare']
+TITLES = ['Mr', 'Mrs', 'Miss', 'Master', 'Rare']
+TITLE_ALIASES = {'Mlle': 'Miss', 'Ms': 'Miss', 'Mme': 'Mrs', 'Lady': 'Mrs', 'Sir': 'Mr'}
+
+
+def load_passengers(file_path, chunksize=None, raw=False):
+    """Read a passenger CSV with typed columns (or an iterator of chunks).
+
+    With `raw` every column is read as text, so malformed values reach
+    validation as per-row errors instead of failing the whole read.
+    """
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(f"{file_path} not found!")
+    with open(file_path, 'r') as file:
+        header = file.readline().strip().split(",")
+    missing = [col for col in REQUIRED_COLUMNS if col not in header]
+    if missing:
+        raise ValueError(f"{file_path} is not a passenger manifest (missing {', '.join(missing)})")
+    dtypes = str if raw else {col: dtype for col, dtype in PASSENGER_DTYPES.items() if col in header}
+    return pd.read_csv(file_path, dtype=dtypes, chunksize=chunksize)
+
+
+class TitanicFeatureTransformer:
+    """Fitted, vectorised feature engineering for passenger frames.
+
+    Adds the passenger title (from Name, or inferred from Sex/Age when no
+    name is given), family size, travelling-alone flag and a fare band.
+    Missing Age is filled with the training median for the title and
+    missing Fare with the training median; both are learnt in fit().
+    """
+
+    FEATURES = ['Pclass', 'Sex', 'Age', 'SibSp', 'Parch', 'Fare', 'FamilySize', 'IsAlone', 'FareBin'] + \
+        [f"Title_{title}" for title in TITLES]
+
+    def __init__(self, fare_bins=4):
+        self.fare_bins = fare_bins
+        self.age_by_title = None
+        self.age_median = None
+        self.fare_median = None
+        self.fare_edges = None
+
+    @staticmethod
+    def titles(df):
+        """Vectorised title extraction, e.g. 'Braund, Mr. Owen Harris' -> 'Mr'."""
+        sex = df['Sex'].astype('string').str.strip().str.lower()
+        age = pd.to_numeric(df['Age'], errors='coerce')
+        adult = age.isna() | (age >= 15)
+        inferred = pd.Series(np.where(sex == 'female', np.where(adult, 'Mrs', 'Miss'),
+                                      np.where(adult, 'Mr', 'Master')), index=df.index)
+        if 'Name' not in df:
+            return inferred
+        title = df['Name'].astype('string').str.extract(r',\s*([^\.]+)\.', expand=False).str.strip()
+        title = title.replace(TITLE_ALIASES)
+        title = title.where(title.isin(TITLES) | title.isna(), 'Rare')
+        return title.fillna(inferred).astype(str)
+
+    def fit(self, df):
+        titles = self.titles(df)
+        age = pd.to_numeric(df['Age'], errors='coerce')
+        fare = pd.to_numeric(df['Fare'], errors='coerce')
+        self.age_median = float(age.median())
+        self.age_by_title = age.groupby(titles).median().dropna().to_dict()
+        self.fare_median = float(fare.median())
+        edges = np.unique(np.nanquantile(fare, np.linspace(0, 1, self.fare_bins + 1)[1:-1]))
+        self.fare_edges = edges.tolist()
+        return self
+
+    def transform(self, df):
+        if self.fare_edges is None:
+            raise ValueError("TitanicFeatureTransformer must be fitted before transform")
+        titles = self.titles(df)
+        out = pd.DataFrame(index=df.index)
+        out['Pclass'] = pd.to_numeric(df['Pclass'], errors='coerce').astype(float)
+        out['Sex'] = (df['Sex'].astype('string').str.strip().str.lower() == 'female').astype(float)
+
+        age = pd.to_numeric(df['Age'], errors='coerce')
+        out['Age'] = age.fillna(titles.map(self.age_by_title)).fillna(self.age_median)
+        out['SibSp'] = pd.to_numeric(df['SibSp'], errors='coerce').fillna(0).astype(float)
+        out['Parch'] = pd.to_numeric(df['Parch'], errors='coerce').fillna(0).astype(float)
+        out['Fare'] = pd.to_numeric(df['Fare'], errors='coerce').fillna(self.fare_median)
+
+        out['FamilySize'] = out['SibSp'] + out['Parch'] + 1
+        out['IsAlone'] = (out['FamilySize'] == 1).astype(float)
+        out['FareBin'] = np.searchsorted(self.fare_edges, out['Fare'].to_numpy(), side='right').astype(float)
+        for title in TITLES:
+            out[f"Title_{title}"] = (titles == title).astype(float).to_numpy()
+        return out[self.FEATURES]
+
+    def fit_transform(self, df):
+        return self.fit(df).transform(df)
+
+
+def score_manifest(model, scaler, transformer, in_path, out_path, chunksize=100000, scale_columns=('Age', 'Fare')):
+    """Score a whole passenger manifest in chunks and write survival probabilities.
+
+    Each chunk is validated in one vectorised pass; rows that fail are
+    written unscored with the failing fields in an Errors column. Missing
+    Age and Fare are allowed since the transformer imputes them. Returns
+    throughput statistics: rows, rejected, seconds and rows per second.
+    """
+    start = time.perf_counter()
+    rows = rejected = 0
+    scale_columns = list(scale_columns)
+    with open(out_path, 'w', newline='') as out:
+        for i, chunk in enumerate(load_passengers(in_path, chunksize=chunksize, raw=True)):
+            check = TITANIC_SCHEMA.validate_frame(chunk, allow_missing=('Age', 'Fare'))
+            probability = np.full(len(chunk), np.nan)
+            if check.valid.any():
+                X = transformer.transform(chunk[check.valid])
+                X[scale_columns] = scaler.transform(X[scale_columns])
+                probability[check.valid] = model.predict_proba(X)[:, 1]
+            result = pd.DataFrame({
+                'PassengerId': chunk['PassengerId'] if 'PassengerId' in chunk else chunk.index + 1,  # Chunk indexes already continue across chunks
+                'SurvivalProbability': probability.round(4),
+                'Survived': pd.Series(probability >= 0.5, index=chunk.index, dtype='Int8').mask(~check.valid),
+                'Errors': check.error_column(),
+            })
+            result.to_csv(out, header=(i == 0), index=False)
+            rows += len(chunk)
+            rejected += check.n_invalid
+    seconds = time.perf_counter() - start
+    return {'rows': rows, 'rejected': rejected, 'seconds': seconds,
+            'rows_per_second': rows / seconds if seconds else 0.0}
+
+
+if __name__ == "__main__":
+    # Usage: python titanic_data.py train.csv manifest.csv scores.csv
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.preprocessing import StandardScaler
+
+    train_path, manifest_path, scores_path = sys.argv[1:4]
+    train = load_passengers(train_path)
+    transformer = TitanicFeatureTransformer()
+    X = transformer.fit_transform(train)
+    scaler = StandardScaler()
+    X[['Age', 'Fare']] = scaler.fit_transform(X[['Age', 'Fare']])
+    model = RandomForestClassifier(n_estimators=100, random_state=42, n_jobs=-1)
+    model.fit(X, train['Survived'].astype(int))
+
+    stats = score_manifest(model, scaler, transformer, manifest_path, scores_path)
+    print(f"Scored {stats['rows']:,} passengers ({stats['rejected']:,} rejected) in {stats['seconds']:.2f}s "
+          f"({stats['rows_per_second']:,.0f} rows/s) -> {scores_path}")
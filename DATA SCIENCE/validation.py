@@ -0,0 +1,217 @@
+import math
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from predictor_data import IRIS_FEATURES
+
+
+class Field:
+    """Declarative rule for one input column.
+
+    `kind` is float, int or str. Numbers must be finite, and int fields
+    take any whole-valued number ("2000.0", "1e3"), in check() and
+    check_column() alike. Numeric fields may have `low`/`high`
+    bounds (`low_exclusive` for strictly positive values); any field may
+    list allowed `choices`, compared case-insensitively when `lowercase`
+    is set. `message` overrides the error text for a failed bound or
+    choice.
+    """
+
+    def __init__(self, name, label=None, kind=float, low=None, high=None, low_exclusive=False,
+                 choices=None, lowercase=False, required=True, message=None):
+        self.name = name
+        self.label = label or name
+        self.kind = kind
+        self.low = low
+        self.high = high
+        self.low_exclusive = low_exclusive
+        self.choices = list(choices) if choices is not None else None
+        self.lowercase = lowercase
+        self.required = required
+        self.message = message or self._default_message()
+
+    def _default_message(self):
+        if self.choices is not None:
+            return f"{self.label} must be one of {', '.join(map(str, self.choices))}"
+        if self.low is not None and self.high is not None:
+            return f"{self.label} must be between {self.low} and {self.high}"
+        if self.low == 0:
+            return f"{self.label} must be positive" if self.low_exclusive else f"{self.label} cannot be negative"
+        if self.low is not None:
+            return f"{self.label} must be at least {self.low}"
+        if self.high is not None:
+            return f"{self.label} must be at most {self.high}"
+        return f"{self.label} is invalid"
+
+    @property
+    def type_message(self):
+        return f"{self.label} must be a whole number" if self.kind is int else f"{self.label} must be a number"
+
+    def check(self, raw):
+        """Convert and validate one form value; raises ValueError with a readable message."""
+        if raw is None or (isinstance(raw, str) and not raw.strip()):
+            if self.required:
+                raise ValueError(f"{self.label} is required")
+            return None
+        if self.kind is str:
+            value = str(raw).strip()
+            if self.lowercase:
+                value = value.lower()
+        else:
+            try:
+                value = float(raw.strip() if isinstance(raw, str) else raw)
+            except (TypeError, ValueError):
+                raise ValueError(self.type_message)
+            if not math.isfinite(value) or (self.kind is int and value != math.floor(value)):
+                raise ValueError(self.type_message)
+            if self.kind is int:
+                value = int(value)
+        if self.choices is not None and value not in self.choices:
+            raise ValueError(self.message)
+        if self.kind is not str and not self._in_bounds(value):
+            raise ValueError(self.message)
+        return value
+
+    def _in_bounds(self, value):
+        """Bounds test that works on scalars and arrays alike; inf and NaN are never in bounds."""
+        ok = np.isfinite(value)
+        if self.low is not None:
+            ok = ok & ((value > self.low) if self.low_exclusive else (value >= self.low))
+        if self.high is not None:
+            ok = ok & (value <= self.high)
+        return ok
+
+    def check_column(self, column, allow_missing=False):
+        """Vectorised check of a whole column; returns (converted values, error mask)."""
+        if self.kind is str:
+            values = column.astype('string').str.strip()
+            missing = values.isna() | (values == "")
+            if self.lowercase:
+                values = values.str.lower()
+            bad = pd.Series(False, index=column.index)
+        else:
+            values = pd.to_numeric(column, errors='coerce')
+            missing = column.isna()
+            if not pd.api.types.is_numeric_dtype(column):
+                missing |= column.astype('string').str.strip() == ""
+            # Present but unparseable, or fractional where a whole number is required
+            bad = values.isna() & ~missing
+            if self.kind is int:
+                bad |= values.notna() & (values != np.floor(values))
+            numbers = values.to_numpy(dtype=float)
+            bad |= values.notna() & ~self._in_bounds(numbers)
+        if self.choices is not None:
+            bad |= ~missing & ~values.isin(self.choices)
+        if self.required and not allow_missing:
+            bad |= missing
+        return values, bad.fillna(True).to_numpy(dtype=bool)
+
+
+class ValidationResult:
+    """Outcome of validating a batch: converted values plus per-row, per-field error masks."""
+
+    def __init__(self, schema, values, errors):
+        self.schema = schema
+        self.values = values
+        self.errors = errors
+        self.valid = ~errors.to_numpy().any(axis=1) if len(errors.columns) else np.ones(len(values), dtype=bool)
+
+    @property
+    def n_invalid(self):
+        return int((~self.valid).sum())
+
+    def summary(self):
+        """Number of failing rows per field."""
+        return {name: int(count) for name, count in self.errors.sum().items() if count}
+
+    def messages(self, i):
+        """Error messages for the row at position `i`."""
+        row = self.errors.iloc[i]
+        return [self.schema.fields[name].message for name in row.index[row.to_numpy()]]
+
+    def error_column(self, separator="; "):
+        """One string per row naming the failing fields ('' for valid rows)."""
+        names = np.asarray(self.errors.columns, dtype=object)
+        return [separator.join(names[mask]) for mask in self.errors.to_numpy()]
+
+
+class Schema:
+    """Ordered set of Fields validating either one form or a whole DataFrame.
+
+    validate_one() mirrors the forms: it converts raw entry strings and
+    raises ValueError for the first failing field. validate_frame() runs
+    every rule as a column operation, so a million-row batch is checked
+    in one pass and comes back as a ValidationResult.
+    """
+
+    def __init__(self, fields):
+        self.fields = {field.name: field for field in fields}
+
+    def validate_one(self, raw):
+        """Convert and validate {field: raw value}; returns {field: value}."""
+        return {name: field.check(raw.get(name)) for name, field in self.fields.items()}
+
+    def validate_frame(self, df, allow_missing=()):
+        """Validate every row of `df`; fields in `allow_missing` may be blank (imputed later)."""
+        values = pd.DataFrame(index=df.index)
+        errors = pd.DataFrame(index=df.index)
+        for name, field in self.fields.items():
+            if name not in df:
+                if field.required and name not in allow_missing:
+                    errors[name] = True
+                continue
+            values[name], errors[name] = field.check_column(df[name], allow_missing=name in allow_missing)
+        return ValidationResult(self, values, errors)
+
+
+IRIS_SCHEMA = Schema([
+    Field(IRIS_FEATURES[0], "Sepal Length", low=0, low_exclusive=True),
+    Field(IRIS_FEATURES[1], "Sepal Width", low=0, low_exclusive=True),
+    Field(IRIS_FEATURES[2], "Petal Length", low=0, low_exclusive=True),
+    Field(IRIS_FEATURES[3], "Petal Width", low=0, low_exclusive=True),
+])
+
+MOVIE_SCHEMA = Schema([
+    Field('Genre', kind=str),
+    Field('Director', kind=str),
+    Field('Actor1', "Actor 1", kind=str),
+    Field('Actor2', "Actor 2", kind=str),
+    Field('Year', kind=int, low=1888, high=2025),
+    Field('Runtime', kind=int, low=1, message="Runtime must be positive"),
+])
+
+SALES_SCHEMA = Schema([
+    Field('TV', "TV Ad Spend", low=0, message="TV Ad Spend must be non-negative"),
+    Field('Radio', "Radio Ad Spend", low=0, message="Radio Ad Spend must be non-negative"),
+    Field('Newspaper', "Newspaper Ad Spend", low=0, message="Newspaper Ad Spend must be non-negative"),
+    Field('AgeGroup', "Age Group", kind=str),
+    Field('Platform', kind=str),
+])
+
+TITANIC_SCHEMA = Schema([
+    Field('Name', kind=str, required=False),
+    Field('Pclass', "Passenger Class", kind=int, choices=[1, 2, 3], message="Passenger Class must be 1, 2, or 3"),
+    Field('Sex', kind=str, lowercase=True, choices=['male', 'female'],
+          message="Sex must be 'male' or 'female'"),
+    Field('Age', kind=float, low=0, high=120),
+    Field('SibSp', "Siblings/Spouses", kind=int, low=0),
+    Field('Parch', "Parents/Children", kind=int, low=0),
+    Field('Fare', low=0),
+])
+
+SCHEMAS = {'iris': IRIS_SCHEMA, 'movies': MOVIE_SCHEMA, 'sales': SALES_SCHEMA, 'titanic': TITANIC_SCHEMA}
+
+
+if __name__ == "__main__":
+    # Usage: python validation.py NAME file.csv  - validate a whole CSV in one vectorised pass
+    name, file_path = sys.argv[1], sys.argv[2]
+    df = pd.read_csv(file_path, dtype=str, keep_default_na=False)
+    start = time.perf_counter()
+    result = SCHEMAS[name].validate_frame(df)
+    elapsed = time.perf_counter() - start
+    print(f"{len(df):,} rows validated in {elapsed:.3f}s: {result.n_invalid:,} invalid")
+    for field, count in result.summary().items():
+        print(f"  {field:<20} {count:,}")
@@ -1,6 +1,7 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 import random
+from instrumentation import timed, count, start_metrics
 
 class RockPaperScissors:
     def __init__(self, root):
@@ -58,10 +59,12 @@ class RockPaperScissors:
         ttk.Button(button_frame, text="Play Again", command=self.reset_round).pack(side="left", padx=5)
         ttk.Button(button_frame, text="Quit", command=self.quit_game).pack(side="left", padx=5)
 
+    @timed("rps.play")
     def play(self, user_choice):
         """Handle game logic and update display."""
         choices = ["rock", "paper", "scissors"]
         computer_choice = random.choice(choices)
+        count(f"rps.choice.{user_choice}")
 
         # Determine winner
         if user_choice == computer_choice:
@@ -90,6 +93,7 @@ class RockPaperScissors:
             self.root.destroy()
 
 if __name__ == "__main__":
+    start_metrics("rps")
     root = tk.Tk()
     app = RockPaperScissors(root)
     root.mainloop()
\ No newline at end of file
@@ -1,5 +1,10 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
+import os
+import queue
+import threading
+from instrumentation import timed, phase, start_metrics
+from column_stats import numeric_columns, summarize_column, format_summary
 
 class CalculatorApp:
     def __init__(self, root):
@@ -71,6 +76,11 @@ class CalculatorApp:
         ttk.Button(main_frame, text="Clear", command=self.clear, 
                   style="TButton").pack(pady=5)
 
+        # Statistics mode
+        ttk.Button(main_frame, text="Column Statistics", command=self.open_statistics,
+                  style="TButton").pack(pady=5)
+
+    @timed("calc.calculate")
     def calculate(self):
         """Perform the selected arithmetic operation."""
         try:
@@ -99,6 +109,83 @@ class CalculatorApp:
         except Exception as e:
             messagebox.showerror("Error", f"An error occurred: {str(e)}")
 
+    def open_statistics(self):
+        """Window for one-pass statistics over a column of a CSV file."""
+        window = tk.Toplevel(self.root)
+        window.title("Column Statistics")
+        window.geometry("420x480")
+        window.configure(bg="#e3f2fd")
+        path_var = tk.StringVar()
+        column_var = tk.StringVar()
+        status_var = tk.StringVar()
+
+        def choose_file():
+            path = filedialog.askopenfilename(title="Open CSV", filetypes=[("CSV files", "*.csv")], parent=window)
+            if not path:
+                return
+            try:
+                columns = numeric_columns(path)
+                if not columns:
+                    raise ValueError("No numeric columns found")
+                path_var.set(path)
+                column_box['values'] = columns
+                column_var.set(columns[-1])
+            except ValueError as e:
+                messagebox.showerror("Input Error", str(e), parent=window)
+            except Exception as e:
+                messagebox.showerror("Error", f"An error occurred: {str(e)}", parent=window)
+
+        def compute():
+            if not path_var.get() or not column_var.get():
+                messagebox.showwarning("Input Error", "Please choose a file and a column!", parent=window)
+                return
+            self.run_statistics(path_var.get(), column_var.get(), result_text, status_var, window)
+
+        ttk.Button(window, text="Choose CSV...", command=choose_file).pack(pady=10)
+        tk.Label(window, textvariable=path_var, bg="#e3f2fd", fg="#01579b", wraplength=380).pack()
+        column_box = ttk.Combobox(window, textvariable=column_var, state="readonly", width=30)
+        column_box.pack(pady=5)
+        ttk.Button(window, text="Compute", command=compute).pack(pady=5)
+        tk.Label(window, textvariable=status_var, bg="#e3f2fd").pack()
+        result_text = tk.Text(window, height=14, width=40, font=("Courier", 11))
+        result_text.pack(pady=10)
+
+    def run_statistics(self, path, column, result_text, status_var, window):
+        """Stream the column in a worker thread (and worker processes for big files), then show the summary."""
+        updates = queue.Queue()
+        workers = os.cpu_count() if os.path.getsize(path) > 256 * 1024 * 1024 else None
+
+        def run():
+            try:
+                with phase("calc.statistics"):  # Timed here, not around the call that only starts this thread
+                    stats = summarize_column(path, column, workers=workers,
+                                             progress=lambda rows: updates.put(('progress', f"{rows:,} rows read...")))
+                updates.put(('done', stats))
+            except Exception as e:
+                updates.put(('done', e))
+        threading.Thread(target=run, daemon=True).start()
+        status_var.set("Reading...")
+
+        def poll():
+            try:
+                while True:
+                    kind, value = updates.get_nowait()
+                    if kind == 'progress':
+                        status_var.set(value)
+                        continue
+                    status_var.set("")
+                    if isinstance(value, ValueError):
+                        messagebox.showerror("Input Error", str(value), parent=window)
+                    elif isinstance(value, Exception):
+                        messagebox.showerror("Error", f"An error occurred: {str(value)}", parent=window)
+                    else:
+                        result_text.delete("1.0", tk.END)
+                        result_text.insert(tk.END, f"{column}\n{format_summary(value.summary())}")
+                    return
+            except queue.Empty:
+                window.after(200, poll)
+        poll()
+
     def clear(self):
         """Clear input fields and result."""
         self.num1_entry.delete(0, tk.END)
@@ -107,6 +194,7 @@ class CalculatorApp:
         self.result_var.set("Result: ")
 
 if __name__ == "__main__":
+    start_metrics("calc")
     root = tk.Tk()
     app = CalculatorApp(root)
     root.mainloop()
\ No newline at end of file
@@ -0,0 +1,290 @@
+import csv
+import io
+import math
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+CHUNK_ROWS = 50_000
+QUANTILES = (0.01, 0.25, 0.5, 0.75, 0.99)
+
+
+class QuantileSketch:
+    """KLL quantile sketch: approximate quantiles of a stream in O(k log(n/k)) memory.
+
+    Items live in levels; an item at level h stands for 2**h inputs. A
+    level over its capacity is sorted and every other item (from a random
+    start) is promoted, which keeps rank error around 1/k with high
+    probability. Two sketches merge by pooling their levels, so chunks and
+    worker processes can be summarised separately.
+    """
+
+    def __init__(self, k=400, seed=0):
+        self.k = k
+        self.levels = [[]]
+        self.count = 0
+        self.rng = random.Random(seed)
+
+    def _capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return max(2, math.ceil(self.k * (2 / 3) ** depth))
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append([])
+                items.sort()
+                keep = items[-1:] if len(items) % 2 else []  # An odd item out waits at this level
+                paired = items[:len(items) - len(keep)]
+                self.levels[level + 1].extend(paired[self.rng.randrange(2)::2])
+                self.levels[level] = keep
+            level += 1
+
+    def update(self, values):
+        self.levels[0].extend(values)
+        self.count += len(values)
+        self._compress()
+
+    def merge(self, other):
+        while len(self.levels) < len(other.levels):
+            self.levels.append([])
+        for level, items in enumerate(other.levels):
+            self.levels[level].extend(items)
+        self.count += other.count
+        self._compress()
+        return self
+
+    def quantiles(self, qs):
+        weighted = sorted((value, 1 << level) for level, items in enumerate(self.levels) for value in items)
+        if not weighted:
+            return [math.nan for _ in qs]
+        total = sum(weight for _, weight in weighted)
+        results, cumulative, i = [None] * len(qs), 0, 0
+        for j in sorted(range(len(qs)), key=lambda j: qs[j]):  # One walk over the items for all quantiles
+            target = qs[j] * total
+            while i < len(weighted) - 1 and cumulative + weighted[i][1] < target:
+                cumulative += weighted[i][1]
+                i += 1
+            results[j] = weighted[i][0]
+        return results
+
+
+class ColumnStats:
+    """One-pass, mergeable summary of a numeric column.
+
+    Each chunk's mean and sum of squared deviations are computed exactly
+    (math.fsum) and folded into the running totals with the parallel form
+    of Welford's update (Chan et al.), which stays accurate for large
+    offsets where sum(x**2) - n*mean**2 would cancel. merge() uses the
+    same update, so per-chunk and per-process results combine exactly.
+    """
+
+    def __init__(self, k=400):
+        self.count = 0
+        self.missing = 0
+        self.total = 0.0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.minimum = math.inf
+        self.maximum = -math.inf
+        self.sketch = QuantileSketch(k)
+
+    def _combine(self, count, total, mean, m2, minimum, maximum):
+        combined = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / combined
+        self.m2 += m2 + delta * delta * self.count * count / combined
+        self.count = combined
+        self.total = math.fsum((self.total, total))
+        self.minimum = min(self.minimum, minimum)
+        self.maximum = max(self.maximum, maximum)
+
+    def update(self, values, missing=0):
+        """Fold in a chunk of floats (and the number of empty/non-numeric cells skipped)."""
+        self.missing += missing
+        if not values:
+            return
+        total = math.fsum(values)
+        mean = total / len(values)
+        m2 = math.fsum((x - mean) ** 2 for x in values)
+        self._combine(len(values), total, mean, m2, min(values), max(values))
+        self.sketch.update(values)
+
+    def merge(self, other):
+        self.missing += other.missing
+        if other.count:
+            self._combine(other.count, other.total, other.mean, other.m2, other.minimum, other.maximum)
+            self.sketch.merge(other.sketch)
+        return self
+
+    @property
+    def variance(self):
+        """Sample variance (n - 1 denominator)."""
+        return self.m2 / (self.count - 1) if self.count > 1 else math.nan
+
+    def summary(self, quantiles=QUANTILES):
+        result = {'count': self.count, 'missing': self.missing, 'sum': self.total,
+                  'mean': self.mean if self.count else math.nan, 'variance': self.variance,
+                  'std': math.sqrt(self.variance) if self.count > 1 else math.nan,
+                  'min': self.minimum if self.count else math.nan, 'max': self.maximum if self.count else math.nan}
+        for q, value in zip(quantiles, self.sketch.quantiles(quantiles)):
+            result[f"p{q * 100:g}"] = value
+        return result
+
+
+# CSV streaming -----------------------------------------------------------
+
+def read_header(path):
+    with open(path, 'r', newline='', encoding='utf-8-sig') as file:
+        return next(csv.reader(file), [])
+
+
+def numeric_columns(path, sample_rows=100):
+    """Header names whose sampled values are mostly numbers (for the column chooser)."""
+    with open(path, 'r', newline='', encoding='utf-8-sig') as file:
+        reader = csv.reader(file)
+        header = next(reader, [])
+        numeric = [0] * len(header)
+        filled = [0] * len(header)
+        for row in (row for _, row in zip(range(sample_rows), reader)):
+            for i, cell in enumerate(row[:len(header)]):
+                if cell.strip():
+                    filled[i] += 1
+                    try:
+                        float(cell)
+                        numeric[i] += 1
+                    except ValueError:
+                        pass
+    return [name for name, hits, seen in zip(header, numeric, filled) if seen and hits * 2 >= seen]
+
+
+def _byte_lines(path, start, end):
+    """Decoded lines whose first byte lies in [start, end): each range owns the lines starting in it."""
+    with open(path, 'rb') as file:
+        position = start
+        if start:
+            file.seek(start - 1)
+            position = start - 1 + len(file.readline())  # Finish the line that straddles the boundary
+        while end is None or position < end:
+            line = file.readline()
+            if not line:
+                return
+            position += len(line)
+            yield line.decode('utf-8')
+
+
+def iter_column(path, column, start=0, end=None, chunk_rows=CHUNK_ROWS):
+    """Yield (floats, missing count) per chunk of rows of one column of a byte range.
+
+    Splitting by byte range assumes no quoted newlines, which holds for the
+    numeric exports this is meant for.
+    """
+    header = read_header(path)
+    if column not in header:
+        raise ValueError(f"Column {column!r} not found in {os.path.basename(path)}")
+    index = header.index(column)
+    lines = _byte_lines(path, start, end)
+    if not start:
+        next(lines, None)  # Header
+    values, missing = [], 0
+    for row in csv.reader(lines):
+        try:
+            value = float(row[index])
+        except (ValueError, IndexError):
+            missing += 1
+        else:
+            if math.isfinite(value):
+                values.append(value)
+            else:
+                missing += 1
+        if len(values) + missing >= chunk_rows:
+            yield values, missing
+            values, missing = [], 0
+    if values or missing:
+        yield values, missing
+
+
+def summarize_range(path, column, start=0, end=None, chunk_rows=CHUNK_ROWS, k=400):
+    stats = ColumnStats(k)
+    for values, missing in iter_column(path, column, start, end, chunk_rows):
+        stats.update(values, missing)
+    return stats
+
+
+def summarize_column(path, column, workers=None, chunk_rows=CHUNK_ROWS, k=400, progress=None):
+    """ColumnStats of a CSV column, streaming in chunks; with workers > 1 each process takes a byte range."""
+    size = os.path.getsize(path)
+    if not workers or workers <= 1 or size < 8 * 1024 * 1024:
+        stats = ColumnStats(k)
+        for values, missing in iter_column(path, column, chunk_rows=chunk_rows):
+            stats.update(values, missing)
+            if progress:
+                progress(stats.count + stats.missing)
+        return stats
+    bounds = [size * i // workers for i in range(workers + 1)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        parts = [pool.submit(summarize_range, path, column, bounds[i], bounds[i + 1], chunk_rows, k)
+                 for i in range(workers)]
+        stats = ColumnStats(k)
+        for part in parts:
+            stats.merge(part.result())
+    return stats
+
+
+def format_summary(summary):
+    lines = []
+    for key, value in summary.items():
+        if isinstance(value, int):
+            lines.append(f"{key:>9}: {value:,}")
+        else:
+            lines.append(f"{key:>9}: {value:,.6g}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    # Usage: python column_stats.py FILE.csv COLUMN [workers]   - summarise one column
+    #        python column_stats.py bench ROWS [workers]        - synthetic file vs exact statistics
+    if sys.argv[1] == "bench":
+        import resource
+        import statistics
+        import tempfile
+
+        rows = int(sys.argv[2])
+        workers = int(sys.argv[3]) if len(sys.argv) > 3 else None
+        rng = random.Random(1)
+        path = os.path.join(tempfile.mkdtemp(), "bench.csv")
+        with open(path, 'w', newline='') as file:
+            out = io.StringIO()
+            writer = csv.writer(out)
+            writer.writerow(["id", "value"])
+            for i in range(rows):
+                writer.writerow([i, f"{1e9 + rng.gauss(0, 1):.6f}" if i % 1000 else ""])  # Large offset, some gaps
+                if i % 100_000 == 99_999:
+                    file.write(out.getvalue())
+                    out.seek(0)
+                    out.truncate()
+            file.write(out.getvalue())
+        start = time.perf_counter()
+        stats = summarize_column(path, "value", workers=workers)
+        elapsed = time.perf_counter() - start
+        peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        print(format_summary(stats.summary()))
+        print(f"{os.path.getsize(path) / 1e6:,.0f} MB in {elapsed:.1f}s ({rows / elapsed:,.0f} rows/s), "
+              f"peak RSS {peak_mb:.0f} MB")
+        if rows <= 1_000_000:
+            exact = []
+            for values, _ in iter_column(path, "value"):
+                exact += values
+            exact.sort()
+            print(f"exact variance {statistics.variance(exact):.6g}, "
+                  f"median {exact[len(exact) // 2]:.6f} (sketch {stats.sketch.quantiles([0.5])[0]:.6f})")
+        os.remove(path)
+    else:
+        workers = int(sys.argv[3]) if len(sys.argv) > 3 else None
+        stats = summarize_column(sys.argv[1], sys.argv[2], workers=workers)
+        print(format_summary(stats.summary()))
@@ -0,0 +1,243 @@
+import json
+import random
+import re
+import sys
+import time
+import unicodedata
+from collections import defaultdict
+from difflib import SequenceMatcher
+from functools import lru_cache
+
+# Validation rules shared with ContactBook
+PHONE_RE = re.compile(r'^\+?\d{10,15}$')
+EMAIL_RE = re.compile(r'^[\w\.-]+@[\w\.-]+\.\w+$')
+
+_PHONE_PUNCTUATION = re.compile(r'[\s\-\.\(\)]')
+_SOUNDEX = str.maketrans("BFPVCGJKQSXZDTLMNR", "111122222222334556")
+
+
+def normalize_phone(phone):
+    """Digits of a valid phone number ('+' kept), or None if it breaks the rules."""
+    phone = _PHONE_PUNCTUATION.sub("", phone or "")
+    return phone if PHONE_RE.match(phone) else None
+
+
+def normalize_email(email):
+    """Lower-cased address, or None if it is not a valid email."""
+    email = (email or "").strip().lower()
+    return email if EMAIL_RE.match(email) else None
+
+
+def normalize_text(text):
+    """Accent-free, case-folded letters, digits and single spaces."""
+    text = text or ""
+    if not text.isascii():
+        text = unicodedata.normalize('NFKD', text)
+        text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    text = text.casefold()
+    return " ".join(re.sub(r'[^\w\s]', " ", text).split())
+
+
+@lru_cache(maxsize=65536)
+def soundex(word):
+    """American Soundex code, e.g. 'Robert' and 'Rupert' -> 'R163'."""
+    word = "".join(ch for ch in word.upper() if "A" <= ch <= "Z")
+    if not word:
+        return ""
+    codes = word.translate(_SOUNDEX)
+    result, previous = word[0], codes[0]
+    for ch, code in zip(word[1:], codes[1:]):
+        if code.isdigit() and code != previous:
+            result += code
+        if ch not in "HW":  # H and W do not separate letters with the same code
+            previous = code
+    return (result + "000")[:4]
+
+
+class ContactDeduplicator:
+    """Find likely duplicate contacts without comparing every pair.
+
+    Each contact gets blocking keys - its phone's last 10 digits (so
+    '+91 98765-43210' meets '9876543210'), its normalised email and the
+    Soundex codes of its name tokens - and only contacts sharing a key
+    are compared. Blocks bigger than `max_block` (very common names) are
+    compared with a sorted-neighbourhood window instead of all pairs, so
+    the work stays near-linear in the number of contacts.
+    """
+
+    def __init__(self, threshold=0.8, max_block=50, window=10):
+        self.threshold = threshold
+        self.max_block = max_block
+        self.window = window
+
+    @staticmethod
+    def features(contact):
+        """Normalised fields used for blocking and scoring."""
+        phone = normalize_phone(contact.get('phone', ""))
+        return {
+            'name': normalize_text(contact.get('name', "")),
+            'phone': phone[-10:] if phone else None,
+            'email': normalize_email(contact.get('email', "")),
+            'address': normalize_text(contact.get('address', "")) or None,
+        }
+
+    @staticmethod
+    def blocking_keys(features):
+        keys = []
+        if features['phone']:
+            keys.append("p:" + features['phone'])
+        if features['email']:
+            keys.append("e:" + features['email'])
+        codes = sorted({soundex(token) for token in features['name'].split()} - {""})
+        if codes:
+            keys.append("n:" + "".join(codes))
+        return keys
+
+    def candidate_pairs(self, features):
+        """Index pairs (i < j) that share at least one blocking key."""
+        blocks = defaultdict(list)
+        for i, feature in enumerate(features):
+            for key in self.blocking_keys(feature):
+                blocks[key].append(i)
+
+        pairs = set()
+        for members in blocks.values():
+            if len(members) < 2:
+                continue
+            if len(members) <= self.max_block:
+                pairs.update((a, b) for n, a in enumerate(members) for b in members[n + 1:])
+            else:
+                # Sorted neighbourhood: near-identical names end up adjacent
+                members = sorted(members, key=lambda i: features[i]['name'])
+                for n, a in enumerate(members):
+                    pairs.update((min(a, b), max(a, b)) for b in members[n + 1:n + 1 + self.window])
+        return pairs
+
+    def score(self, a, b):
+        """(score in [0, 1], reasons) for two contacts' features.
+
+        Name similarity contributes up to 0.4; a matching phone, email or
+        address up to 0.6 more, so a shared identifier alone is not enough
+        and similar names alone never are. The name comparison is skipped
+        when it could not lift the pair over the threshold.
+        """
+        reasons = [field for field in ('phone', 'email', 'address') if a[field] and a[field] == b[field]]
+        if len(reasons) > 1:
+            strong = 0.6 + 0.1 * (len(reasons) - 1)
+        else:
+            strong = 0.6 if {'phone', 'email'} & set(reasons) else 0.5 if reasons else 0.0
+        if strong + 0.4 < self.threshold or not (a['name'] and b['name']):
+            return strong, reasons
+        name_similarity = SequenceMatcher(None, a['name'], b['name']).ratio()
+        if name_similarity >= 0.85:
+            reasons.append('name')
+        return min(1.0, strong + 0.4 * name_similarity), reasons
+
+    def suggestions(self, contacts):
+        """Merge suggestions as dicts of ids, score and reasons, best first."""
+        features = [self.features(contact) for contact in contacts]
+        found = []
+        for i, j in self.candidate_pairs(features):
+            score, reasons = self.score(features[i], features[j])
+            if score >= self.threshold:
+                found.append({'ids': (contacts[i]['id'], contacts[j]['id']),
+                              'score': round(score, 3), 'reasons': reasons})
+        found.sort(key=lambda s: (-s['score'], s['ids']))
+        return found
+
+    @staticmethod
+    def clusters(suggestions):
+        """Group suggested pairs into sets of ids that describe one person (union-find)."""
+        parent = {}
+
+        def find(x):
+            parent.setdefault(x, x)
+            while parent[x] != x:
+                parent[x] = parent[parent[x]]
+                x = parent[x]
+            return x
+
+        for a, b in (s['ids'] for s in suggestions):
+            root_a, root_b = find(a), find(b)
+            if root_a != root_b:
+                parent[max(root_a, root_b)] = min(root_a, root_b)
+        groups = defaultdict(list)
+        for x in parent:
+            groups[find(x)].append(x)
+        return sorted(sorted(group) for group in groups.values())
+
+
+def merge_cluster(contacts):
+    """Merge contacts describing one person into the oldest (lowest id) one.
+
+    The survivor keeps its own values; empty fields are filled from the
+    others, and the longest name wins since it is usually the fullest.
+    """
+    contacts = sorted(contacts, key=lambda c: c['id'])
+    merged = dict(contacts[0])
+    for other in contacts[1:]:
+        for field, value in other.items():
+            if not merged.get(field) and value:
+                merged[field] = value
+    merged['name'] = max((c['name'] for c in contacts), key=len)
+    return merged
+
+
+def merge_duplicates(contacts, clusters):
+    """Return the contact list with each cluster merged into one contact."""
+    by_id = {contact['id']: contact for contact in contacts}
+    replaced = {}
+    for cluster in clusters:
+        members = [by_id[i] for i in cluster if i in by_id]
+        if len(members) > 1:
+            merged = merge_cluster(members)
+            for member in members:
+                replaced[member['id']] = merged if member['id'] == merged['id'] else None
+    result = []
+    for contact in contacts:
+        if contact['id'] not in replaced:
+            result.append(contact)
+        elif replaced[contact['id']] is not None:
+            result.append(replaced[contact['id']])
+    return result
+
+
+def synthetic_contacts(n, duplicate_rate=0.1, seed=0):
+    """Random contacts where some are re-entered with reformatted phones or misspelt names."""
+    rng = random.Random(seed)
+    first = ["John", "Jon", "Mary", "Maria", "Robert", "Rupert", "Anna", "Ana", "Priya", "Rahul", "Wei", "Fatima"]
+    last = ["Smith", "Smyth", "Kumar", "Sharma", "Garcia", "Chen", "Okafor", "Nguyen", "Muller", "Rossi"]
+    contacts = []
+    for i in range(n):
+        if contacts and rng.random() < duplicate_rate:
+            source = rng.choice(contacts)
+            phone = source['phone']
+            name = source['name'] if rng.random() < 0.5 else source['name'].lower()
+            contacts.append({'id': i + 1, 'name': name,
+                             'phone': f"+91 {phone[-10:-5]}-{phone[-5:]}" if rng.random() < 0.5 else phone,
+                             'email': source['email'].upper(), 'address': ""})
+            continue
+        name = f"{rng.choice(first)} {rng.choice(last)} {rng.choice(last)}"
+        phone = "".join(rng.choice("0123456789") for _ in range(10))
+        contacts.append({'id': i + 1, 'name': name, 'phone': phone,
+                         'email': f"{name.split()[0].lower()}{i}@example.com", 'address': f"{i} Main Street"})
+    return contacts
+
+
+if __name__ == "__main__":
+    # Usage: python contact_dedup.py [contacts.json | N]  - suggest merges (default: 100000 synthetic contacts)
+    source = sys.argv[1] if len(sys.argv) > 1 else "100000"
+    if source.isdigit():
+        contacts = synthetic_contacts(int(source))
+    else:
+        with open(source, 'r') as file:
+            contacts = json.load(file)
+    start = time.perf_counter()
+    deduplicator = ContactDeduplicator()
+    suggestions = deduplicator.suggestions(contacts)
+    clusters = deduplicator.clusters(suggestions)
+    elapsed = time.perf_counter() - start
+    print(f"{len(contacts):,} contacts: {len(suggestions):,} merge suggestions in "
+          f"{len(clusters):,} clusters ({elapsed:.1f}s)")
+    for suggestion in suggestions[:10]:
+        print(f"  {suggestion['ids']}  score={suggestion['score']:.2f}  {', '.join(suggestion['reasons'])}")
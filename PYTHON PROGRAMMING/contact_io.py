@@ -0,0 +1,362 @@
+import csv
+import json
+import os
+import re
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from contact_dedup import PHONE_RE, EMAIL_RE
+from record_store import RecordStore
+
+FIELDS = ['name', 'phone', 'email', 'address']
+# Header spellings accepted from other address books' CSV exports
+CSV_ALIASES = {
+    'name': 'name', 'full name': 'name', 'fn': 'name', 'display name': 'name',
+    'phone': 'phone', 'phone number': 'phone', 'mobile': 'phone', 'mobile phone': 'phone', 'tel': 'phone',
+    'email': 'email', 'e-mail': 'email', 'email address': 'email', 'e-mail address': 'email',
+    'address': 'address', 'home address': 'address',
+}
+
+_VCARD_ESCAPE = str.maketrans({'\\': '\\\\', ';': '\\;', ',': '\\,', '\n': '\\n'})
+_VCARD_UNESCAPE = re.compile(r'\\([\\;,nN])')
+_VCARD_COMPONENT = re.compile(r'(?<!\\);')
+
+
+# Readers ---------------------------------------------------------------
+
+def read_csv_contacts(path):
+    """Yield (line number, raw contact dict) from a CSV with a header row."""
+    with open(path, 'r', newline='', encoding='utf-8-sig') as file:
+        reader = csv.reader(file)
+        header = next(reader, None)
+        if header is None:
+            return
+        columns = [CSV_ALIASES.get(name.strip().lower()) for name in header]
+        if 'name' not in columns or 'phone' not in columns:
+            raise ValueError("CSV needs Name and Phone columns")
+        for row in reader:
+            if not any(row):
+                continue
+            contact = dict.fromkeys(FIELDS, "")
+            for field, value in zip(columns, row):
+                if field and not contact[field]:
+                    contact[field] = value
+            yield reader.line_num, contact
+
+
+def _unescape(value):
+    return _VCARD_UNESCAPE.sub(lambda m: "\n" if m.group(1) in "nN" else m.group(1), value)
+
+
+def _unfolded_lines(file):
+    """Physical lines joined back into logical vCard lines (RFC 6350 folding)."""
+    current, start = None, 0
+    for line_no, line in enumerate(file, 1):
+        line = line.rstrip("\r\n")
+        if line[:1] in (" ", "\t") and current is not None:
+            current += line[1:]
+            continue
+        if current is not None:
+            yield start, current
+        current, start = line, line_no
+    if current is not None:
+        yield start, current
+
+
+def read_vcards(path):
+    """Yield (line number of BEGIN, raw contact dict) for each card in a .vcf file."""
+    with open(path, 'r', encoding='utf-8-sig') as file:
+        contact = None
+        for line_no, line in _unfolded_lines(file):
+            key, _, value = line.partition(":")
+            prop = key.split(";")[0].split(".")[-1].upper()  # Drop parameters and "item1." groups
+            if prop == "BEGIN" and value.strip().upper() == "VCARD":
+                contact, start, n_name = dict.fromkeys(FIELDS, ""), line_no, ""
+            elif contact is None:
+                continue
+            elif prop == "END":
+                contact['name'] = contact['name'] or n_name
+                yield start, contact
+                contact = None
+            elif prop == "FN" and not contact['name']:
+                contact['name'] = _unescape(value).strip()
+            elif prop == "N":
+                family, given = (_VCARD_COMPONENT.split(value) + ["", ""])[:2]
+                n_name = " ".join(_unescape(part).strip() for part in (given, family) if part.strip())
+            elif prop == "TEL" and not contact['phone']:
+                contact['phone'] = _unescape(value).strip()
+            elif prop == "EMAIL" and not contact['email']:
+                contact['email'] = _unescape(value).strip()
+            elif prop == "ADR" and not contact['address']:
+                parts = [_unescape(part).strip() for part in _VCARD_COMPONENT.split(value)]
+                contact['address'] = ", ".join(part for part in parts if part)
+
+
+READERS = {'csv': read_csv_contacts, 'vcard': read_vcards}
+
+
+def detect_format(path):
+    return 'vcard' if os.path.splitext(path)[1].lower() in ('.vcf', '.vcard') else 'csv'
+
+
+# Validation ------------------------------------------------------------
+
+def validate_contact(contact):
+    """Normalised contact, or the reason it is rejected (same rules as the Add form)."""
+    contact = {field: (contact.get(field) or "").strip() for field in FIELDS}
+    if not contact['name'] or not contact['phone']:
+        return "Name and phone number are required"
+    if not PHONE_RE.match(contact['phone'].replace(" ", "")):
+        return "Invalid phone number"
+    if contact['email'] and not EMAIL_RE.match(contact['email']):
+        return "Invalid email format"
+    return contact
+
+
+def validate_chunk(rows):
+    """Split [(line, raw contact)] into (valid contacts, [(line, reason, raw contact)])."""
+    valid, rejected = [], []
+    for line_no, raw in rows:
+        result = validate_contact(raw)
+        if isinstance(result, str):
+            rejected.append((line_no, result, raw))
+        else:
+            valid.append(result)
+    return valid, rejected
+
+
+def _chunks(rows, size):
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _validated(chunks, workers=None):
+    """validate_chunk over chunks in order, with at most 2 chunks per worker in flight."""
+    if not workers or workers <= 1:
+        for chunk in chunks:
+            yield validate_chunk(chunk)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(validate_chunk, chunk))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+# contacts.json streaming -----------------------------------------------
+
+def iter_json_array(path, buffer_size=1 << 16):
+    """Yield the objects of a JSON array file one at a time, holding one buffer in memory."""
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8') as file:
+        buffer, pos = file.read(buffer_size).lstrip(), 0
+        if not buffer:
+            return
+        if buffer[0] != "[":
+            raise ValueError(f"{path} is not a JSON array")
+        pos = 1
+        while True:
+            while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                pos += 1
+            if pos == len(buffer):
+                more = file.read(buffer_size)
+                if not more:
+                    raise ValueError(f"{path} ends before its closing ]")
+                buffer, pos = more, 0
+                continue
+            if buffer[pos] == "]":
+                return
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                more = file.read(buffer_size)
+                if not more:
+                    raise
+                buffer, pos = buffer[pos:] + more, 0  # Object spans the buffer edge
+                continue
+            yield item
+            pos = end
+
+
+class ContactAppender:
+    """Append contacts to a JSON array file in committed batches.
+
+    Each commit overwrites the closing bracket with the new entries and a
+    fresh bracket, then flushes and fsyncs, so after every batch the file
+    is a complete JSON array that ContactBook can load. Nothing already in
+    the file is read or rewritten.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            with open(path, 'w', encoding='utf-8') as file:
+                file.write("[]")
+        self.file = open(path, 'r+b')
+        self.end, self.empty = self._find_end()
+
+    def _find_end(self):
+        """(offset just after the last entry, whether the array is empty)."""
+        size = self.file.seek(0, os.SEEK_END)
+        tail_start = max(0, size - 4096)
+        self.file.seek(tail_start)
+        tail = self.file.read().rstrip()
+        if not tail.endswith(b"]"):
+            raise ValueError(f"{self.path} is not a JSON array")
+        body = tail[:-1].rstrip()
+        return tail_start + len(body), body.endswith(b"[")
+
+    def commit(self, contacts):
+        if not contacts:
+            return
+        entries = ",\n".join("    " + json.dumps(contact) for contact in contacts)
+        data = ("\n" if self.empty else ",\n") + entries + "\n]"
+        self.file.seek(self.end)
+        self.file.write(data.encode('utf-8'))
+        self.file.truncate()
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.end += len(data.encode('utf-8')) - 2  # Before the final "\n]"
+        self.empty = False
+
+    def close(self):
+        self.file.close()
+
+
+def max_contact_id(path):
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return 0
+    return max((contact['id'] for contact in iter_json_array(path)), default=0)
+
+
+# Import / export -------------------------------------------------------
+
+def import_contacts(source, json_path="contacts.json", fmt=None, chunk_size=5000, workers=None,
+                    rejects_path=None, progress=None, first_id=None):
+    """Stream contacts from a CSV or vCard file into contacts.json.
+
+    Rows are validated in chunks (in `workers` processes when given) and
+    each chunk's valid contacts are committed as one batch with new ids
+    from `first_id` (pass the RecordStore's next_id when the file is a
+    store; by default one past the highest id in the file).
+    Rejected rows go to `rejects_path` (default SOURCE.rejects.csv) with
+    their line number and reason. `progress` is called with the running
+    stats after every batch. Returns the final stats.
+    """
+    fmt = fmt or detect_format(source)
+    rejects_path = rejects_path or f"{source}.rejects.csv"
+    next_id = max_contact_id(json_path) + 1 if first_id is None else first_id
+    stats = {'imported': 0, 'rejected': 0, 'seconds': 0.0, 'rejects_path': rejects_path}
+    start = time.perf_counter()
+
+    appender = ContactAppender(json_path)
+    try:
+        with open(rejects_path, 'w', newline='', encoding='utf-8') as rejects_file:
+            rejects = csv.writer(rejects_file)
+            rejects.writerow(['line', 'reason'] + FIELDS)
+            for valid, rejected in _validated(_chunks(READERS[fmt](source), chunk_size), workers):
+                for contact in valid:
+                    contact['id'] = next_id
+                    next_id += 1
+                appender.commit([{'id': c['id'], **{field: c[field] for field in FIELDS}} for c in valid])
+                rejects.writerows([line_no, reason] + [raw.get(field, "") for field in FIELDS]
+                                  for line_no, reason, raw in rejected)
+                stats['imported'] += len(valid)
+                stats['rejected'] += len(rejected)
+                stats['seconds'] = time.perf_counter() - start
+                if progress:
+                    progress(dict(stats))
+    finally:
+        appender.close()
+    if not stats['rejected']:
+        os.remove(rejects_path)
+        stats['rejects_path'] = None
+    stats['seconds'] = time.perf_counter() - start
+    stats['rows_per_second'] = (stats['imported'] + stats['rejected']) / stats['seconds'] if stats['seconds'] else 0.0
+    return stats
+
+
+def _vcard_line(line):
+    """Fold a content line at 75 characters."""
+    return "\r\n ".join(line[i:i + 75] for i in range(0, max(len(line), 1), 75)) + "\r\n"
+
+
+def write_vcard(file, contact):
+    name = contact['name'].translate(_VCARD_ESCAPE)
+    lines = ["BEGIN:VCARD", "VERSION:3.0", f"FN:{name}", f"N:;{name};;;",
+             f"TEL;TYPE=CELL:{contact['phone'].translate(_VCARD_ESCAPE)}"]
+    if contact.get('email'):
+        lines.append(f"EMAIL;TYPE=INTERNET:{contact['email'].translate(_VCARD_ESCAPE)}")
+    if contact.get('address'):
+        lines.append(f"ADR;TYPE=HOME:;;{contact['address'].translate(_VCARD_ESCAPE)};;;;")
+    lines.append("END:VCARD")
+    file.write("".join(_vcard_line(line) for line in lines))
+
+
+def export_contacts(out_path, json_path="contacts.json", fmt=None, contacts=None):
+    """Stream contacts.json (or the given `contacts`) to a CSV or vCard file; returns the number written."""
+    fmt = fmt or detect_format(out_path)
+    count = 0
+    with open(out_path, 'w', newline='', encoding='utf-8') as file:
+        if fmt == 'csv':
+            writer = csv.writer(file)
+            writer.writerow(['ID', 'Name', 'Phone', 'Email', 'Address'])
+        for contact in iter_json_array(json_path) if contacts is None else contacts:
+            if fmt == 'csv':
+                writer.writerow([contact['id']] + [contact.get(field, "") for field in FIELDS])
+            else:
+                write_vcard(file, contact)
+            count += 1
+    return count
+
+
+if __name__ == "__main__":
+    # Usage: python contact_io.py import FILE [contacts.json] [workers]
+    #        python contact_io.py export FILE [contacts.json]
+    #        python contact_io.py bench N     - import N synthetic contacts into a scratch file
+    import random
+    import resource
+    import tempfile
+
+    command, target = sys.argv[1], sys.argv[2]
+    if command == "export":
+        json_path = sys.argv[3] if len(sys.argv) > 3 else "contacts.json"
+        start = time.perf_counter()
+        count = export_contacts(target, contacts=RecordStore(json_path).values())  # Snapshot plus journal
+        print(f"Exported {count:,} contacts to {target} in {time.perf_counter() - start:.1f}s")
+        sys.exit(0)
+
+    if command == "bench":
+        scratch = tempfile.mkdtemp(prefix="contact-io-")
+        source, json_path, workers = os.path.join(scratch, "contacts.csv"), os.path.join(scratch, "contacts.json"), None
+        rng = random.Random(0)
+        with open(source, 'w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(['Name', 'Phone', 'Email', 'Address'])
+            for n in range(int(target)):
+                # Every 50th row has a broken phone so the reject path is exercised
+                phone = "12-34" if n % 50 == 0 else f"+91{rng.randrange(10 ** 10):010d}"
+                writer.writerow([f"Contact {n}", phone, f"contact{n}@example.com", f"{n} Main Street"])
+    else:
+        source = target
+        json_path = sys.argv[3] if len(sys.argv) > 3 else "contacts.json"
+        workers = int(sys.argv[4]) if len(sys.argv) > 4 else None
+
+    # Through the store: its journal is folded into the snapshot first and open windows reload after
+    stats = RecordStore(json_path).run_exclusive(
+        lambda store: import_contacts(source, json_path, workers=workers, first_id=store.next_id), modifies=True)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"Imported {stats['imported']:,} contacts, rejected {stats['rejected']:,} in {stats['seconds']:.1f}s "
+          f"({stats['rows_per_second']:,.0f} rows/s, peak RSS {peak:,.0f} MB)")
+    if stats['rejects_path']:
+        print(f"Rejected rows: {stats['rejects_path']}")
@@ -1,8 +1,11 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
-import json
-import os
-import re
+from tkinter import ttk, messagebox, filedialog
+import queue
+import threading
+from instrumentation import timed, phase, start_metrics
+from contact_dedup import PHONE_RE, EMAIL_RE, ContactDeduplicator, merge_cluster
+from contact_io import import_contacts, export_contacts
+from record_store import RecordStore, ConflictError
 
 class ContactBook:
     def __init__(self, root):
@@ -13,7 +16,10 @@ class ContactBook:
 
         # Contact storage
         self.filename = "contacts.json"
+        self.store = RecordStore(self.filename)  # Shared safely with other Contact Book windows
         self.contacts = self.load_contacts()
+        self.row_ids = []  # Contact id shown on each Listbox row
+        self.bulk_job = None  # Background import/export; edits wait until it finishes
 
         # Configure style
         self.style = ttk.Style()
@@ -26,24 +32,76 @@ class ContactBook:
 
         # GUI Components
         self.create_gui()
+        self.root.after(1000, self.poll_store)
 
+    @timed("contacts.load")
     def load_contacts(self):
-        """Load contacts from JSON file."""
-        if os.path.exists(self.filename):
-            try:
-                with open(self.filename, 'r') as file:
-                    return json.load(file)
-            except json.JSONDecodeError:
-                return []
-        return []
+        """Current contacts from the shared store."""
+        return self.store.values()
+
+    @timed("contacts.save")
+    def save_contacts(self, puts=(), deletes=(), expected=None):
+        """Commit changed contacts; returns False if another window changed them first or holds the store."""
+        try:
+            with phase("contacts.commit"):
+                changes = self.store.write(puts, deletes, expected, timeout=0)  # Never wait on the Tk thread
+        except ConflictError as e:
+            self.contacts = self.load_contacts()
+            self.refresh_view()
+            messagebox.showwarning("Conflict", f"{str(e)}. The list has been refreshed, please try again.")
+            return False
+        except TimeoutError:
+            messagebox.showwarning("Busy", "Another window is saving or importing contacts, please try again in a moment.")
+            return False
+        self.apply_changes(changes)
+        return True
+
+    @timed("contacts.poll_store")
+    def poll_store(self):
+        """Show contacts other windows have saved (one stat per poll when nothing changed)."""
+        if self.bulk_job is None:
+            self.apply_changes(self.store.refresh())
+        self.root.after(1000, self.poll_store)
 
-    def save_contacts(self):
-        """Save contacts to JSON file."""
-        with open(self.filename, 'w') as file:
-            json.dump(self.contacts, file, indent=4)
+    def apply_changes(self, changes):
+        """Patch only the Listbox rows of changed contacts; redraw after a reload or while searching."""
+        if changes is None:
+            return
+        self.contacts = self.load_contacts()
+        if changes['reloaded'] or self.search_entry.get().strip() or \
+                len(changes['changed']) + len(changes['deleted']) > 500:
+            self.refresh_view()
+            return
+        for contact_id in changes['deleted']:
+            if contact_id in self.row_ids:
+                row = self.row_ids.index(contact_id)
+                self.contact_list.delete(row)
+                self.row_ids.pop(row)
+        for contact_id in sorted(changes['changed']):
+            if contact_id in self.row_ids:
+                row = self.row_ids.index(contact_id)
+                self.contact_list.delete(row)
+            else:
+                row = len(self.row_ids)
+                self.row_ids.append(contact_id)
+            self.contact_list.insert(row, self.contact_row(self.store.records[contact_id]))
+            self.contact_list.itemconfig(row, {'fg': '#37474f', 'bg': '#ffffff'})
+
+    def refresh_view(self):
+        """Redraw the list, keeping any search in effect."""
+        if self.search_entry.get().strip():
+            self.search_contacts()
+        else:
+            self.update_contact_list()
+
+    @staticmethod
+    def contact_row(contact):
+        return f"[ID: {contact['id']}] | Name: {contact['name']} | Phone: {contact['phone']}"
 
     def add_contact(self):
         """Add a new contact."""
+        if self.bulk_busy():
+            return
         name = self.name_entry.get().strip()
         phone = self.phone_entry.get().strip()
         email = self.email_entry.get().strip()
@@ -52,33 +110,32 @@ class ContactBook:
         if not name or not phone:
             messagebox.showwarning("Input Error", "Name and phone number are required!")
             return
-        if not re.match(r'^\+?\d{10,15}$', phone.replace(" ", "")):
+        if not PHONE_RE.match(phone.replace(" ", "")):
             messagebox.showwarning("Input Error", "Invalid phone number! Use 10-15 digits, optionally starting with +.")
             return
-        if email and not re.match(r'^[\w\.-]+@[\w\.-]+\.\w+$', email):
+        if email and not EMAIL_RE.match(email):
             messagebox.showwarning("Input Error", "Invalid email format!")
             return
 
         contact = {
-            'id': len(self.contacts) + 1,
             'name': name,
             'phone': phone,
             'email': email,
             'address': address
         }
-        self.contacts.append(contact)
-        self.save_contacts()
-        self.clear_entries()
-        self.update_contact_list()
-        messagebox.showinfo("Success", f"Contact {name} added!")
+        if self.save_contacts(puts=[contact]):  # The store assigns the next free id
+            self.clear_entries()
+            messagebox.showinfo("Success", f"Contact {name} added!")
 
     def update_contact(self):
         """Update selected contact's details."""
+        if self.bulk_busy():
+            return
         selected = self.contact_list.curselection()
         if not selected:
             messagebox.showwarning("Selection Error", "Please select a contact to update!")
             return
-        contact_id = int(self.contact_list.get(selected[0]).split("|")[0].strip()[4:])
+        contact_id = self.row_ids[selected[0]]
         name = self.name_entry.get().strip()
         phone = self.phone_entry.get().strip()
         email = self.email_entry.get().strip()
@@ -87,59 +144,188 @@ class ContactBook:
         if not name or not phone:
             messagebox.showwarning("Input Error", "Name and phone number are required!")
             return
-        if not re.match(r'^\+?\d{10,15}$', phone.replace(" ", "")):
+        if not PHONE_RE.match(phone.replace(" ", "")):
             messagebox.showwarning("Input Error", "Invalid phone number! Use 10-15 digits, optionally starting with +.")
             return
-        if email and not re.match(r'^[\w\.-]+@[\w\.-]+\.\w+$', email):
+        if email and not EMAIL_RE.match(email):
             messagebox.showwarning("Input Error", "Invalid email format!")
             return
 
-        for contact in self.contacts:
-            if contact['id'] == contact_id:
-                contact['name'] = name
-                contact['phone'] = phone
-                contact['email'] = email
-                contact['address'] = address
-                self.save_contacts()
+        contact = self.store.records.get(contact_id)
+        if contact is not None:
+            updated = dict(contact, name=name, phone=phone, email=email, address=address)
+            if self.save_contacts(puts=[updated], expected={contact_id: self.store.rev(contact_id)}):
                 self.clear_entries()
-                self.update_contact_list()
                 messagebox.showinfo("Success", f"Contact {name} updated!")
-                return
 
     def delete_contact(self):
         """Delete selected contact."""
+        if self.bulk_busy():
+            return
         selected = self.contact_list.curselection()
         if not selected:
             messagebox.showwarning("Selection Error", "Please select a contact to delete!")
             return
-        contact_id = int(self.contact_list.get(selected[0]).split("|")[0].strip()[4:])
-        for i, contact in enumerate(self.contacts):
-            if contact['id'] == contact_id:
-                name = contact['name']
-                self.contacts.pop(i)
-                self.save_contacts()
+        contact_id = self.row_ids[selected[0]]
+        contact = self.store.records.get(contact_id)
+        if contact is not None:
+            if self.save_contacts(deletes=[contact_id], expected={contact_id: self.store.rev(contact_id)}):
                 self.clear_entries()
-                self.update_contact_list()
-                messagebox.showinfo("Success", f"Contact {name} deleted!")
-                return
+                messagebox.showinfo("Success", f"Contact {contact['name']} deleted!")
 
+    @timed("contacts.search")
     def search_contacts(self):
         """Search contacts by name or phone."""
         query = self.search_entry.get().strip().lower()
         self.contact_list.delete(0, tk.END)
+        self.row_ids = []
         for contact in self.contacts:
             if query in contact['name'].lower() or query in contact['phone'].lower():
-                self.contact_list.insert(tk.END, 
-                    f"[ID: {contact['id']}] | Name: {contact['name']} | Phone: {contact['phone']}")
+                self.contact_list.insert(tk.END, self.contact_row(contact))
+                self.row_ids.append(contact['id'])
 
+    @timed("contacts.refresh_list")
     def update_contact_list(self):
         """Update the contact list display."""
         self.contact_list.delete(0, tk.END)
+        self.row_ids = [contact['id'] for contact in self.contacts]
         for contact in self.contacts:
-            self.contact_list.insert(tk.END, 
-                f"[ID: {contact['id']}] | Name: {contact['name']} | Phone: {contact['phone']}")
+            self.contact_list.insert(tk.END, self.contact_row(contact))
             self.contact_list.itemconfig(tk.END, {'fg': '#37474f', 'bg': '#ffffff'})  # Dark gray text on white
 
+    @timed("contacts.find_duplicates")
+    def find_duplicates(self):
+        """Suggest groups of contacts that look like the same person and offer to merge them."""
+        deduplicator = ContactDeduplicator()
+        suggestions = deduplicator.suggestions(self.contacts)
+        clusters = deduplicator.clusters(suggestions)
+        if not clusters:
+            messagebox.showinfo("Duplicates", "No duplicate contacts found.")
+            return
+
+        by_id = {contact['id']: contact for contact in self.contacts}
+        reasons = {}
+        for suggestion in suggestions:
+            reasons.setdefault(suggestion['ids'][0], set()).update(suggestion['reasons'])
+
+        window = tk.Toplevel(self.root)
+        window.title("Duplicate Contacts")
+        window.configure(bg="#e0f7fa")
+        tk.Label(window, text=f"{len(clusters)} Possible Duplicate Groups", font=("Arial", 14, "bold"), 
+                bg="#e0f7fa", fg="#006064").pack(pady=10)
+        cluster_list = tk.Listbox(window, width=80, height=12, font=("Arial", 10), 
+                                  bg="#ffffff", fg="#37474f", selectmode="extended", selectbackground="#80deea")
+        cluster_list.pack(padx=10, pady=5, fill="both", expand=True)
+        for cluster in clusters:
+            names = " / ".join(by_id[i]['name'] for i in cluster)
+            matched = set().union(*(reasons.get(i, set()) for i in cluster))
+            cluster_list.insert(tk.END, f"IDs {', '.join(map(str, cluster))}: {names} ({', '.join(sorted(matched))})")
+
+        def merge(chosen):
+            if self.bulk_busy():
+                return
+            if not chosen:
+                messagebox.showwarning("Selection Error", "Please select duplicate groups to merge!", parent=window)
+                return
+            puts, deletes, expected = [], [], {}
+            for cluster in chosen:
+                members = [self.store.records[i] for i in cluster if i in self.store.records]
+                if len(members) > 1:
+                    merged = merge_cluster(members)
+                    puts.append(merged)
+                    deletes.extend(member['id'] for member in members if member['id'] != merged['id'])
+                    expected.update((member['id'], self.store.rev(member['id'])) for member in members)
+            window.destroy()
+            if self.save_contacts(puts, deletes, expected):
+                messagebox.showinfo("Success", f"Merged {len(deletes)} duplicate contacts!")
+
+        button_frame = tk.Frame(window, bg="#e0f7fa")
+        button_frame.pack(pady=10)
+        ttk.Button(button_frame, text="Merge Selected", 
+                  command=lambda: merge([clusters[i] for i in cluster_list.curselection()])).pack(side="left", padx=5)
+        ttk.Button(button_frame, text="Merge All", command=lambda: merge(clusters)).pack(side="left", padx=5)
+
+    def bulk_busy(self):
+        """Warn and return True while an import/export owns contacts.json."""
+        if self.bulk_job is not None:
+            messagebox.showwarning("Busy", "Please wait for the import/export to finish!")
+            return True
+        return False
+
+    def run_bulk(self, task, on_done):
+        """Run an import/export in a worker thread, showing progress until on_done(result)."""
+        updates = queue.Queue()
+
+        def run():
+            try:
+                updates.put(('done', task(updates)))
+            except Exception as e:
+                updates.put(('done', e))
+        self.bulk_job = threading.Thread(target=run, daemon=True)
+        self.bulk_job.start()
+
+        def poll():
+            try:
+                while True:
+                    kind, value = updates.get_nowait()
+                    if kind == 'progress':
+                        self.status_var.set(value)
+                    else:
+                        self.bulk_job = None
+                        self.status_var.set("")
+                        if isinstance(value, Exception):
+                            messagebox.showerror("Error", f"An error occurred: {str(value)}")
+                        else:
+                            on_done(value)
+                        return
+            except queue.Empty:
+                self.root.after(200, poll)
+        poll()
+
+    def import_file(self):
+        """Stream contacts from a CSV or vCard file into the book."""
+        if self.bulk_busy():
+            return
+        path = filedialog.askopenfilename(title="Import Contacts", filetypes=[
+            ("Contacts", "*.csv *.vcf *.vcard"), ("CSV files", "*.csv"), ("vCard files", "*.vcf *.vcard")])
+        if not path:
+            return
+
+        def task(updates):
+            progress = lambda stats: updates.put(('progress', f"Importing... {stats['imported']:,} added, "
+                                                              f"{stats['rejected']:,} rejected"))
+            # Appends to the snapshot file directly, so every window is told to reload
+            return self.store.run_exclusive(lambda store: import_contacts(path, self.filename, progress=progress,
+                                                                          first_id=store.next_id),
+                                            modifies=True)
+
+        def done(stats):
+            self.store.load()  # On the Tk thread, which is the only one reading the store's records
+            self.contacts = self.load_contacts()
+            self.refresh_view()
+            message = (f"Imported {stats['imported']:,} contacts in {stats['seconds']:.1f}s "
+                       f"({stats['rejected']:,} rejected)")
+            if stats['rejects_path']:
+                message += f"\nRejected rows were saved to {stats['rejects_path']}"
+            messagebox.showinfo("Import", message)
+        self.run_bulk(task, done)
+
+    def export_file(self):
+        """Stream every contact to a CSV or vCard file."""
+        if self.bulk_busy():
+            return
+        path = filedialog.asksaveasfilename(title="Export Contacts", defaultextension=".csv", filetypes=[
+            ("CSV files", "*.csv"), ("vCard files", "*.vcf")])
+        if not path:
+            return
+
+        contacts = self.load_contacts()  # Copied here, so the export needs no lock and other windows keep saving
+
+        def task(updates):
+            updates.put(('progress', "Exporting..."))
+            return export_contacts(path, contacts=contacts)
+        self.run_bulk(task, lambda count: messagebox.showinfo("Export", f"Exported {count:,} contacts to {path}"))
+
     def clear_entries(self):
         """Clear all input fields."""
         self.name_entry.delete(0, tk.END)
@@ -152,7 +338,7 @@ class ContactBook:
         """Populate input fields when a contact is selected."""
         selected = self.contact_list.curselection()
         if selected:
-            contact_id = int(self.contact_list.get(selected[0]).split("|")[0].strip()[4:])
+            contact_id = self.row_ids[selected[0]]
             for contact in self.contacts:
                 if contact['id'] == contact_id:
                     self.clear_entries()
@@ -188,6 +374,15 @@ class ContactBook:
         ttk.Button(button_frame, text="Update Contact", command=self.update_contact).pack(side="left", padx=5)
         ttk.Button(button_frame, text="Delete Contact", command=self.delete_contact).pack(side="left", padx=5)
         ttk.Button(button_frame, text="Clear", command=self.clear_entries).pack(side="left", padx=5)
+        ttk.Button(button_frame, text="Find Duplicates", command=self.find_duplicates).pack(side="left", padx=5)
+
+        # Bulk import/export
+        bulk_frame = tk.Frame(main_frame, bg="#e0f7fa")
+        bulk_frame.pack(fill="x")
+        ttk.Button(bulk_frame, text="Import CSV/vCard", command=self.import_file).pack(side="left", padx=5)
+        ttk.Button(bulk_frame, text="Export CSV/vCard", command=self.export_file).pack(side="left", padx=5)
+        self.status_var = tk.StringVar(value="")
+        ttk.Label(bulk_frame, textvariable=self.status_var).pack(side="left", padx=5)
 
         # Search
         search_frame = tk.Frame(main_frame, bg="#e0f7fa", relief="groove", borderwidth=2)
@@ -210,6 +405,7 @@ class ContactBook:
         self.update_contact_list()
 
 if __name__ == "__main__":
+    start_metrics("contacts")
     root = tk.Tk()
     app = ContactBook(root)
     root.mainloop()
\ No newline at end of file
@@ -0,0 +1,235 @@
+import os
+import signal
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Metrics are off unless APP_METRICS is set; disabled timers cost one flag check
+ENABLED = os.environ.get("APP_METRICS", "") not in ("", "0")
+
+# Histogram bucket upper bounds in seconds (Prometheus "le" labels)
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float("inf"))
+
+
+class Histogram:
+    """Fixed-bucket latency histogram."""
+
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(BUCKETS, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+class Registry:
+    """In-memory store of phase timings, event counters and gauges."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.counters = Counter()
+        self.gauges = {}
+
+    def observe(self, name, seconds):
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.observe(seconds)
+
+    def inc(self, name, amount=1):
+        with self.lock:
+            self.counters[name] += amount
+
+    def gauge(self, name, func):
+        """Register a callable sampled at export time."""
+        self.gauges[name] = func
+
+    def render(self):
+        """Render all metrics in the Prometheus text exposition format."""
+        lines = ["# TYPE app_phase_seconds histogram"]
+        with self.lock:
+            for name in sorted(self.histograms):
+                histogram = self.histograms[name]
+                cumulative = 0
+                for bound, count in zip(BUCKETS, histogram.counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f'app_phase_seconds_bucket{{phase="{name}",le="{le}"}} {cumulative}')
+                lines.append(f'app_phase_seconds_sum{{phase="{name}"}} {histogram.total}')
+                lines.append(f'app_phase_seconds_count{{phase="{name}"}} {histogram.count}')
+            lines.append("# TYPE app_events_total counter")
+            for name in sorted(self.counters):
+                lines.append(f'app_events_total{{event="{name}"}} {self.counters[name]}')
+        lines.append("# TYPE app_gauge gauge")
+        for name in sorted(self.gauges):
+            try:
+                lines.append(f'app_gauge{{name="{name}"}} {float(self.gauges[name]())}')
+            except Exception:
+                continue
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def enable(flag=True):
+    """Turn instrumentation on or off at runtime."""
+    global ENABLED
+    ENABLED = flag
+
+
+def timed(name):
+    """Decorator recording the wall time of every call under `name`."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                REGISTRY.observe(name, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+class phase:
+    """Context manager timing a block: ``with phase("sales.read_csv"): ...``"""
+
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+        self.start = None
+
+    def __enter__(self):
+        if ENABLED:
+            self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if self.start is not None:
+            REGISTRY.observe(self.name, time.perf_counter() - self.start)
+        return False
+
+
+def count(name, amount=1):
+    """Increment an event counter."""
+    if ENABLED:
+        REGISTRY.inc(name, amount)
+
+
+def gauge(name, func):
+    """Export the value of `func()` as a gauge."""
+    REGISTRY.gauge(name, func)
+
+
+class SamplingProfiler:
+    """Sample the main thread's stack at a fixed interval for a while.
+
+    Writes collapsed stacks ("file:func;file:func count"), the input format
+    of flame graph tools, to `output_path` when done.
+    """
+
+    def __init__(self, duration=10.0, interval=0.005, output_path=None):
+        self.duration = duration
+        self.interval = interval
+        self.output_path = output_path or f"profile-{os.getpid()}-{int(time.time())}.txt"
+        self.stacks = Counter()
+        self.target = threading.main_thread().ident
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def run(self):
+        deadline = time.monotonic() + self.duration
+        while time.monotonic() < deadline:
+            frame = sys._current_frames().get(self.target)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+            time.sleep(self.interval)
+        with open(self.output_path, "w") as file:
+            for stack, samples in self.stacks.most_common():
+                file.write(f"{stack} {samples}\n")
+
+
+_profiler = None
+
+
+def trigger_profiler(duration=10.0):
+    """Start a sampling profile unless one is already running."""
+    global _profiler
+    if _profiler is None or not _profiler.thread.is_alive():
+        _profiler = SamplingProfiler(duration=duration).start()
+    return _profiler
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path != "/metrics":
+            self.send_error(404)
+            return
+        body = REGISTRY.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _export_loop(path, interval, trigger_path):
+    while True:
+        time.sleep(interval)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as file:
+            file.write(REGISTRY.render())
+        os.replace(tmp_path, path)
+        # Touching the trigger file starts a profile (works where signals don't)
+        if os.path.exists(trigger_path):
+            os.remove(trigger_path)
+            trigger_profiler()
+
+
+def start_metrics(app_name):
+    """Start exporting if APP_METRICS is set.
+
+    Metrics are rewritten every APP_METRICS_INTERVAL seconds (default 15)
+    to ``<app_name>.prom`` and, if APP_METRICS_PORT is set, served at
+    http://127.0.0.1:<port>/metrics. A sampling profile is started by
+    SIGUSR1 or by creating ``<app_name>.profile``.
+    """
+    if not ENABLED:
+        return
+    interval = float(os.environ.get("APP_METRICS_INTERVAL", "15"))
+    threading.Thread(target=_export_loop, args=(f"{app_name}.prom", interval, f"{app_name}.profile"),
+                     daemon=True).start()
+
+    port = os.environ.get("APP_METRICS_PORT")
+    if port:
+        server = ThreadingHTTPServer(("127.0.0.1", int(port)), _MetricsHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    if hasattr(signal, "SIGUSR1"):
+        signal.signal(signal.SIGUSR1, lambda signum, frame: trigger_profiler())
@@ -1,13 +1,18 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
+import os
+import queue
 import random
 import string
+import threading
+from instrumentation import timed, phase, start_metrics
+from vault import Vault, VaultError
 
 class PasswordGenerator:
     def __init__(self, root):
         self.root = root
         self.root.title("Password Generator")
-        self.root.geometry("450x500")
+        self.root.geometry("450x720")
         self.root.configure(bg="#e8eaf6")  # Light indigo background
 
         # Configure style
@@ -19,8 +24,12 @@ class PasswordGenerator:
                       background=[('active', '#3f51b5')],  # Indigo on click
                       foreground=[('active', '#ffffff')])
 
+        self.vault = Vault("vault.json")
+        self.vault_busy = False
+
         # GUI Components
         self.create_gui()
+        self.root.after(30_000, self.check_vault)
 
     def create_gui(self):
         """Create the styled GUI components."""
@@ -68,6 +77,22 @@ class PasswordGenerator:
         ttk.Button(main_frame, text="Copy to Clipboard", command=self.copy_to_clipboard, 
                   style="TButton").pack(pady=5)
 
+        # Vault and deterministic site passwords
+        vault_frame = tk.Frame(main_frame, bg="#e8eaf6", relief="groove", borderwidth=2)
+        vault_frame.pack(fill="x", pady=10)
+        ttk.Label(vault_frame, text="Site(s), comma separated:").pack()
+        self.site_entry = ttk.Entry(vault_frame, width=30)
+        self.site_entry.pack(pady=2)
+        ttk.Label(vault_frame, text="Master Password:").pack()
+        self.master_entry = ttk.Entry(vault_frame, width=30, show="*")
+        self.master_entry.pack(pady=2)
+        vault_buttons = tk.Frame(vault_frame, bg="#e8eaf6")
+        vault_buttons.pack(pady=5)
+        ttk.Button(vault_buttons, text="Site Password", command=self.site_password).pack(side="left", padx=3)
+        ttk.Button(vault_buttons, text="Save to Vault", command=self.save_to_vault).pack(side="left", padx=3)
+        ttk.Button(vault_buttons, text="Show Vault", command=self.show_vault).pack(side="left", padx=3)
+
+    @timed("password.generate")
     def generate_password(self):
         """Generate a random password based on user input."""
         try:
@@ -114,6 +139,131 @@ class PasswordGenerator:
         password = ''.join(password)
         self.result_var.set(f"Generated Password: {password}")
 
+    def selected_classes(self):
+        names = [name for name, var in (('upper', self.upper_var), ('lower', self.lower_var),
+                                        ('digits', self.digit_var), ('special', self.special_var)) if var.get()]
+        if not names:
+            raise ValueError("At least one character type must be selected!")
+        return names
+
+    def open_vault(self, master):
+        """Unlock the vault (creating it, KDF calibrated for this machine, on first use).
+
+        Runs on the worker thread. Returns None if the vault was already open,
+        otherwise whether it had to be created.
+        """
+        if self.vault.unlocked:
+            return None
+        if not master:
+            raise ValueError("Please enter the master password!")
+        if self.vault.exists:
+            with phase("password.unlock"):
+                self.vault.unlock(master)
+            return False
+        with phase("password.create_vault"):
+            self.vault.create(master)
+        return True
+
+    def run_vault_task(self, work, done):
+        """Open the vault and run `work` on a worker thread, then pass its result to `done` on the Tk thread.
+
+        Key derivation is slow on purpose (and a batch of sites starts a
+        process pool), so none of it may run inside a Tk callback.
+        """
+        if self.vault_busy:
+            messagebox.showwarning("Busy", "The vault is still working on the last request.")
+            return
+        self.vault_busy = True
+        master = self.master_entry.get()
+        results = queue.Queue()
+
+        def run():
+            try:
+                created = self.open_vault(master)
+                results.put((created, work()))
+            except Exception as e:
+                results.put((None, e))
+        threading.Thread(target=run, daemon=True).start()
+        self.root.config(cursor="watch")
+
+        def poll():
+            try:
+                created, value = results.get_nowait()
+            except queue.Empty:
+                self.root.after(100, poll)
+                return
+            self.vault_busy = False
+            self.root.config(cursor="")
+            if isinstance(value, VaultError):
+                messagebox.showerror("Vault Error", str(value))
+            elif isinstance(value, ValueError):
+                messagebox.showerror("Input Error", str(value))
+            elif isinstance(value, Exception):
+                messagebox.showerror("Error", f"An error occurred: {str(value)}")
+            else:
+                if created is not None:
+                    self.master_entry.delete(0, tk.END)
+                if created:
+                    messagebox.showinfo("Vault", f"Created {self.vault.path} (key derivation: {self.vault.header['params']})")
+                done(value)
+        poll()
+
+    def site_password(self):
+        """Derive the same password for a site every time from the master password."""
+        try:
+            length = int(self.length_entry.get())
+            if length < 6 or length > 50:
+                raise ValueError("Length must be between 6 and 50!")
+            sites = [site.strip() for site in self.site_entry.get().split(",") if site.strip()]
+            if not sites:
+                raise ValueError("Please enter a site!")
+            classes = self.selected_classes()
+        except ValueError as e:
+            messagebox.showerror("Input Error", str(e))
+            return
+
+        def work():
+            with phase("password.site"):
+                # Each site costs one calibrated derivation, so a batch is spread over the CPU cores
+                return self.vault.site_passwords(sites, length, classes, workers=os.cpu_count())
+
+        def done(passwords):
+            if len(sites) == 1:
+                self.result_var.set(f"Generated Password: {passwords[0]}")
+            else:
+                messagebox.showinfo("Site Passwords", "\n".join(f"{site}: {pw}" for site, pw in zip(sites, passwords)))
+        self.run_vault_task(work, done)
+
+    def save_to_vault(self):
+        """Store the displayed password under the site name in the encrypted vault."""
+        password = self.result_var.get().replace("Generated Password: ", "")
+        site = self.site_entry.get().strip()
+        if not password:
+            messagebox.showerror("Input Error", "No password to save!")
+            return
+        if not site or "," in site:
+            messagebox.showerror("Input Error", "Please enter a single site!")
+            return
+
+        def work():
+            self.vault.entries[site] = password
+            self.vault.save()
+        self.run_vault_task(work, lambda _: messagebox.showinfo("Success", f"Saved password for {site}"))
+
+    def show_vault(self):
+        """List the sites stored in the vault."""
+        def done(entries):
+            text = "\n".join(f"{site}: {password}" for site, password in sorted(entries.items()))
+            messagebox.showinfo("Vault", text or "The vault is empty.")
+        self.run_vault_task(lambda: dict(self.vault.entries), done)
+
+    def check_vault(self):
+        """Relock the vault once its cached key expires."""
+        if not self.vault_busy:  # A worker may be between unlocking and using the key
+            self.vault.cache.purge()
+            self.vault.expire()
+        self.root.after(30_000, self.check_vault)
+
     def copy_to_clipboard(self):
         """Copy the generated password to clipboard."""
         password = self.result_var.get().replace("Generated Password: ", "")
@@ -125,6 +275,7 @@ class PasswordGenerator:
             messagebox.showwarning("Error", "No password to copy!")
 
 if __name__ == "__main__":
+    start_metrics("password")
     root = tk.Tk()
     app = PasswordGenerator(root)
     root.mainloop()
\ No newline at end of file
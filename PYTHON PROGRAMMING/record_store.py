@@ -0,0 +1,331 @@
+import contextlib
+import json
+import os
+import sys
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class ConflictError(Exception):
+    """Another instance changed or deleted a record after this one last saw it."""
+
+
+class FileLock:
+    """Cooperative exclusive lock held on PATH (flock on POSIX, msvcrt on Windows).
+
+    Every instance of the apps takes it around writes, so only one writer
+    touches a store at a time; readers that just poll never need it.
+    """
+
+    def __init__(self, path, timeout=10.0):
+        self.path = path
+        self.timeout = timeout
+        self.file = None
+
+    def acquire(self, timeout=None):
+        """Try for up to `timeout` seconds (0 = one attempt); returns whether the lock is held.
+
+        The lock is not re-entrant: while this object holds it (on any
+        thread), acquire() refuses at once instead of taking it twice.
+        """
+        if self.file is not None:
+            return False
+        deadline = time.monotonic() + (self.timeout if timeout is None else timeout)
+        file = open(self.path, 'a+')
+        while True:
+            try:
+                if fcntl:
+                    fcntl.flock(file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                else:
+                    file.seek(0)
+                    msvcrt.locking(file.fileno(), msvcrt.LK_NBLCK, 1)
+                self.file = file
+                return True
+            except OSError:
+                if time.monotonic() >= deadline:
+                    file.close()
+                    return False
+                time.sleep(0.05)
+
+    def release(self):
+        if fcntl:
+            fcntl.flock(self.file.fileno(), fcntl.LOCK_UN)
+        else:
+            self.file.seek(0)
+            msvcrt.locking(self.file.fileno(), msvcrt.LK_UNLCK, 1)
+        self.file.close()
+        self.file = None
+
+    def __enter__(self):
+        if not self.acquire():
+            raise TimeoutError(f"{self.path} is held by another instance")
+        return self
+
+    @contextlib.contextmanager
+    def hold(self, timeout=None):
+        """`with lock:` with its own timeout (0 = fail at once if another instance holds it)."""
+        if not self.acquire(timeout):
+            raise TimeoutError(f"{self.path} is held by another instance")
+        try:
+            yield self
+        finally:
+            self.release()
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+def _stat(path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_ino, st.st_size, st.st_mtime_ns
+
+
+class RecordStore:
+    """Records keyed by 'id', shared safely by several app instances.
+
+    The JSON array file (e.g. contacts.json) is a snapshot; every change
+    after it is a numbered line in an append-only journal (PATH.log) whose
+    first line names the snapshot's sequence number. Writers take the
+    lock, catch up on the journal, check that the records they edited
+    still have the revision they were based on (ConflictError otherwise),
+    append and fsync. Other instances notice a change with one stat of
+    the journal and apply only the new lines. Every `compact_every`
+    changes the snapshot is rewritten and the journal restarted; the
+    journal header carries the id high-water mark, so ids of deleted
+    records are never handed out again.
+    """
+
+    def __init__(self, path, compact_every=500):
+        self.path = path
+        self.log_path = f"{path}.log"
+        self.lock = FileLock(f"{path}.lock")
+        self.compact_every = compact_every
+        self.load()
+
+    # Reading -------------------------------------------------------------
+
+    def load(self):
+        """Full reload: read the snapshot and replay the journal."""
+        records = []
+        if os.path.exists(self.path) and os.path.getsize(self.path):
+            try:
+                with open(self.path, 'r') as file:
+                    records = json.load(file)
+            except json.JSONDecodeError:
+                records = []
+        self.records = {record['id']: record for record in records}
+        self.revs = dict.fromkeys(self.records, 0)
+        self.next_id = max(self.records, default=0) + 1
+        self.snapshot_stat = _stat(self.path)
+        self.seq = self.base = self.offset = 0
+        self.log_ino = None
+        self.log_stat = None
+        self._read_log(initial=True)
+
+    def values(self):
+        return list(self.records.values())
+
+    def rev(self, record_id):
+        """Journal sequence number of the record's last change (what edits are checked against)."""
+        return self.revs.get(record_id)
+
+    def _read_log(self, initial=False):
+        """Apply complete journal lines not seen yet; returns (changed ids, deleted ids, reload needed)."""
+        changed, deleted = set(), set()
+        stat = _stat(self.log_path)
+        self.log_stat = stat
+        if stat is None:
+            return changed, deleted, False
+        continued = stat[0] == self.log_ino
+        with open(self.log_path, 'rb') as file:
+            if not continued:
+                # New or compacted journal: its header names the snapshot it follows
+                header = json.loads(file.readline())
+                base = header['base']
+                self.next_id = max(self.next_id, header.get('next_id', 0))
+                if initial:
+                    self.seq = self.base = base
+                    self.revs = dict.fromkeys(self.records, base)
+                elif base > self.seq:
+                    return changed, deleted, True  # Changes we never saw are only in the new snapshot
+                self.log_ino, self.base, self.offset = stat[0], base, file.tell()
+            file.seek(self.offset)
+            data = file.read()
+        end = data.rfind(b"\n") + 1  # A line still being written is left for the next read
+        lines = data[:end].splitlines()
+        if lines and continued and not lines[0].startswith(b'{"seq": %d,' % (self.seq + 1)):
+            # Not the continuation we expect: a new journal reusing the old inode number
+            self.log_ino = None
+            return self._read_log(initial)
+        self.offset += end
+
+        reload = False
+        for line in lines:
+            entry = json.loads(line)
+            if entry['seq'] <= self.seq:
+                continue
+            self.seq = entry['seq']
+            if entry['op'] == 'put':
+                record = entry['record']
+                self.records[record['id']] = record
+                self.revs[record['id']] = entry['seq']
+                self.next_id = max(self.next_id, record['id'] + 1)
+                changed.add(record['id'])
+                deleted.discard(record['id'])
+            elif entry['op'] == 'delete':
+                self.records.pop(entry['id'], None)
+                self.revs.pop(entry['id'], None)
+                deleted.add(entry['id'])
+                changed.discard(entry['id'])
+            elif entry['op'] == 'reload' and not initial:
+                reload = True
+        return changed, deleted, reload
+
+    def _catch_up(self):
+        """Bring memory up to date with the files; returns a change dict or None."""
+        snapshot = _stat(self.path)
+        log = _stat(self.log_path)
+        if snapshot != self.snapshot_stat and (log is None or log[0] == self.log_ino):
+            reload = True  # Snapshot rewritten outside the store
+            changed = deleted = set()
+        else:
+            changed, deleted, reload = self._read_log()
+        if reload:
+            self.load()
+            return {'changed': set(), 'deleted': set(), 'reloaded': True}
+        self.snapshot_stat = snapshot
+        if changed or deleted:
+            return {'changed': changed, 'deleted': deleted, 'reloaded': False}
+        return None
+
+    def refresh(self):
+        """Pull other instances' changes: {'changed', 'deleted', 'reloaded'} or None.
+
+        Costs two stats when nothing changed. If a writer holds the lock the
+        pull is skipped and retried on the next call.
+        """
+        if _stat(self.log_path) == self.log_stat and _stat(self.path) == self.snapshot_stat:
+            return None
+        if not self.lock.acquire(timeout=0):
+            return None
+        try:
+            return self._catch_up()
+        finally:
+            self.lock.release()
+
+    # Writing -------------------------------------------------------------
+
+    def write(self, puts=(), deletes=(), expected=None, timeout=None):
+        """Commit records to put (new ones get an id) and ids to delete.
+
+        `expected` maps ids to the revision the caller based its edit on;
+        if another instance has since changed or deleted one of them,
+        ConflictError is raised and nothing is written. TimeoutError is
+        raised if the lock is not free within `timeout` seconds (UI threads
+        pass 0 rather than wait out a bulk import). Returns the change
+        dict covering both this write and anything pulled before it.
+        """
+        with self.lock.hold(timeout):
+            pulled = self._catch_up() or {'changed': set(), 'deleted': set(), 'reloaded': False}
+            for record_id, rev in (expected or {}).items():
+                if self.revs.get(record_id) != rev:
+                    raise ConflictError(f"Record {record_id} was changed in another window")
+
+            entries = []
+            for record in puts:
+                if 'id' not in record:
+                    record = {'id': self.next_id, **record}
+                self.next_id = max(self.next_id, record['id'] + 1)
+                entries.append({'seq': self.seq + len(entries) + 1, 'op': 'put', 'record': record})
+            for record_id in deletes:
+                entries.append({'seq': self.seq + len(entries) + 1, 'op': 'delete', 'id': record_id})
+            if not entries:
+                return pulled
+            self._append(entries)
+            for entry in entries:
+                if entry['op'] == 'put':
+                    record_id = entry['record']['id']
+                    self.records[record_id] = entry['record']
+                    self.revs[record_id] = entry['seq']
+                    pulled['changed'].add(record_id)
+                    pulled['deleted'].discard(record_id)
+                else:
+                    self.records.pop(entry['id'], None)
+                    self.revs.pop(entry['id'], None)
+                    pulled['deleted'].add(entry['id'])
+                    pulled['changed'].discard(entry['id'])
+            self.seq = entries[-1]['seq']
+            if self.seq - self.base >= self.compact_every:
+                self._compact()
+            return pulled
+
+    def _append(self, entries):
+        if self.log_ino is None:
+            self._start_log()
+        data = "".join(json.dumps(entry) + "\n" for entry in entries).encode()
+        with open(self.log_path, 'r+b') as file:
+            file.truncate(self.offset)  # Drop a torn line left by a crashed writer
+            file.seek(self.offset)
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+        self.offset += len(data)
+        self.log_stat = _stat(self.log_path)
+
+    def _start_log(self):
+        """Atomically start a journal that follows the snapshot at the current sequence number."""
+        header = (json.dumps({'base': self.seq, 'next_id': self.next_id}) + "\n").encode()
+        with open(f"{self.log_path}.tmp", 'wb') as file:
+            file.write(header)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(f"{self.log_path}.tmp", self.log_path)
+        self.log_ino, self.base, self.offset = _stat(self.log_path)[0], self.seq, len(header)
+        self.log_stat = _stat(self.log_path)
+
+    def _compact(self):
+        """Rewrite the snapshot from memory and restart the journal after it."""
+        with open(f"{self.path}.tmp", 'w') as file:
+            json.dump(list(self.records.values()), file, indent=4)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(f"{self.path}.tmp", self.path)
+        self.snapshot_stat = _stat(self.path)
+        self._start_log()
+
+    def run_exclusive(self, task, modifies=False):
+        """Run task(store) holding the lock with the snapshot file fully up to date.
+
+        For bulk tools that write the snapshot directly (contact import).
+        The lock is held for the whole task, so other instances' writes
+        fail with TimeoutError until it returns; keep `task` to the
+        streaming itself, and read-only jobs such as export should use
+        values() instead. `store` is a private copy loaded under the lock
+        (it supplies next_id): this instance's records are left alone, so
+        the call may run on a worker thread while the UI reads them. With
+        `modifies`, every instance is told to reload; this one should
+        call load() afterwards from the thread that owns it.
+        """
+        with self.lock:
+            current = RecordStore(self.path, self.compact_every)
+            if current.seq != current.base or current.log_ino is None:
+                current._compact()
+            result = task(current)
+            if modifies:
+                current._append([{'seq': current.seq + 1, 'op': 'reload'}])
+        return result
+
+
+if __name__ == "__main__":
+    # Usage: python record_store.py FILE  - show the snapshot/journal state of a store
+    store = RecordStore(sys.argv[1] if len(sys.argv) > 1 else "tasks.json")
+    print(f"{len(store.records):,} records at sequence {store.seq} "
+          f"({store.seq - store.base} journal entries since the snapshot)")
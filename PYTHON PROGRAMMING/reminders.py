@@ -0,0 +1,124 @@
+import heapq
+import sys
+import time
+
+
+class ReminderScheduler:
+    """Min-heap of (due epoch, task id) that wakes a Tk root exactly when the next task falls due.
+
+    `due` holds each scheduled task's current due time; heap entries that
+    no longer match it (edited, completed or deleted tasks) are skipped
+    when they reach the top, so scheduling and cancelling cost O(log n)
+    and O(1). Only one `after` callback is ever pending, armed for the
+    earliest due time, so an idle window does no work however many tasks
+    are scheduled.
+    """
+
+    MAX_DELAY_MS = 2 ** 31 - 1  # Tk timers take a signed 32-bit delay (about 24 days)
+
+    def __init__(self, root, on_due, clock=time.time):
+        self.root = root
+        self.on_due = on_due  # Called with the list of task ids that fell due
+        self.clock = clock
+        self.heap = []
+        self.due = {}
+        self.after_id = None
+        self.armed_for = None
+
+    def __len__(self):
+        return len(self.due)
+
+    def schedule(self, task_id, due_at):
+        """(Re)schedule a task; `due_at=None` cancels it."""
+        if due_at is None:
+            self.cancel(task_id)
+            return
+        if self.due.get(task_id) == due_at:
+            return
+        self.due[task_id] = due_at
+        heapq.heappush(self.heap, (due_at, task_id))
+        self._compact()
+        self.arm()
+
+    def cancel(self, task_id):
+        # The heap entry stays behind and is dropped once it surfaces
+        if self.due.pop(task_id, None) is not None:
+            self._compact()
+
+    def rebuild(self, entries, now=None):
+        """Replace the schedule with (task id, due epoch) pairs still in the future, in O(n)."""
+        now = self.clock() if now is None else now
+        self.due = {task_id: due_at for task_id, due_at in entries if due_at is not None and due_at > now}
+        self.heap = [(due_at, task_id) for task_id, due_at in self.due.items()]
+        heapq.heapify(self.heap)
+        self.arm()
+
+    def _compact(self):
+        """Drop stale entries once they outnumber live ones, so the heap stays O(scheduled)."""
+        if len(self.heap) > 64 and len(self.heap) > 2 * len(self.due):
+            self.heap = [(due_at, task_id) for task_id, due_at in self.due.items()]
+            heapq.heapify(self.heap)
+
+    def _discard_stale(self):
+        while self.heap and self.due.get(self.heap[0][1]) != self.heap[0][0]:
+            heapq.heappop(self.heap)
+
+    def next_due(self):
+        self._discard_stale()
+        return self.heap[0][0] if self.heap else None
+
+    def pop_due(self, now=None):
+        """Remove and return the ids of every task due by `now`, earliest first."""
+        now = self.clock() if now is None else now
+        fired = []
+        while self.next_due() is not None and self.heap[0][0] <= now:
+            due_at, task_id = heapq.heappop(self.heap)
+            del self.due[task_id]
+            fired.append(task_id)
+        return fired
+
+    def arm(self):
+        """Keep a single `after` callback pending for the earliest due time."""
+        next_due = self.next_due()
+        if next_due == self.armed_for:
+            return
+        if self.after_id is not None:
+            self.root.after_cancel(self.after_id)
+            self.after_id = None
+        self.armed_for = next_due
+        if next_due is not None:
+            delay = min(max(0, int((next_due - self.clock()) * 1000)), self.MAX_DELAY_MS)
+            self.after_id = self.root.after(delay, self._wake)
+
+    def _wake(self):
+        self.after_id = self.armed_for = None
+        fired = self.pop_due()
+        if fired:
+            self.on_due(fired)
+        self.arm()  # Also re-arms a wake-up that was capped at MAX_DELAY_MS
+
+
+if __name__ == "__main__":
+    # Usage: python reminders.py [N]  - cost of scheduling, editing and firing N reminders
+    class IdleRoot:
+        def after(self, delay, callback):
+            return object()
+
+        def after_cancel(self, after_id):
+            pass
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    now = time.time()
+    scheduler = ReminderScheduler(IdleRoot(), on_due=lambda ids: None)
+    start = time.perf_counter()
+    scheduler.rebuild(((i, int(now) + 60 + i) for i in range(n)), now=now)
+    built = time.perf_counter() - start
+    start = time.perf_counter()
+    for i in range(0, n, 2):
+        scheduler.schedule(i, int(now) + 60 + n - i)  # Edit half of the due dates
+    edited = time.perf_counter() - start
+    start = time.perf_counter()
+    fired = scheduler.pop_due(now=now + 60 + n)
+    popped = time.perf_counter() - start
+    print(f"{n:,} reminders: built in {built * 1e3:.0f} ms, {n // 2:,} edits at "
+          f"{edited / (n // 2) * 1e6:.2f} us each, fired all {len(fired):,} in {popped * 1e3:.0f} ms")
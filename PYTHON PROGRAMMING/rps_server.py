@@ -0,0 +1,346 @@
+import asyncio
+import hashlib
+import json
+import random
+import secrets
+import sys
+import time
+from collections import deque
+
+MOVES = ("rock", "paper", "scissors")
+BEATS = (2, 0, 1)  # BEATS[m] is the move that m beats: rock > scissors, paper > rock, scissors > paper
+PHASE_SECONDS = 15.0  # A player who does not commit or reveal in time forfeits the match
+COMMIT, REVEAL, OVER = 0, 1, 2
+
+
+def commitment(move, nonce):
+    """What a player commits to before seeing the other move: sha256 of 'move:nonce'."""
+    return hashlib.sha256(f"{move}:{nonce}".encode()).hexdigest()
+
+
+def round_winner(a, b):
+    """0 if move a wins, 1 if move b wins, None for a tie (moves are indexes into MOVES)."""
+    if a == b:
+        return None
+    return 0 if BEATS[a] == b else 1
+
+
+class Player:
+    __slots__ = ('name', 'writer', 'match', 'seat', 'queued')
+
+    def __init__(self, name, writer):
+        self.name = name
+        self.writer = writer
+        self.match = None
+        self.seat = 0
+        self.queued = False
+
+    def send(self, message):
+        if self.writer is not None and not self.writer.is_closing():
+            self.writer.write(json.dumps(message, separators=(",", ":")).encode() + b"\n")
+
+
+class Match:
+    """Two players, a best-of-N score and the current round's commitments.
+
+    Slots keep a match to a few hundred bytes however long it runs:
+    scores are a 2-byte bytearray, moves are 0-2 ints and a commitment
+    is the 32-byte digest. One timer handle guards the current phase.
+    """
+
+    __slots__ = ('id', 'players', 'best_of', 'round', 'phase', 'scores', 'commits', 'moves', 'timer')
+
+    def __init__(self, match_id, players, best_of):
+        self.id = match_id
+        self.players = players
+        self.best_of = best_of
+        self.round = 0
+        self.phase = COMMIT
+        self.scores = bytearray(2)
+        self.commits = [None, None]
+        self.moves = [None, None]
+        self.timer = None
+
+
+class BotPlayer(Player):
+    """Server-side opponent: commits a random move and reveals as soon as asked."""
+
+    __slots__ = ('move', 'nonce')
+
+    def __init__(self):
+        super().__init__("bot", None)
+        self.move = self.nonce = None
+
+
+class MatchServer:
+    """Newline-delimited JSON match server: matchmaking queues, commit/reveal rounds, forfeits.
+
+    Client messages: {"op": "join", "name", "best_of": 3, "vs": "bot"?},
+    {"op": "commit", "hash": commitment(move, nonce)} and
+    {"op": "reveal", "move", "nonce"}. The server answers with "queued",
+    "matched", "round", "reveal", "result", "over" and "error" messages.
+    Neither side sees the other's move before both have committed, and a
+    reveal that does not match its commitment forfeits the match.
+    """
+
+    def __init__(self, phase_seconds=PHASE_SECONDS):
+        self.phase_seconds = phase_seconds
+        self.queues = {}  # best_of -> deque of waiting players
+        self.matches = {}
+        self.next_id = 1
+        self.stats = {'connections': 0, 'matches': 0, 'finished': 0, 'forfeits': 0, 'peak_matches': 0}
+
+    async def serve(self, host="127.0.0.1", port=8766):
+        return await asyncio.start_server(self.handle, host, port, limit=4096, backlog=4096)
+
+    async def handle(self, reader, writer):
+        player = Player(None, writer)
+        self.stats['connections'] += 1
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    message = json.loads(line)
+                    self.dispatch(player, message)
+                except (ValueError, KeyError, TypeError) as e:
+                    player.send({'op': 'error', 'reason': str(e)})
+                await writer.drain()
+        except (ConnectionError, asyncio.LimitOverrunError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.disconnect(player)
+            writer.close()
+
+    def dispatch(self, player, message):
+        op = message['op']
+        if op == 'join':
+            self.join(player, str(message.get('name', 'player'))[:32], int(message.get('best_of', 3)),
+                      message.get('vs') == 'bot')
+        elif op == 'commit':
+            self.commit(player, bytes.fromhex(message['hash']))
+        elif op == 'reveal':
+            self.reveal(player, message['move'], str(message['nonce']))
+        else:
+            raise ValueError(f"Unknown op {op!r}")
+
+    # Matchmaking ---------------------------------------------------------
+
+    def join(self, player, name, best_of, vs_bot=False):
+        if player.match is not None or player.queued:
+            raise ValueError("Already in a match or queue")
+        if best_of not in (1, 3, 5, 7):
+            raise ValueError("best_of must be 1, 3, 5 or 7")
+        player.name = name
+        if vs_bot:
+            self.start_match(player, BotPlayer(), best_of)
+            return
+        waiting = self.queues.setdefault(best_of, deque())
+        while waiting:
+            opponent = waiting.popleft()
+            opponent.queued = False
+            if opponent.writer is not None and not opponent.writer.is_closing():
+                self.start_match(opponent, player, best_of)
+                return
+        waiting.append(player)
+        player.queued = True
+        player.send({'op': 'queued', 'best_of': best_of})
+
+    def start_match(self, first, second, best_of):
+        match = Match(self.next_id, (first, second), best_of)
+        self.next_id += 1
+        self.matches[match.id] = match
+        self.stats['matches'] += 1
+        self.stats['peak_matches'] = max(self.stats['peak_matches'], len(self.matches))
+        for seat, player in enumerate(match.players):
+            player.match, player.seat = match, seat
+            player.send({'op': 'matched', 'match': match.id, 'opponent': match.players[1 - seat].name,
+                         'best_of': best_of})
+        self.next_round(match)
+
+    # Rounds --------------------------------------------------------------
+
+    def set_timer(self, match):
+        if match.timer is not None:
+            match.timer.cancel()
+        match.timer = asyncio.get_running_loop().call_later(self.phase_seconds, self.timeout, match)
+
+    def next_round(self, match):
+        match.round += 1
+        match.phase = COMMIT
+        match.commits = [None, None]
+        match.moves = [None, None]
+        for player in match.players:
+            player.send({'op': 'round', 'round': match.round, 'score': list(match.scores)})
+            if isinstance(player, BotPlayer):
+                player.move, player.nonce = random.randrange(3), secrets.token_hex(8)
+                match.commits[player.seat] = bytes.fromhex(commitment(MOVES[player.move], player.nonce))
+        self.set_timer(match)
+
+    def commit(self, player, digest):
+        match = player.match
+        if match is None or match.phase != COMMIT or match.commits[player.seat] is not None:
+            raise ValueError("Not expecting a commitment")
+        if len(digest) != 32:
+            raise ValueError("Commitment must be a sha256 hex digest")
+        match.commits[player.seat] = digest
+        if all(match.commits):
+            match.phase = REVEAL
+            for other in match.players:
+                if isinstance(other, BotPlayer):
+                    match.moves[other.seat] = other.move
+                else:
+                    other.send({'op': 'reveal', 'round': match.round})
+            self.set_timer(match)
+
+    def reveal(self, player, move, nonce):
+        match = player.match
+        if match is None or match.phase != REVEAL or match.moves[player.seat] is not None:
+            raise ValueError("Not expecting a reveal")
+        if move not in MOVES or bytes.fromhex(commitment(move, nonce)) != match.commits[player.seat]:
+            self.finish(match, winner=1 - player.seat, reason="reveal did not match the commitment")
+            return
+        match.moves[player.seat] = MOVES.index(move)
+        if None not in match.moves:
+            self.score_round(match)
+
+    def score_round(self, match):
+        winner = round_winner(*match.moves)
+        if winner is not None:
+            match.scores[winner] += 1
+        for player in match.players:
+            player.send({'op': 'result', 'round': match.round, 'you': MOVES[match.moves[player.seat]],
+                         'them': MOVES[match.moves[1 - player.seat]],
+                         'score': [match.scores[player.seat], match.scores[1 - player.seat]]})
+        needed = match.best_of // 2 + 1
+        if max(match.scores) >= needed:
+            self.finish(match, winner=0 if match.scores[0] >= needed else 1)
+        else:
+            self.next_round(match)
+
+    def timeout(self, match):
+        """Whoever has not committed/revealed in time forfeits (a draw if neither has)."""
+        match.timer = None
+        pending = match.commits if match.phase == COMMIT else match.moves
+        late = [seat for seat in (0, 1) if pending[seat] is None]
+        self.finish(match, winner=1 - late[0] if len(late) == 1 else None, reason="timed out")
+
+    def finish(self, match, winner, reason=None):
+        if match.phase == OVER:
+            return
+        match.phase = OVER
+        if match.timer is not None:
+            match.timer.cancel()
+            match.timer = None
+        if reason:
+            self.stats['forfeits'] += 1
+        else:
+            self.stats['finished'] += 1
+        for player in match.players:
+            result = None if winner is None else winner == player.seat
+            player.send({'op': 'over', 'won': result, 'reason': reason,
+                         'score': [match.scores[player.seat], match.scores[1 - player.seat]]})
+            player.match = None
+        del self.matches[match.id]
+
+    def disconnect(self, player):
+        if player.match is not None:
+            self.finish(player.match, winner=1 - player.seat, reason="opponent disconnected")
+        player.writer = None  # Lazily dropped from any queue it is still waiting in
+
+
+# Clients -----------------------------------------------------------------
+
+async def play_match(host, port, name="bot", best_of=3, choose=None, vs_bot=False):
+    """Join, play one match with commit/reveal and return the final 'over' message."""
+    choose = choose or (lambda history: random.choice(MOVES))
+    reader, writer = await asyncio.open_connection(host, port, limit=4096)
+
+    def send(message):
+        writer.write(json.dumps(message, separators=(",", ":")).encode() + b"\n")
+
+    send({'op': 'join', 'name': name, 'best_of': best_of, **({'vs': 'bot'} if vs_bot else {})})
+    history, move, nonce = [], None, None
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                raise ConnectionError("Server closed the connection")
+            message = json.loads(line)
+            if message['op'] == 'round':
+                move, nonce = choose(history), secrets.token_hex(8)
+                send({'op': 'commit', 'hash': commitment(move, nonce)})
+            elif message['op'] == 'reveal':
+                send({'op': 'reveal', 'move': move, 'nonce': nonce})
+            elif message['op'] == 'result':
+                history.append((message['you'], message['them']))
+            elif message['op'] == 'over':
+                return message
+            elif message['op'] == 'error':
+                raise ValueError(message['reason'])
+            await writer.drain()
+    finally:
+        writer.close()
+
+
+async def load_test(matches, best_of=3, host="127.0.0.1", port=8766, in_process=True):
+    """Play `matches` concurrent bot-vs-bot matches; returns a stats dict."""
+    import resource
+    import tracemalloc
+
+    server = MatchServer()
+    listener = await server.serve(host, port) if in_process else None
+    tracemalloc.start()
+    start = time.perf_counter()
+    # Open the connections gradually so the accept backlog is never overrun
+    tasks = []
+    for i in range(2 * matches):
+        tasks.append(asyncio.create_task(play_match(host, port, f"bot{i}", best_of)))
+        if i % 200 == 199:
+            await asyncio.sleep(0)
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    elapsed = time.perf_counter() - start
+    _, peak_traced = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    if listener:
+        listener.close()
+        await listener.wait_closed()
+    errors = [result for result in results if isinstance(result, Exception)]
+    sample = Match(0, (Player("a", None), Player("b", None)), best_of)
+    match_bytes = sum(sys.getsizeof(getattr(sample, slot)) for slot in Match.__slots__) + sys.getsizeof(sample)
+    return {'matches': matches, 'seconds': elapsed, 'errors': len(errors), 'first_error': errors[0] if errors else None,
+            'peak_concurrent': server.stats['peak_matches'], 'finished': server.stats['finished'],
+            'forfeits': server.stats['forfeits'], 'match_bytes': match_bytes,
+            'peak_traced_mb': peak_traced / 1e6,
+            'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}
+
+
+if __name__ == "__main__":
+    # Usage: python rps_server.py serve [PORT]              - run the match server
+    #        python rps_server.py play [PORT] [bot]         - play one match with random moves
+    #        python rps_server.py bench [MATCHES] [BEST_OF] - concurrent bot matches on one event loop
+    command = sys.argv[1] if len(sys.argv) > 1 else "serve"
+    if command == "serve":
+        port = int(sys.argv[2]) if len(sys.argv) > 2 else 8766
+
+        async def main():
+            listener = await MatchServer().serve(port=port)
+            print(f"RPS match server on 127.0.0.1:{port}")
+            async with listener:
+                await listener.serve_forever()
+        asyncio.run(main())
+    elif command == "play":
+        port = int(sys.argv[2]) if len(sys.argv) > 2 else 8766
+        print(asyncio.run(play_match("127.0.0.1", port, "cli", vs_bot=len(sys.argv) > 3)))
+    else:
+        matches = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+        best_of = int(sys.argv[3]) if len(sys.argv) > 3 else 3
+        stats = asyncio.run(load_test(matches, best_of))
+        print(f"{stats['matches']:,} matches (best of {best_of}) on one event loop in {stats['seconds']:.1f}s: "
+              f"peak {stats['peak_concurrent']:,} concurrent, {stats['finished']:,} finished, "
+              f"{stats['forfeits']:,} forfeits, {stats['errors']:,} client errors")
+        print(f"~{stats['match_bytes']} bytes of state per match; peak traced {stats['peak_traced_mb']:.1f} MB "
+              f"(server + {2 * matches:,} clients), RSS {stats['peak_rss_mb']:.0f} MB")
+        if stats['first_error']:
+            print(f"first error: {stats['first_error']!r}")
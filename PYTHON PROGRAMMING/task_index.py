@@ -0,0 +1,244 @@
+import math
+import os
+import pickle
+import re
+import sys
+import time
+from bisect import bisect_left
+from collections import Counter
+
+WORD_RE = re.compile(r"\w+")
+TAG_RE = re.compile(r"#(\w+)")
+
+
+def tokenize(text):
+    """Lower-cased words of a description (a '#tag' contributes the word 'tag')."""
+    return WORD_RE.findall(text.lower())
+
+
+def task_tags(text):
+    """'#tags' written in a description, lower-cased and de-duplicated in order."""
+    return list(dict.fromkeys(TAG_RE.findall(text.lower())))
+
+
+class TaskIndex:
+    """Inverted index over task descriptions with tag and created-date filters.
+
+    Postings map each term to {task id: term frequency}, and each task
+    keeps its own term counts so an edit or delete touches only that
+    task's postings. Results are ranked with BM25; the last query word
+    also matches as a prefix, so the list narrows while typing. The index
+    records the store sequence number it reflects and is pickled next to
+    the tasks file, so startup only replays what changed since.
+    """
+
+    VERSION = 1
+    K1 = 1.2
+    B = 0.75
+    MAX_PREFIX_TERMS = 50
+
+    def __init__(self):
+        self.postings = {}
+        self.doc_terms = {}
+        self.lengths = {}
+        self.tags = {}
+        self.doc_tags = {}
+        self.dates = {}
+        self.total_length = 0
+        self.seq = 0
+        self.vocabulary = None  # Sorted terms for prefix search, rebuilt when the term set changes
+        self.dirty = False
+
+    # Maintenance ---------------------------------------------------------
+
+    def add(self, task):
+        task_id = task['id']
+        if task_id in self.doc_terms:
+            self.remove(task_id)
+        terms = dict(Counter(tokenize(task['description'])))
+        self.doc_terms[task_id] = terms
+        self.lengths[task_id] = sum(terms.values())
+        self.total_length += self.lengths[task_id]
+        for term, count in terms.items():
+            if term not in self.postings:
+                self.postings[term] = {}
+                self.vocabulary = None
+            self.postings[term][task_id] = count
+        self.doc_tags[task_id] = task_tags(task['description'])
+        for tag in self.doc_tags[task_id]:
+            self.tags.setdefault(tag, set()).add(task_id)
+        self.dates[task_id] = task['created_at']
+        self.dirty = True
+
+    def remove(self, task_id):
+        terms = self.doc_terms.pop(task_id, None)
+        if terms is None:
+            return
+        self.total_length -= self.lengths.pop(task_id)
+        for term in terms:
+            postings = self.postings[term]
+            del postings[task_id]
+            if not postings:
+                del self.postings[term]
+                self.vocabulary = None
+        for tag in self.doc_tags.pop(task_id):
+            self.tags[tag].discard(task_id)
+            if not self.tags[tag]:
+                del self.tags[tag]
+        del self.dates[task_id]
+        self.dirty = True
+
+    def rebuild(self, store):
+        self.__init__()
+        for task in store.values():
+            self.add(task)
+        self.seq = store.seq
+
+    def apply(self, changes, store):
+        """Follow a RecordStore change dict (local write or pulled from another window)."""
+        if changes is None:
+            return
+        if changes['reloaded']:
+            self.rebuild(store)
+            return
+        for task_id in changes['deleted']:
+            self.remove(task_id)
+        for task_id in changes['changed']:
+            self.add(store.records[task_id])
+        self.seq = store.seq
+        self.dirty = True
+
+    # Persistence ---------------------------------------------------------
+
+    def save(self, path):
+        # Per-task views are derived from the postings on load, which is cheaper than unpickling them
+        state = {'version': self.VERSION, 'seq': self.seq, 'postings': self.postings, 'tags': self.tags,
+                 'dates': self.dates}
+        with open(f"{path}.tmp", 'wb') as file:
+            pickle.dump(state, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(f"{path}.tmp", path)
+        self.dirty = False
+
+    @classmethod
+    def open(cls, path, store):
+        """Load the saved index and catch it up with the store, rebuilding only if it cannot be."""
+        index = cls()
+        try:
+            with open(path, 'rb') as file:
+                state = pickle.load(file)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            state = None
+        if state is None or state.get('version') != cls.VERSION or not store.base <= state['seq'] <= store.seq:
+            # Missing, or older than the snapshot's journal can explain
+            index.rebuild(store)
+            return index
+
+        index.postings, index.tags, index.dates, index.seq = state['postings'], state['tags'], state['dates'], state['seq']
+        index.doc_terms = {task_id: {} for task_id in index.dates}
+        for term, postings in index.postings.items():
+            for task_id, count in postings.items():
+                index.doc_terms[task_id][term] = count
+        index.lengths = {task_id: sum(terms.values()) for task_id, terms in index.doc_terms.items()}
+        index.total_length = sum(index.lengths.values())
+        index.doc_tags = {task_id: [] for task_id in index.dates}
+        for tag, ids in index.tags.items():
+            for task_id in ids:
+                index.doc_tags[task_id].append(tag)
+        index.dirty = index.catch_up(store)
+        return index
+
+    def catch_up(self, store):
+        """Re-index tasks changed after our sequence number; returns whether anything changed."""
+        changed = {task_id for task_id, rev in store.revs.items() if rev > self.seq}
+        deleted = set(self.doc_terms) - set(store.records)
+        self.apply({'changed': changed, 'deleted': deleted, 'reloaded': False}, store)
+        if len(self.doc_terms) != len(store.records):
+            self.rebuild(store)  # The tasks file was replaced under the index
+        return bool(changed or deleted)
+
+    # Search --------------------------------------------------------------
+
+    def _prefix_terms(self, prefix):
+        if self.vocabulary is None:
+            self.vocabulary = sorted(self.postings)
+        start = bisect_left(self.vocabulary, prefix)
+        terms = []
+        for term in self.vocabulary[start:start + self.MAX_PREFIX_TERMS]:
+            if not term.startswith(prefix):
+                break
+            terms.append(term)
+        return terms
+
+    def _matches(self, term, prefix=False):
+        """{task id: term frequency} for a query word (summed over prefix expansions)."""
+        if not prefix:
+            return self.postings.get(term, {})
+        matches = Counter()
+        for expansion in self._prefix_terms(term):
+            matches.update(self.postings[expansion])
+        return matches
+
+    def search(self, query="", tags=(), start=None, end=None, limit=None):
+        """Ranked task ids matching every query word, every tag and the created-date range.
+
+        `start`/`end` are inclusive 'YYYY-MM-DD' dates. Without query
+        words the matches come back newest first.
+        """
+        words = tokenize(query)
+        candidates = None
+        for tag in tags:
+            ids = self.tags.get(tag.lower().lstrip("#"), set())
+            candidates = set(ids) if candidates is None else candidates & ids
+
+        n_docs = len(self.doc_terms)
+        average_length = self.total_length / n_docs if n_docs else 0.0
+        scores = None
+        # Rarest words first, so the candidate set shrinks fastest
+        matches = [self._matches(word, prefix=(i == len(words) - 1 and not query[-1:].isspace()))
+                   for i, word in enumerate(words)]
+        for postings in sorted(matches, key=len):
+            if not postings:
+                return []
+            idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            ids = postings.keys() if scores is None else scores.keys() & postings.keys()
+            if candidates is not None:
+                ids = ids & candidates
+            new_scores = {}
+            for task_id in ids:
+                tf = postings[task_id]
+                norm = tf + self.K1 * (1 - self.B + self.B * self.lengths[task_id] / average_length)
+                new_scores[task_id] = (scores[task_id] if scores else 0.0) + idf * tf * (self.K1 + 1) / norm
+            scores = new_scores
+
+        if scores is None:
+            ids = candidates if candidates is not None else self.doc_terms.keys()
+            scores = dict.fromkeys(ids, 0.0)
+        if start or end:
+            low = start or ""
+            high = f"{end} 99" if end else "9999"  # Inclusive of the whole end day
+            scores = {task_id: score for task_id, score in scores.items() if low <= self.dates[task_id] <= high}
+        # Ties (and unranked filter-only results) show the newest task first
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], -item[0]))
+        return ranked[:limit] if limit else ranked
+
+
+if __name__ == "__main__":
+    # Usage: python task_index.py [tasks.json] QUERY [#tag ...]  - search the persisted index
+    from record_store import RecordStore
+
+    path = sys.argv[1] if len(sys.argv) > 1 and sys.argv[1].endswith(".json") else "tasks.json"
+    words = [arg for arg in sys.argv[1:] if arg != path]
+    store = RecordStore(path)
+    start = time.perf_counter()
+    index = TaskIndex.open(f"{path}.index", store)
+    opened = time.perf_counter() - start
+    if index.dirty:
+        index.save(f"{path}.index")
+    start = time.perf_counter()
+    results = index.search(" ".join(w for w in words if not w.startswith("#")),
+                           tags=[w for w in words if w.startswith("#")], limit=10)
+    searched = time.perf_counter() - start
+    print(f"{len(index.doc_terms):,} tasks, {len(index.postings):,} terms "
+          f"(opened in {opened * 1e3:.0f} ms, searched in {searched * 1e3:.2f} ms)")
+    for task_id, score in results:
+        print(f"  {score:6.2f}  {task_id}: {store.records[task_id]['description']}")
@@ -0,0 +1,325 @@
+import gzip
+import hashlib
+import json
+import os
+import sys
+import threading
+import urllib.request
+import uuid
+from bisect import bisect_right
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from record_store import FileLock
+
+BATCH_SIZE = 500
+PULL_LIMIT = 2000
+
+
+def record_digest(record):
+    """Content hash of a task without its local id/uid, to spot real edits after store compaction."""
+    content = {key: value for key, value in record.items() if key not in ('id', 'uid')}
+    return hashlib.blake2b(json.dumps(content, sort_keys=True).encode(), digest_size=8).hexdigest()
+
+
+def encode_body(payload):
+    return gzip.compress(json.dumps(payload, separators=(",", ":")).encode(), compresslevel=6)
+
+
+def decode_body(data, encoding):
+    return json.loads(gzip.decompress(data) if encoding == "gzip" else data)
+
+
+# Server ------------------------------------------------------------------
+
+class SyncState:
+    """The server's view: the winning entry per task and each replica's entries in counter order.
+
+    An entry is {'uid', 'origin', 'counter', 'stamp': [lamport, origin],
+    'record': task or None for a delete}. Concurrent edits of a task are
+    resolved by the larger stamp, which every replica compares the same
+    way. Accepted entries are appended to `log_path` and replayed at start.
+    """
+
+    def __init__(self, log_path=None):
+        self.log_path = log_path
+        self.lock = threading.Lock()
+        self.winners = {}
+        self.counters = {}  # origin -> [counter, ...] ascending
+        self.uids = {}  # origin -> [uid, ...] parallel to counters
+        if log_path and os.path.exists(log_path):
+            with open(log_path, 'r') as file:
+                for line in file:
+                    if line.endswith("\n"):  # Skip a torn final line
+                        self._accept(json.loads(line))
+
+    def _accept(self, entry):
+        counters = self.counters.setdefault(entry['origin'], [])
+        if counters and entry['counter'] <= counters[-1]:
+            return False  # A retried upload
+        counters.append(entry['counter'])
+        self.uids.setdefault(entry['origin'], []).append(entry['uid'])
+        current = self.winners.get(entry['uid'])
+        if current is None or entry['stamp'] > current['stamp']:
+            self.winners[entry['uid']] = entry
+        return True
+
+    def push(self, origin, entries):
+        with self.lock:
+            accepted = [entry for entry in (dict(entry, origin=origin) for entry in entries) if self._accept(entry)]
+            if accepted and self.log_path:
+                with open(self.log_path, 'a') as file:
+                    file.write("".join(json.dumps(entry) + "\n" for entry in accepted))
+                    file.flush()
+                    os.fsync(file.fileno())
+        return {'accepted': len(accepted)}
+
+    def pull(self, vector, limit=PULL_LIMIT):
+        """Winning entries the caller's version vector does not cover, at most `limit` of them."""
+        entries, vector = [], dict(vector)
+        with self.lock:
+            for origin in sorted(self.counters):
+                counters, uids = self.counters[origin], self.uids[origin]
+                start = bisect_right(counters, vector.get(origin, 0))
+                for i in range(start, len(counters)):
+                    if len(entries) >= limit:
+                        return {'entries': entries, 'vector': vector, 'more': True}
+                    winner = self.winners[uids[i]]
+                    # Superseded entries are skipped; the caller gets the winner instead
+                    if winner['origin'] == origin and winner['counter'] == counters[i]:
+                        entries.append(winner)
+                    vector[origin] = counters[i]
+        return {'entries': entries, 'vector': vector, 'more': False}
+
+
+class SyncHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        try:
+            body = decode_body(self.rfile.read(int(self.headers['Content-Length'])),
+                               self.headers.get('Content-Encoding'))
+            if self.path == "/push":
+                result = self.server.state.push(body['origin'], body['entries'])
+            elif self.path == "/pull":
+                result = self.server.state.pull(body['vector'], body.get('limit', PULL_LIMIT))
+            else:
+                self.send_error(404)
+                return
+        except (ValueError, KeyError, TypeError, OSError) as e:
+            self.send_error(400, str(e))
+            return
+        data = encode_body(result)
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_server(host="127.0.0.1", port=8765, log_path=None):
+    server = ThreadingHTTPServer((host, port), SyncHandler)
+    server.state = SyncState(log_path)
+    return server
+
+
+# Client ------------------------------------------------------------------
+
+class SyncClient:
+    """One replica of a RecordStore of tasks, synced through a SyncState server.
+
+    A sync round has three steps so a GUI can run the network part in a
+    worker thread: collect() (store reads, main thread) gathers tasks that
+    changed since the last sync, exchange() uploads them in gzip batches
+    and pulls the entries this replica's version vector does not cover,
+    and apply() writes the pulled winners to the store and saves the
+    replica state next to the tasks file. Windows sharing a tasks file
+    share the replica; its lock is held from collect() until apply() or
+    abort(), so only one of them syncs at a time.
+    """
+
+    def __init__(self, store, url, state_path=None, timeout=30):
+        self.store = store
+        self.url = url.rstrip("/")
+        self.state_path = state_path or f"{store.path}.sync"
+        self.lock = FileLock(f"{self.state_path}.lock")
+        self.timeout = timeout
+        self.bytes_sent = self.bytes_received = 0
+        self.load_state()
+
+    def load_state(self):
+        try:
+            with open(self.state_path, 'r') as file:
+                state = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            replica = getattr(self, 'replica', None) or uuid.uuid4().hex[:12]
+            state = {'replica': replica, 'counter': 0, 'lamport': 0, 'vector': {}, 'synced': {}}
+        self.replica = state['replica']
+        self.counter = state['counter']
+        self.lamport = state['lamport']
+        self.vector = state['vector']
+        self.synced = state['synced']  # uid -> [store rev, digest, stamp] as of the last sync
+
+    def save_state(self):
+        state = {'replica': self.replica, 'counter': self.counter, 'lamport': self.lamport,
+                 'vector': self.vector, 'synced': self.synced}
+        with open(f"{self.state_path}.tmp", 'w') as file:
+            json.dump(state, file)
+        os.replace(f"{self.state_path}.tmp", self.state_path)
+
+    def uid(self, record):
+        return record.get('uid') or f"{self.replica}.{record['id']}"
+
+    def collect(self):
+        """Entries for tasks added, edited or deleted since the last sync (None if another window is syncing)."""
+        if not self.lock.acquire(timeout=0):
+            return None
+        self.load_state()  # Another window may have synced since
+        entries, revs, live = [], {}, set()
+        for record in self.store.values():
+            uid = self.uid(record)
+            live.add(uid)
+            rev = self.store.rev(record['id'])
+            revs[uid] = rev
+            synced = self.synced.get(uid)
+            if synced and synced[0] == rev:
+                continue
+            digest = record_digest(record)
+            if synced and synced[1] == digest:
+                synced[0] = rev  # Only renumbered by a compaction
+                continue
+            content = {key: value for key, value in record.items() if key not in ('id', 'uid')}
+            entries.append({'uid': uid, 'record': content, 'digest': digest})
+        entries += [{'uid': uid, 'record': None} for uid in self.synced.keys() - live]
+        for entry in entries:
+            self.counter += 1
+            self.lamport += 1
+            entry['counter'] = self.counter
+            entry['stamp'] = [self.lamport, self.replica]
+        return {'entries': entries, 'revs': revs}
+
+    def _post(self, path, payload):
+        data = encode_body(payload)
+        request = urllib.request.Request(f"{self.url}{path}", data=data, headers={
+            'Content-Type': 'application/json', 'Content-Encoding': 'gzip', 'Accept-Encoding': 'gzip'})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            body = response.read()
+            encoding = response.headers.get('Content-Encoding')
+        self.bytes_sent += len(data)
+        self.bytes_received += len(body)
+        return decode_body(body, encoding)
+
+    def exchange(self, sync_round):
+        """Upload the round's entries in batches and pull what this replica has not seen (no store access)."""
+        entries = sync_round['entries']
+        for start in range(0, len(entries), BATCH_SIZE):
+            batch = [{key: entry[key] for key in ('uid', 'counter', 'stamp', 'record')}
+                     for entry in entries[start:start + BATCH_SIZE]]
+            self._post("/push", {'origin': self.replica, 'entries': batch})
+        vector = dict(self.vector, **{self.replica: self.counter})
+        pulled = []
+        while True:
+            page = self._post("/pull", {'vector': vector, 'limit': PULL_LIMIT})
+            pulled += page['entries']
+            vector = page['vector']
+            if not page['more']:
+                break
+        sync_round['pulled'], sync_round['vector'] = pulled, vector
+        return sync_round
+
+    def apply(self, sync_round, timeout=None):
+        """Write pulled winners to the store and record the round; returns the store's change dict.
+
+        Tasks edited locally while the round was in flight keep the local
+        edit; it goes out next round with a newer stamp and wins then.
+        Raises ConflictError if another window wrote a pulled task first,
+        or TimeoutError if the store stays locked for `timeout` seconds;
+        the vector is left behind so the next round pulls it again.
+        """
+        try:
+            return self._apply(sync_round, timeout)
+        finally:
+            self.abort()
+
+    def abort(self):
+        """End a round without applying it (the upload failed); keeps the counter advanced."""
+        self.save_state()
+        self.lock.release()
+
+    def _apply(self, sync_round, timeout=None):
+        for entry in sync_round['entries']:
+            if entry['record'] is None:
+                self.synced.pop(entry['uid'], None)
+            else:
+                self.synced[entry['uid']] = [sync_round['revs'][entry['uid']], entry['digest'], entry['stamp']]
+        local_ids = {self.uid(record): record['id'] for record in self.store.values()}
+        puts, deletes, expected, stamps = [], [], {}, {}
+        for entry in sync_round['pulled']:
+            self.lamport = max(self.lamport, entry['stamp'][0])
+            uid, task_id = entry['uid'], local_ids.get(entry['uid'])
+            synced = self.synced.get(uid)
+            if synced and entry['stamp'] <= synced[2]:
+                continue
+            if task_id is not None:
+                if self.store.rev(task_id) != sync_round['revs'].get(uid, self.store.rev(task_id)):
+                    continue  # Edited during the round
+                expected[task_id] = self.store.rev(task_id)
+            if entry['record'] is None:
+                if task_id is not None:
+                    deletes.append(task_id)
+                self.synced.pop(uid, None)
+                continue
+            record = dict(entry['record'], uid=uid)
+            if task_id is not None:
+                record['id'] = task_id
+            puts.append(record)
+            stamps[uid] = entry['stamp']
+        changes = self.store.write(puts, deletes, expected, timeout) if puts or deletes else None
+        for record in self.store.values():
+            uid = record.get('uid')
+            if uid in stamps:
+                self.synced[uid] = [self.store.rev(record['id']), record_digest(record), stamps[uid]]
+        self.vector = sync_round['vector']
+        return changes
+
+    def sync(self):
+        """One full round in the calling thread."""
+        sync_round = self.collect()
+        if sync_round is None:
+            return None
+        try:
+            self.exchange(sync_round)
+        except Exception:
+            self.abort()
+            raise
+        return self.apply(sync_round)
+
+
+if __name__ == "__main__":
+    # Usage: python task_sync.py serve [PORT] [LOG]         - run a sync server on localhost
+    #        python task_sync.py sync [URL] [tasks.json]     - sync a tasks file once
+    if len(sys.argv) > 1 and sys.argv[1] == "serve":
+        port = int(sys.argv[2]) if len(sys.argv) > 2 else 8765
+        server = make_server(port=port, log_path=sys.argv[3] if len(sys.argv) > 3 else "sync-server.jsonl")
+        print(f"Sync server on http://127.0.0.1:{port} ({len(server.state.winners):,} tasks)")
+        server.serve_forever()
+    elif len(sys.argv) > 1 and sys.argv[1] == "sync":
+        from record_store import RecordStore
+
+        store = RecordStore(sys.argv[3] if len(sys.argv) > 3 else "tasks.json")
+        client = SyncClient(store, sys.argv[2] if len(sys.argv) > 2 else "http://127.0.0.1:8765")
+        sync_round = client.collect()
+        if sync_round is None:
+            sys.exit("Another window is syncing this tasks file")
+        try:
+            client.exchange(sync_round)
+        except Exception:
+            client.abort()
+            raise
+        changes = client.apply(sync_round)
+        received = len(changes['changed']) + len(changes['deleted']) if changes else 0
+        print(f"Replica {client.replica}: sent {len(sync_round['entries']):,} changes, applied {received:,} "
+              f"({client.bytes_sent:,} bytes up, {client.bytes_received:,} bytes down)")
+    else:
+        print("Usage: python task_sync.py serve [PORT] [LOG] | sync [URL] [tasks.json]")
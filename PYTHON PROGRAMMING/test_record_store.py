@@ -0,0 +1,117 @@
+import json
+
+import pytest
+
+from record_store import ConflictError, FileLock, RecordStore
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "tasks.json")
+
+
+def test_other_instances_replay_the_journal(path):
+    writer, reader = RecordStore(path), RecordStore(path)
+    writer.write(puts=[{'description': "first"}, {'description': "second"}])
+    writer.write(puts=[dict(writer.records[1], description="edited")], deletes=[2])
+
+    changes = reader.refresh()
+    assert changes == {'changed': {1}, 'deleted': {2}, 'reloaded': False}
+    assert reader.records == writer.records == {1: {'id': 1, 'description': "edited"}}
+    assert RecordStore(path).records == writer.records
+    assert reader.refresh() is None
+
+
+def test_torn_journal_line_is_ignored_and_overwritten(path):
+    writer = RecordStore(path)
+    writer.write(puts=[{'description': "kept"}])
+    with open(writer.log_path, 'ab') as file:
+        file.write(b'{"seq": 2, "op": "put", "rec')  # A writer that crashed mid-line
+
+    store = RecordStore(path)
+    assert list(store.records) == [1]
+    store.write(puts=[{'description': "next"}])
+    assert RecordStore(path).records == store.records
+
+
+def test_stale_edit_raises_conflict_and_writes_nothing(path):
+    first, second = RecordStore(path), RecordStore(path)
+    first.write(puts=[{'description': "task"}])
+    second.refresh()
+    stale_rev = second.rev(1)
+    first.write(puts=[dict(first.records[1], description="theirs")], expected={1: first.rev(1)})
+
+    with pytest.raises(ConflictError):
+        second.write(puts=[dict(second.records[1], description="mine")], expected={1: stale_rev})
+    assert second.records[1]['description'] == "theirs"  # The failed write still pulled the change
+    assert RecordStore(path).records[1]['description'] == "theirs"
+
+
+def test_compaction_rewrites_the_snapshot_and_restarts_the_journal(path):
+    store, other = RecordStore(path, compact_every=3), RecordStore(path)
+    for n in range(5):
+        store.write(puts=[{'description': f"task {n}"}])
+
+    with open(path) as file:
+        assert [record['id'] for record in json.load(file)] == [1, 2, 3]
+    assert store.base == 3 and store.seq == 5
+    changes = other.refresh()
+    assert changes['reloaded'] and other.records == store.records
+    assert RecordStore(path).records == store.records
+
+
+def test_ids_of_deleted_records_are_not_reused(path):
+    store = RecordStore(path, compact_every=2)
+    store.write(puts=[{'description': "a"}, {'description': "b"}])
+    store.write(deletes=[2])  # Compacts: the snapshot no longer holds id 2
+
+    reopened = RecordStore(path)
+    reopened.write(puts=[{'description': "c"}])
+    assert sorted(reopened.records) == [1, 3]
+
+
+def test_write_fails_at_once_while_another_instance_holds_the_lock(path):
+    store = RecordStore(path)
+    other = FileLock(f"{path}.lock")
+    assert other.acquire(timeout=0)
+    try:
+        with pytest.raises(TimeoutError):
+            store.write(puts=[{'description': "blocked"}], timeout=0)
+    finally:
+        other.release()
+    store.write(puts=[{'description': "after"}], timeout=0)
+    assert list(store.records) == [1]
+
+
+def test_lock_is_not_taken_twice_through_one_object(path):
+    lock = FileLock(f"{path}.lock")
+    assert lock.acquire(timeout=0)
+    held = lock.file
+    assert not lock.acquire(timeout=0)
+    assert lock.file is held
+    lock.release()
+    assert lock.acquire(timeout=0)
+    lock.release()
+
+
+def test_run_exclusive_folds_the_journal_without_touching_the_callers_records(path):
+    store, other = RecordStore(path), RecordStore(path)
+    store.write(puts=[{'description': "journalled"}])
+    before = dict(store.records)
+
+    def bulk_append(current):
+        assert current is not store and current.seq == current.base  # Compacted first
+        with open(path) as file:
+            records = json.load(file)
+        records.append({'id': current.next_id, 'description': "bulk"})
+        with open(path, 'w') as file:
+            json.dump(records, file)
+        return current.next_id
+
+    assert store.run_exclusive(bulk_append, modifies=True) == 2
+    assert store.records == before
+    assert other.refresh()['reloaded'] and store.refresh()['reloaded']
+    assert store.records == other.records == {1: {'id': 1, 'description': "journalled"},
+                                             2: {'id': 2, 'description': "bulk"}}
+    store.write(puts=[{'description': "after"}])
+    assert max(store.records) == 3
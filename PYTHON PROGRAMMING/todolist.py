@@ -1,8 +1,19 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import json
 import os
+import queue
+import threading
+import time
 from datetime import datetime
+from instrumentation import timed, phase, start_metrics
+from record_store import RecordStore, ConflictError
+from task_index import TaskIndex
+from reminders import ReminderScheduler
+from task_sync import SyncClient
+
+DUE_FORMAT = "%Y-%m-%d %H:%M"
+SYNC_URL = os.environ.get("TASK_SYNC_URL", "http://127.0.0.1:8765")  # Setting it also turns on auto-sync
+SYNC_INTERVAL_MS = 60_000
 
 class ToDoApp:
     def __init__(self, root):
@@ -11,7 +22,12 @@ class ToDoApp:
         self.root.geometry("650x500")
         self.root.configure(bg="#f0f4f8")  # Light blue-gray background
         self.filename = "tasks.json"
+        self.store = RecordStore(self.filename)  # Shared safely with other To-Do windows
         self.tasks = self.load_tasks()
+        self.row_ids = []  # Task id shown on each Listbox row
+        with phase("tasks.index_open"):
+            self.index = TaskIndex.open(self.filename + ".index", self.store)
+        self.index_saved_at = datetime.now()
 
         # Configure style
         self.style = ttk.Style()
@@ -22,21 +38,190 @@ class ToDoApp:
 
         # GUI Components
         self.create_gui()
+        self.reminders = ReminderScheduler(self.root, self.remind)
+        self.reminders.rebuild((task['id'], task.get('due_at')) for task in self.tasks if not task['completed'])
+        self.sync_client = SyncClient(self.store, SYNC_URL)
+        self.sync_job = None
+        self.root.after(1000, self.poll_store)
+        if "TASK_SYNC_URL" in os.environ:
+            self.root.after(SYNC_INTERVAL_MS, self.auto_sync)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
 
+    @timed("tasks.load")
     def load_tasks(self):
-        """Load tasks from JSON file."""
-        if os.path.exists(self.filename):
+        """Current tasks from the shared store."""
+        return self.store.values()
+
+    @timed("tasks.save")
+    def save_tasks(self, puts=(), deletes=(), expected=None):
+        """Commit changed tasks; returns False if another window changed them first or holds the store."""
+        try:
+            with phase("tasks.commit"):
+                changes = self.store.write(puts, deletes, expected, timeout=0)  # Never wait on the Tk thread
+        except ConflictError as e:
+            self.refresh_after_conflict()
+            messagebox.showwarning("Conflict", f"{str(e)}. The list has been refreshed, please try again.")
+            return False
+        except TimeoutError:
+            messagebox.showwarning("Busy", "Another window is saving tasks, please try again in a moment.")
+            return False
+        self.apply_changes(changes)
+        return True
+
+    def refresh_after_conflict(self):
+        """Redraw from the store: a failed write still pulled other windows' changes, which polling will not report."""
+        self.tasks = self.load_tasks()
+        self.index.catch_up(self.store)
+        self.reschedule({'changed': set(), 'deleted': set(), 'reloaded': True})
+        self.update_task_list()
+
+    @timed("tasks.poll_store")
+    def poll_store(self):
+        """Show tasks other windows have saved (one stat per poll when nothing changed)."""
+        self.apply_changes(self.store.refresh())
+        if self.index.dirty and (datetime.now() - self.index_saved_at).total_seconds() >= 30:
+            self.save_index()
+        self.root.after(1000, self.poll_store)
+
+    @timed("tasks.save_index")
+    def save_index(self):
+        """Persist the search index next to the tasks so the next start only catches up."""
+        self.index.save(self.filename + ".index")
+        self.index_saved_at = datetime.now()
+
+    def sync_tasks(self, quiet=False):
+        """Send changed tasks to the sync server and apply other workstations' changes."""
+        if self.sync_job is not None:
+            return
+        sync_round = self.sync_client.collect()
+        if sync_round is None:
+            if not quiet:
+                messagebox.showinfo("Sync", "Another window is syncing these tasks right now.")
+            return
+        results = queue.Queue()
+
+        def run():
             try:
-                with open(self.filename, 'r') as file:
-                    return json.load(file)
-            except json.JSONDecodeError:
-                return []
-        return []
+                results.put(self.sync_client.exchange(sync_round))
+            except Exception as e:
+                results.put(e)
+        self.sync_job = threading.Thread(target=run, daemon=True)  # Network only; the store stays on this thread
+        self.sync_job.start()
 
-    def save_tasks(self):
-        """Save tasks to JSON file."""
-        with open(self.filename, 'w') as file:
-            json.dump(self.tasks, file, indent=4)
+        def poll():
+            try:
+                result = results.get_nowait()
+            except queue.Empty:
+                self.root.after(200, poll)
+                return
+            self.sync_job = None
+            if isinstance(result, Exception):
+                self.sync_client.abort()
+                if not quiet:
+                    messagebox.showerror("Error", f"Sync failed: {str(result)}")
+                return
+            try:
+                with phase("tasks.sync_apply"):
+                    changes = self.sync_client.apply(result, timeout=0)
+            except ConflictError:
+                self.refresh_after_conflict()
+                if not quiet:
+                    messagebox.showwarning("Conflict", "Tasks changed in another window during the sync, please sync again.")
+                return
+            except TimeoutError:
+                if not quiet:
+                    messagebox.showwarning("Busy", "Another window is saving tasks, please sync again in a moment.")
+                return
+            self.apply_changes(changes)
+            if not quiet:
+                received = len(changes['changed']) + len(changes['deleted']) if changes else 0
+                messagebox.showinfo("Sync", f"Sent {len(result['entries']):,} and received {received:,} changed tasks")
+        poll()
+
+    def auto_sync(self):
+        self.sync_tasks(quiet=True)
+        self.root.after(SYNC_INTERVAL_MS, self.auto_sync)
+
+    def on_close(self):
+        if self.index.dirty:
+            self.save_index()
+        self.root.destroy()
+
+    def apply_changes(self, changes):
+        """Patch only the Listbox rows of changed tasks; redraw after a reload or while filtering."""
+        if changes is None:
+            return
+        self.tasks = self.load_tasks()
+        self.index.apply(changes, self.store)
+        self.reschedule(changes)
+        if changes['reloaded'] or self.filter_var.get() != 0 or self.search_active() or \
+                len(changes['changed']) + len(changes['deleted']) > 500:
+            self.update_task_list()
+            return
+        for task_id in changes['deleted']:
+            if task_id in self.row_ids:
+                row = self.row_ids.index(task_id)
+                self.task_list.delete(row)
+                self.row_ids.pop(row)
+        for task_id in sorted(changes['changed']):
+            if task_id in self.row_ids:
+                row = self.row_ids.index(task_id)
+                self.task_list.delete(row)
+            else:
+                row = len(self.row_ids)
+                self.row_ids.append(task_id)
+            self.insert_task_row(row, self.store.records[task_id])
+
+    def reschedule(self, changes):
+        """Move the reminders of changed tasks; O(log n) per task."""
+        if changes['reloaded']:
+            self.reminders.rebuild((task['id'], task.get('due_at')) for task in self.tasks if not task['completed'])
+            return
+        for task_id in changes['deleted']:
+            self.reminders.cancel(task_id)
+        now = time.time()
+        for task_id in changes['changed']:
+            task = self.store.records[task_id]
+            due_at = task.get('due_at')
+            self.reminders.schedule(task_id, None if task['completed'] or due_at is None or due_at <= now else due_at)
+
+    def remind(self, task_ids):
+        """Called by the scheduler when tasks fall due: recolor their rows and tell the user."""
+        tasks = [self.store.records[task_id] for task_id in task_ids if task_id in self.store.records]
+        for task in tasks:
+            if task['id'] in self.row_ids:
+                row = self.row_ids.index(task['id'])
+                self.task_list.delete(row)
+                self.insert_task_row(row, task)
+        if tasks:
+            lines = "\n".join(f"ID {task['id']}: {task['description']}" for task in tasks[:10])
+            more = f"\n...and {len(tasks) - 10} more" if len(tasks) > 10 else ""
+            messagebox.showinfo("Reminder", f"Due now:\n{lines}{more}")
+
+    def parse_due(self):
+        """Due date typed in the Due field as epoch seconds (None if empty)."""
+        value = self.due_entry.get().strip()
+        if not value:
+            return None
+        try:
+            return int(datetime.strptime(value, DUE_FORMAT).timestamp())
+        except ValueError:
+            raise ValueError("Due date must be YYYY-MM-DD HH:MM")
+
+    def insert_task_row(self, row, task):
+        status = "✓" if task['completed'] else " "
+        task_text = f"[{status}] ID: {task['id']} | {task['description']} | Created: {task['created_at']}"
+        due_at = task.get('due_at')
+        if due_at is not None:
+            task_text += f" | Due: {datetime.fromtimestamp(due_at).strftime(DUE_FORMAT)}"
+        self.task_list.insert(row, task_text)
+        # Color completed tasks differently
+        if task['completed']:
+            self.task_list.itemconfig(row, {'fg': '#2e7d32', 'bg': '#c8e6c9'})  # Green for completed
+        elif due_at is not None and due_at <= time.time():
+            self.task_list.itemconfig(row, {'fg': '#c62828', 'bg': '#ffebee'})  # Red for overdue
+        else:
+            self.task_list.itemconfig(row, {'fg': '#37474f', 'bg': '#ffffff'})  # Dark gray text on white
 
     def add_task(self):
         """Add a new task."""
@@ -44,34 +229,44 @@ class ToDoApp:
         if not description:
             messagebox.showwarning("Input Error", "Task description cannot be empty!")
             return
+        try:
+            due_at = self.parse_due()
+        except ValueError as e:
+            messagebox.showerror("Input Error", str(e))
+            return
         task = {
-            'id': len(self.tasks) + 1,
             'description': description,
             'completed': False,
-            'created_at': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            'created_at': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            'due_at': due_at
         }
-        self.tasks.append(task)
-        self.save_tasks()
-        self.entry.delete(0, tk.END)
-        self.update_task_list()
+        if self.save_tasks(puts=[task]):  # The store assigns the next free id
+            self.entry.delete(0, tk.END)
+            self.due_entry.delete(0, tk.END)
 
     def update_task(self):
-        """Update selected task's description."""
+        """Update selected task's description (and due date, if one is typed)."""
         selected = self.task_list.curselection()
         if not selected:
             messagebox.showwarning("Selection Error", "Please select a task to update!")
             return
-        task_id = int(self.task_list.get(selected[0]).split("|")[0].strip()[4:])
+        task_id = self.row_ids[selected[0]]
         new_desc = self.entry.get().strip()
         if new_desc:
-            for task in self.tasks:
-                if task['id'] == task_id:
-                    task['description'] = new_desc
-                    self.save_tasks()
+            try:
+                due_at = self.parse_due()
+            except ValueError as e:
+                messagebox.showerror("Input Error", str(e))
+                return
+            task = self.store.records.get(task_id)
+            if task is not None:
+                updated = dict(task, description=new_desc)
+                if due_at is not None:
+                    updated['due_at'] = due_at
+                if self.save_tasks(puts=[updated], expected={task_id: self.store.rev(task_id)}):
                     self.entry.delete(0, tk.END)
-                    self.update_task_list()
+                    self.due_entry.delete(0, tk.END)
                     messagebox.showinfo("Success", f"Task {task_id} updated")
-                    return
         else:
             messagebox.showwarning("Input Error", "New description cannot be empty!")
 
@@ -81,14 +276,12 @@ class ToDoApp:
         if not selected:
             messagebox.showwarning("Selection Error", "Please select a task to update!")
             return
-        task_id = int(self.task_list.get(selected[0]).split("|")[0].strip()[4:])
-        for task in self.tasks:
-            if task['id'] == task_id:
-                task['completed'] = not task['completed']
-                self.save_tasks()
-                self.update_task_list()
+        task_id = self.row_ids[selected[0]]
+        task = self.store.records.get(task_id)
+        if task is not None:
+            updated = dict(task, completed=not task['completed'])
+            if self.save_tasks(puts=[updated], expected={task_id: self.store.rev(task_id)}):
                 messagebox.showinfo("Success", f"Task {task_id} status updated")
-                return
 
     def delete_task(self):
         """Delete selected task."""
@@ -96,29 +289,62 @@ class ToDoApp:
         if not selected:
             messagebox.showwarning("Selection Error", "Please select a task to delete!")
             return
-        task_id = int(self.task_list.get(selected[0]).split("|")[0].strip()[4:])
-        for i, task in enumerate(self.tasks):
-            if task['id'] == task_id:
-                self.tasks.pop(i)
-                self.save_tasks()
-                self.update_task_list()
+        task_id = self.row_ids[selected[0]]
+        if task_id in self.store.records:
+            if self.save_tasks(deletes=[task_id], expected={task_id: self.store.rev(task_id)}):
                 messagebox.showinfo("Success", f"Task {task_id} deleted")
-                return
 
+    def search_active(self):
+        return any(var.get().strip() for var in (self.search_var, self.tags_var, self.from_var, self.to_var))
+
+    def search_criteria(self, strict=True):
+        """Query, tags and date range from the search bar (an invalid date is ignored unless strict)."""
+        dates = []
+        for var in (self.from_var, self.to_var):
+            value = var.get().strip() or None
+            if value:
+                try:
+                    datetime.strptime(value, "%Y-%m-%d")
+                except ValueError:
+                    if strict:
+                        raise
+                    value = None
+            dates.append(value)
+        tags = [tag for tag in self.tags_var.get().replace(",", " ").split() if tag.strip("#")]
+        return self.search_var.get(), tags, dates[0], dates[1]
+
+    @timed("tasks.search")
+    def search_tasks(self, event=None):
+        """Re-run the search as the user types."""
+        try:
+            self.update_task_list()
+            self.search_criteria()
+        except ValueError:
+            # Dates are checked once a full YYYY-MM-DD has been typed
+            if event is None or all(len(var.get().strip()) in (0, 10) for var in (self.from_var, self.to_var)):
+                messagebox.showerror("Input Error", "Dates must be YYYY-MM-DD")
+        except Exception as e:
+            messagebox.showerror("Error", f"Search failed: {str(e)}")
+
+    def clear_search(self):
+        for var in (self.search_var, self.tags_var, self.from_var, self.to_var):
+            var.set("")
+        self.update_task_list()
+
+    @timed("tasks.refresh_list")
     def update_task_list(self):
-        """Update the task list display."""
+        """Update the task list display (ranked search results while searching)."""
         self.task_list.delete(0, tk.END)
+        self.row_ids = []
         filter_completed = self.filter_var.get()
-        for task in self.tasks:
+        tasks = self.tasks
+        if self.search_active():
+            query, tags, start, end = self.search_criteria(strict=False)
+            tasks = [self.store.records[task_id] for task_id, _ in self.index.search(query, tags, start, end)]
+        for task in tasks:
             if filter_completed == 0 or (filter_completed == 1 and not task['completed']) or (filter_completed == 2 and task['completed']):
-                status = "✓" if task['completed'] else " "
-                task_text = f"[{status}] ID: {task['id']} | {task['description']} | Created: {task['created_at']}"
-                self.task_list.insert(tk.END, task_text)
-                # Color completed tasks differently
-                if task['completed']:
-                    self.task_list.itemconfig(tk.END, {'fg': '#2e7d32', 'bg': '#c8e6c9'})  # Green for completed
-                else:
-                    self.task_list.itemconfig(tk.END, {'fg': '#37474f', 'bg': '#ffffff'})  # Dark gray text on white
+                self.insert_task_row(tk.END, task)
+                self.row_ids.append(task['id'])
 
     def create_gui(self):
         """Create the styled GUI components."""
@@ -133,8 +359,11 @@ class ToDoApp:
         input_frame = tk.Frame(main_frame, bg="#f0f4f8")
         input_frame.pack(fill="x", pady=5)
         ttk.Label(input_frame, text="Task Description:").pack(side="left")
-        self.entry = ttk.Entry(input_frame, width=50, font=("Helvetica", 10))
+        self.entry = ttk.Entry(input_frame, width=40, font=("Helvetica", 10))
         self.entry.pack(side="left", padx=10)
+        ttk.Label(input_frame, text="Due:").pack(side="left")
+        self.due_entry = ttk.Entry(input_frame, width=16, font=("Helvetica", 10))  # YYYY-MM-DD HH:MM, optional
+        self.due_entry.pack(side="left", padx=10)
 
         # Buttons
         button_frame = tk.Frame(main_frame, bg="#f0f4f8")
@@ -143,6 +372,7 @@ class ToDoApp:
         ttk.Button(button_frame, text="Update Task", command=self.update_task, style="TButton").pack(side="left", padx=5)
         ttk.Button(button_frame, text="Toggle Status", command=self.toggle_status, style="TButton").pack(side="left", padx=5)
         ttk.Button(button_frame, text="Delete Task", command=self.delete_task, style="TButton").pack(side="left", padx=5)
+        ttk.Button(button_frame, text="Sync", command=self.sync_tasks, style="TButton").pack(side="left", padx=5)
 
         # Filter options
         filter_frame = tk.Frame(main_frame, bg="#f0f4f8", relief="groove", borderwidth=2)
@@ -152,6 +382,21 @@ class ToDoApp:
         ttk.Radiobutton(filter_frame, text="Pending", variable=self.filter_var, value=1, command=self.update_task_list).pack(side="left", padx=10)
         ttk.Radiobutton(filter_frame, text="Completed", variable=self.filter_var, value=2, command=self.update_task_list).pack(side="left", padx=10)
 
+        # Search bar: words (last one matches as a prefix), #tags and a created-date range
+        search_frame = tk.Frame(main_frame, bg="#f0f4f8")
+        search_frame.pack(fill="x", pady=5)
+        self.search_var = tk.StringVar()
+        self.tags_var = tk.StringVar()
+        self.from_var = tk.StringVar()
+        self.to_var = tk.StringVar()
+        for label, var, width in (("Search:", self.search_var, 20), ("Tags:", self.tags_var, 12),
+                                  ("From:", self.from_var, 10), ("To:", self.to_var, 10)):
+            ttk.Label(search_frame, text=label, font=("Helvetica", 10)).pack(side="left")
+            entry = ttk.Entry(search_frame, textvariable=var, width=width, font=("Helvetica", 10))
+            entry.pack(side="left", padx=(2, 8))
+            entry.bind("<KeyRelease>", self.search_tasks)
+        ttk.Button(search_frame, text="Clear", command=self.clear_search).pack(side="left")
+
         # Task list with scrollbar
         list_frame = tk.Frame(main_frame, bg="#f0f4f8")
         list_frame.pack(fill="both", expand=True, pady=10)
@@ -163,6 +408,7 @@ class ToDoApp:
         self.update_task_list()
 
 if __name__ == "__main__":
+    start_metrics("tasks")
     root = tk.Tk()
     app = ToDoApp(root)
     root.mainloop()
\ No newline at end of file
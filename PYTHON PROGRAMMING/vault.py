@@ -0,0 +1,284 @@
+import base64
+import hashlib
+import hmac
+import json
+import os
+import string
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+TARGET_SECONDS = 0.5
+CACHE_TTL = 300  # Seconds a derived key stays usable without retyping the master password
+KEY_BYTES = 64  # 32 for encryption, 32 for authentication
+CHARSETS = {'upper': string.ascii_uppercase, 'lower': string.ascii_lowercase,
+            'digits': string.digits, 'special': string.punctuation}
+
+
+class VaultError(Exception):
+    """Wrong master password, or a vault file that was corrupted or tampered with."""
+
+
+# Key derivation ----------------------------------------------------------
+
+def derive_key(password, salt, params):
+    """KEY_BYTES of key material from a password with the vault's KDF parameters."""
+    password = password.encode() if isinstance(password, str) else password
+    if params['kdf'] == 'scrypt':
+        return hashlib.scrypt(password, salt=salt, n=params['n'], r=params['r'], p=params['p'],
+                              maxmem=256 * params['n'] * params['r'], dklen=KEY_BYTES)
+    return hashlib.pbkdf2_hmac('sha256', password, salt, params['iterations'], dklen=KEY_BYTES)
+
+
+def calibrate(target_seconds=TARGET_SECONDS, kdf='scrypt'):
+    """KDF parameters that take about `target_seconds` on this machine.
+
+    Times a cheap setting and scales the cost linearly (scrypt doubles N,
+    which doubles both time and memory; PBKDF2 scales iterations).
+    """
+    salt = os.urandom(16)
+    if kdf == 'scrypt':
+        params = {'kdf': 'scrypt', 'n': 2 ** 12, 'r': 8, 'p': 1}
+        start = time.perf_counter()
+        derive_key(b"calibration", salt, params)
+        elapsed = time.perf_counter() - start
+        while elapsed * 2 <= target_seconds and params['n'] < 2 ** 20:  # 2**20 with r=8 is 1 GiB
+            params['n'] *= 2
+            elapsed *= 2
+        return params
+    params = {'kdf': 'pbkdf2', 'iterations': 20_000}
+    start = time.perf_counter()
+    derive_key(b"calibration", salt, params)
+    elapsed = time.perf_counter() - start
+    params['iterations'] = max(100_000, int(params['iterations'] * target_seconds / elapsed))
+    return params
+
+
+def _derive_job(job):
+    password, salt, params = job
+    return derive_key(password, salt, params)
+
+
+def derive_many(password, salts, params, workers=None):
+    """derive_key for many salts, spread over a process pool (each derivation is deliberately slow)."""
+    jobs = [(password, salt, params) for salt in salts]
+    if not workers or workers <= 1 or len(jobs) < 2:
+        return [_derive_job(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+        return list(pool.map(_derive_job, jobs))
+
+
+class KeyCache:
+    """Derived keys held for the session, each expiring `ttl` seconds after it was derived.
+
+    Entries are looked up by a keyed hash of the password, so the cache
+    never stores the password itself; the hashing key is random per session.
+    """
+
+    def __init__(self, ttl=CACHE_TTL, clock=time.monotonic):
+        self.ttl = ttl
+        self.clock = clock
+        self.secret = os.urandom(32)
+        self.entries = {}
+
+    def _key(self, password, salt, params):
+        password = password.encode() if isinstance(password, str) else password
+        tag = hmac.new(self.secret, password, hashlib.sha256).digest()
+        return tag, salt, json.dumps(params, sort_keys=True)
+
+    def get(self, password, salt, params):
+        entry = self.entries.get(self._key(password, salt, params))
+        if entry is None or entry[1] <= self.clock():
+            return None
+        return entry[0]
+
+    def put(self, password, salt, params, key):
+        self.entries[self._key(password, salt, params)] = (key, self.clock() + self.ttl)
+
+    def derive(self, password, salt, params):
+        key = self.get(password, salt, params)
+        if key is None:
+            key = derive_key(password, salt, params)
+            self.put(password, salt, params, key)
+        return key
+
+    def derive_many(self, password, salts, params, workers=None):
+        """Cached keys where available; the misses are derived together over the pool."""
+        keys = [self.get(password, salt, params) for salt in salts]
+        missing = [i for i, key in enumerate(keys) if key is None]
+        for i, key in zip(missing, derive_many(password, [salts[i] for i in missing], params, workers)):
+            keys[i] = key
+            self.put(password, salts[i], params, key)
+        return keys
+
+    def purge(self):
+        """Drop expired keys; returns how many are still live."""
+        now = self.clock()
+        self.entries = {name: entry for name, entry in self.entries.items() if entry[1] > now}
+        return len(self.entries)
+
+    def clear(self):
+        self.entries = {}
+
+
+# Deterministic site passwords --------------------------------------------
+
+def site_salt(vault_salt, site, counter=1):
+    """Per-site salt: the same master password, site and counter always give the same password."""
+    return hashlib.sha256(vault_salt + f"site:{site.strip().lower()}:{counter}".encode()).digest()
+
+
+def password_from_key(key, length, classes=tuple(CHARSETS)):
+    """A password of `length` drawn from `classes` with one of each, using key bytes without modulo bias."""
+    stream = _keystream(key, b"site-password")
+    alphabet = "".join(CHARSETS[name] for name in classes)
+
+    def pick(chars):
+        limit = 256 - 256 % len(chars)  # Reject bytes that would favour the first characters
+        while True:
+            byte = next(stream)
+            if byte < limit:
+                return chars[byte % len(chars)]
+
+    chosen = [pick(CHARSETS[name]) for name in classes]
+    chosen += [pick(alphabet) for _ in range(length - len(chosen))]
+    for i in range(len(chosen) - 1, 0, -1):  # Fisher-Yates with the same unbiased picks
+        j = pick(range(i + 1))
+        chosen[i], chosen[j] = chosen[j], chosen[i]
+    return "".join(chosen)
+
+
+def _keystream(key, label):
+    counter = 0
+    while True:
+        yield from hmac.new(key, label + counter.to_bytes(8, 'big'), hashlib.sha256).digest()
+        counter += 1
+
+
+# Encrypted vault ---------------------------------------------------------
+
+def _xor_keystream(key, nonce, data):
+    """HMAC-SHA256 in counter mode; the standard library has no block cipher."""
+    blocks = bytearray()
+    for counter in range(0, (len(data) + 31) // 32):
+        blocks += hmac.new(key, nonce + counter.to_bytes(8, 'big'), hashlib.sha256).digest()
+    return bytes(a ^ b for a, b in zip(data, blocks))
+
+
+def encrypt(key, plaintext):
+    """Encrypt-then-MAC with the two halves of a derived key."""
+    nonce = os.urandom(16)
+    ciphertext = _xor_keystream(key[:32], nonce, plaintext)
+    tag = hmac.new(key[32:], nonce + ciphertext, hashlib.sha256).digest()
+    return nonce, ciphertext, tag
+
+
+def decrypt(key, nonce, ciphertext, tag):
+    expected = hmac.new(key[32:], nonce + ciphertext, hashlib.sha256).digest()
+    if not hmac.compare_digest(expected, tag):
+        raise VaultError("Wrong master password or damaged vault")
+    return _xor_keystream(key[:32], nonce, ciphertext)
+
+
+class Vault:
+    """Site -> password entries encrypted under a key derived from the master password.
+
+    The file records the salt and the KDF parameters calibrated when it
+    was created, so every machine unlocks it with the same settings and
+    deterministic site passwords stay stable across machines. Unlocked
+    keys live in a KeyCache, so the vault relocks when they expire.
+    """
+
+    def __init__(self, path="vault.json", cache=None):
+        self.path = path
+        self.cache = cache or KeyCache()
+        self.header = None
+        self.entries = None
+        self.password = None
+        if os.path.exists(path):
+            with open(path, 'r') as file:
+                self.header = json.load(file)
+
+    @property
+    def exists(self):
+        return self.header is not None
+
+    @property
+    def unlocked(self):
+        return not self.expire()
+
+    def expire(self):
+        """Lock if the unlock key has left the cache; returns whether the vault is locked."""
+        if self.entries is not None and self.cache.get(self.password, self.salt, self.header['params']) is None:
+            self.lock()
+        return self.entries is None
+
+    @property
+    def salt(self):
+        return base64.b64decode(self.header['salt'])
+
+    def create(self, password, params=None):
+        if len(password) < 8:
+            raise ValueError("Master password must be at least 8 characters")
+        self.header = {'version': 1, 'salt': base64.b64encode(os.urandom(16)).decode(),
+                       'params': params or calibrate()}
+        self.entries = {}
+        self.password = password
+        self.save()
+
+    def unlock(self, password):
+        key = self.cache.derive(password, self.salt, self.header['params'])
+        try:
+            plaintext = decrypt(key, *(base64.b64decode(self.header[name]) for name in ('nonce', 'data', 'tag')))
+        except VaultError:
+            self.cache.clear()
+            raise
+        self.entries = json.loads(plaintext)
+        self.password = password
+
+    def lock(self):
+        self.entries = None
+        self.password = None
+        self.cache.clear()
+
+    def save(self):
+        key = self.cache.derive(self.password, self.salt, self.header['params'])
+        nonce, data, tag = encrypt(key, json.dumps(self.entries).encode())
+        self.header.update({name: base64.b64encode(value).decode()
+                            for name, value in (('nonce', nonce), ('data', data), ('tag', tag))})
+        with open(f"{self.path}.tmp", 'w') as file:
+            json.dump(self.header, file, indent=4)
+        os.replace(f"{self.path}.tmp", self.path)
+
+    def site_passwords(self, sites, length, classes=tuple(CHARSETS), workers=None):
+        """Deterministic passwords for several sites, derived in parallel."""
+        salts = [site_salt(self.salt, site) for site in sites]
+        keys = self.cache.derive_many(self.password, salts, self.header['params'], workers)
+        return [password_from_key(key, length, classes) for key in keys]
+
+
+if __name__ == "__main__":
+    # Usage: python vault.py calibrate [seconds]   - KDF settings for this machine
+    #        python vault.py bench N [workers]      - derive N site keys serially vs over a pool
+    command = sys.argv[1] if len(sys.argv) > 1 else "calibrate"
+    if command == "calibrate":
+        target = float(sys.argv[2]) if len(sys.argv) > 2 else TARGET_SECONDS
+        for kdf in ('scrypt', 'pbkdf2'):
+            params = calibrate(target, kdf)
+            start = time.perf_counter()
+            derive_key("master password", os.urandom(16), params)
+            print(f"{params} -> {time.perf_counter() - start:.2f}s (target {target:.2f}s)")
+    else:
+        n = int(sys.argv[2])
+        workers = int(sys.argv[3]) if len(sys.argv) > 3 else os.cpu_count()
+        params = calibrate(0.1)
+        salts = [site_salt(b"bench", f"site{i}.example") for i in range(n)]
+        for label, count in (("serial", 1), (f"{workers} workers", workers)):
+            start = time.perf_counter()
+            derive_many("master password", salts, params, count)
+            print(f"{label}: {n} keys in {time.perf_counter() - start:.2f}s")
+        cache = KeyCache()
+        cache.derive_many("master password", salts, params, workers)
+        start = time.perf_counter()
+        cache.derive_many("master password", salts, params, workers)
+        print(f"cached: {n} keys in {(time.perf_counter() - start) * 1e3:.2f} ms")